@@ -0,0 +1,288 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+from datetime import datetime
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import scipy
+
+from src.core.filter_bank import (
+    EQ_FREQUENCIES, BAND_Q, PeakingFilterBank, design_peaking_sections, cached_peaking_sections,
+)
+from src.core.spectrum_analyzer import SpectrumAnalyzer
+
+SAMPLE_FORMAT_NAMES = ("int16", "float")
+
+def band_gains(active_bands):
+    gains = [0.0] * len(EQ_FREQUENCIES)
+    for i in range(active_bands):
+        gains[i] = 6.0 if i % 2 == 0 else -4.0
+    return gains
+
+def make_frames(frames, channels, sample_rate, sample_format, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(frames) / sample_rate
+    tone = 0.3 * np.sin(2 * np.pi * 440.0 * t)[:, None]
+    audio = (tone + 0.1 * rng.standard_normal((frames, channels))).astype(np.float32)
+    if sample_format == "int16":
+        return (audio * 32767).astype(np.int16)
+    return audio
+
+def percentiles(samples_ns):
+    samples_us = np.asarray(samples_ns, dtype=np.float64) / 1000.0
+    return {
+        'p50_us': float(np.percentile(samples_us, 50)),
+        'p95_us': float(np.percentile(samples_us, 95)),
+        'p99_us': float(np.percentile(samples_us, 99)),
+        'max_us': float(samples_us.max()),
+        'mean_us': float(samples_us.mean()),
+    }
+
+def transient_allocation(callable_, iterations):
+    tracemalloc.start()
+    try:
+        callable_()
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(iterations):
+            callable_()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'alloc_peak_bytes': max(0, peak - baseline),
+        'alloc_retained_bytes': max(0, current - baseline),
+    }
+
+def time_calls(callable_, iterations, warmup=10):
+    for _ in range(warmup):
+        callable_()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        callable_()
+        samples.append(time.perf_counter_ns() - start)
+    return samples
+
+def qt_sample_format(name):
+    from PyQt6.QtMultimedia import QAudioFormat
+    if name == "int16":
+        return QAudioFormat.SampleFormat.Int16
+    return QAudioFormat.SampleFormat.Float
+
+def bench_process(mode, buffer_frames, channels, sample_rate, sample_format, active_bands, iterations):
+    from src.core.equalizer_processor import EqualizerProcessor
+
+    qt_format = qt_sample_format(sample_format)
+    processor = EqualizerProcessor()
+    processor.configure_stream(sample_rate, channels, qt_format, buffer_frames)
+    processor.update_gains(band_gains(active_bands))
+
+    data = make_frames(buffer_frames, channels, sample_rate, sample_format)
+    payload = data.tobytes()
+
+    if mode == "qbuffer":
+        from PyQt6.QtMultimedia import QAudioFormat, QAudioBuffer
+        audio_format = QAudioFormat()
+        audio_format.setSampleRate(sample_rate)
+        audio_format.setChannelCount(channels)
+        audio_format.setSampleFormat(qt_format)
+        buffer = QAudioBuffer(payload, audio_format)
+
+        def step():
+            processor.process_frames(buffer.data(), qt_format, channels)
+    else:
+        def step():
+            processor.process_frames(payload, qt_format, channels)
+
+    samples = time_calls(step, iterations)
+    buffer_seconds = buffer_frames / sample_rate
+    total_ns = sum(samples)
+
+    result = {
+        'case': 'process_frames',
+        'mode': mode,
+        'buffer_frames': buffer_frames,
+        'channels': channels,
+        'sample_rate': sample_rate,
+        'sample_format': sample_format,
+        'active_bands': active_bands,
+        'iterations': iterations,
+        'realtime_factor': (buffer_seconds * iterations) / (total_ns / 1e9) if total_ns else 0.0,
+    }
+    result.update(percentiles(samples))
+    result.update(transient_allocation(step, min(iterations, 50)))
+    return result
+
+def bench_filter_bank(buffer_frames, channels, sample_rate, active_bands, iterations):
+    bank = PeakingFilterBank(sample_rate=sample_rate, channels=channels)
+    bank.set_gains(band_gains(active_bands))
+    block = make_frames(buffer_frames, channels, sample_rate, "float")
+
+    def step():
+        bank.process(block)
+
+    samples = time_calls(step, iterations)
+    total_ns = sum(samples)
+    result = {
+        'case': 'filter_bank',
+        'buffer_frames': buffer_frames,
+        'channels': channels,
+        'sample_rate': sample_rate,
+        'active_bands': active_bands,
+        'iterations': iterations,
+        'realtime_factor': (buffer_frames / sample_rate * iterations) / (total_ns / 1e9) if total_ns else 0.0,
+    }
+    result.update(percentiles(samples))
+    result.update(transient_allocation(step, min(iterations, 50)))
+    return result
+
+def bench_design(sample_rate, iterations):
+    results = []
+    gains = band_gains(len(EQ_FREQUENCIES))
+
+    samples = time_calls(lambda: design_peaking_sections(EQ_FREQUENCIES, gains, BAND_Q, sample_rate), iterations)
+    result = {'case': 'design_all_bands', 'sample_rate': sample_rate, 'iterations': iterations}
+    result.update(percentiles(samples))
+    results.append(result)
+
+    cached_peaking_sections(EQ_FREQUENCIES, gains, BAND_Q, sample_rate)
+    samples = time_calls(lambda: cached_peaking_sections(EQ_FREQUENCIES, gains, BAND_Q, sample_rate), iterations)
+    result = {'case': 'design_cached', 'sample_rate': sample_rate, 'iterations': iterations}
+    result.update(percentiles(samples))
+    results.append(result)
+
+    bank = PeakingFilterBank(sample_rate=sample_rate)
+    state = {'tick': 0}
+
+    def slider_tick():
+        state['tick'] += 1
+        tick_gains = list(gains)
+        tick_gains[3] = (state['tick'] % 25) - 12
+        bank.set_gains(tick_gains)
+
+    samples = time_calls(slider_tick, iterations)
+    result = {'case': 'slider_update', 'sample_rate': sample_rate, 'iterations': iterations}
+    result.update(percentiles(samples))
+    results.append(result)
+    return results
+
+def bench_spectrum(sample_rate, buffer_frames, iterations):
+    analyzer = SpectrumAnalyzer()
+    analyzer.configure(sample_rate)
+    block = make_frames(buffer_frames, 2, sample_rate, "float")
+
+    def step():
+        analyzer.push(block)
+        analyzer.compute()
+
+    samples = time_calls(step, iterations)
+    result = {'case': 'spectrum_frame', 'sample_rate': sample_rate, 'buffer_frames': buffer_frames,
+              'iterations': iterations}
+    result.update(percentiles(samples))
+    result.update(transient_allocation(step, min(iterations, 50)))
+    return result
+
+def bench_visualizer(iterations):
+    from PyQt6.QtWidgets import QApplication
+    from src.ui.widgets.equalizer_window import VisualizerWidget
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    widget = VisualizerWidget()
+    widget.resize(600, 150)
+    rng = np.random.default_rng(0)
+    bands = rng.random((64, widget.bars)).astype(np.float32)
+    state = {'i': 0}
+
+    def update_step():
+        widget.update_data(bands[state['i'] % len(bands)])
+        widget.advance_frame()
+        state['i'] += 1
+
+    def paint_step():
+        update_step()
+        widget.grab()
+
+    results = []
+    for name, step in (('visualizer_update', update_step), ('visualizer_paint', paint_step)):
+        samples = time_calls(step, iterations)
+        result = {'case': name, 'iterations': iterations}
+        result.update(percentiles(samples))
+        results.append(result)
+    app.processEvents()
+    return results
+
+def parse_int_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Equalizer DSP throughput benchmarks.")
+    parser.add_argument("--buffer-sizes", type=parse_int_list, default=[256, 1024, 4096])
+    parser.add_argument("--channels", type=parse_int_list, default=[1, 2])
+    parser.add_argument("--sample-rates", type=parse_int_list, default=[44100, 48000])
+    parser.add_argument("--formats", default=",".join(SAMPLE_FORMAT_NAMES))
+    parser.add_argument("--active-bands", type=parse_int_list, default=[0, 1, 5, 10])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--mode", choices=("frames", "qbuffer"), default="frames",
+                        help="Feed raw frames or synthetic QAudioBuffer objects")
+    parser.add_argument("--skip-processor", action="store_true",
+                        help="Skip EqualizerProcessor cases (they need QtMultimedia)")
+    parser.add_argument("--skip-visualizer", action="store_true")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    formats = [f for f in args.formats.split(",") if f in SAMPLE_FORMAT_NAMES]
+    results = []
+
+    for sample_rate in args.sample_rates:
+        results.extend(bench_design(sample_rate, args.iterations))
+        results.append(bench_spectrum(sample_rate, 1024, args.iterations))
+
+        for buffer_frames in args.buffer_sizes:
+            for channels in args.channels:
+                for active_bands in args.active_bands:
+                    results.append(bench_filter_bank(buffer_frames, channels, sample_rate, active_bands,
+                                                     args.iterations))
+                    if args.skip_processor:
+                        continue
+                    for sample_format in formats:
+                        results.append(bench_process(args.mode, buffer_frames, channels, sample_rate,
+                                                     sample_format, active_bands, args.iterations))
+
+    if not args.skip_visualizer:
+        results.extend(bench_visualizer(args.iterations))
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'processor': platform.processor(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'scipy': scipy.__version__,
+            'mode': args.mode,
+        },
+        'results': results,
+    }
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    for r in results:
+        label = r['case']
+        detail = " ".join(f"{k}={r[k]}" for k in ('buffer_frames', 'channels', 'sample_rate', 'sample_format',
+                                                 'active_bands') if k in r)
+        rt = f" rt={r['realtime_factor']:.0f}x" if 'realtime_factor' in r else ""
+        print(f"{label:18} {detail:70} p50={r['p50_us']:8.1f}us p99={r['p99_us']:8.1f}us{rt}")
+    print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import numpy as np
+
+LATENCY_PROFILES = {
+    "low_latency": {"sink_buffer_ms": 20, "ring_ms": 40, "drain_interval_ms": 5},
+    "balanced": {"sink_buffer_ms": 80, "ring_ms": 200, "drain_interval_ms": 20},
+    "power_saving": {"sink_buffer_ms": 250, "ring_ms": 750, "drain_interval_ms": 80},
+}
+
+DEFAULT_LATENCY_PROFILE = "balanced"
+
+class AudioRingBuffer:
+    def __init__(self, capacity, frame_bytes=1):
+        self.overruns = 0
+        self.dropped_bytes = 0
+        self.resize(capacity, frame_bytes)
+
+    def resize(self, capacity, frame_bytes=1):
+        self.frame_bytes = max(1, frame_bytes)
+        self.capacity = max(self.frame_bytes, capacity - capacity % self.frame_bytes)
+        self._data = np.zeros(self.capacity, dtype=np.uint8)
+        self.clear()
+
+    def free(self):
+        return self.capacity - self.fill
+
+    def clear(self):
+        self._read_pos = 0
+        self._write_pos = 0
+        self.fill = 0
+
+    def write(self, data):
+        src = np.frombuffer(data, dtype=np.uint8)
+        size = len(src)
+        free = self.free()
+        accepted = min(size, free - free % self.frame_bytes)
+
+        if accepted < size:
+            self.overruns += 1
+            self.dropped_bytes += size - accepted
+
+        if accepted <= 0:
+            return 0
+
+        first = min(accepted, self.capacity - self._write_pos)
+        self._data[self._write_pos:self._write_pos + first] = src[:first]
+        if first < accepted:
+            self._data[:accepted - first] = src[first:accepted]
+
+        self._write_pos = (self._write_pos + accepted) % self.capacity
+        self.fill += accepted
+        return accepted
+
+    def drain_into(self, device, limit):
+        written = 0
+        limit = min(limit, self.fill)
+
+        while written < limit:
+            chunk = min(limit - written, self.capacity - self._read_pos)
+            accepted = device.write(self._data[self._read_pos:self._read_pos + chunk])
+            if accepted <= 0:
+                break
+
+            self._read_pos = (self._read_pos + accepted) % self.capacity
+            self.fill -= accepted
+            written += accepted
+
+            if accepted < chunk:
+                break
+
+        return written
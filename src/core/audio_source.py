@@ -0,0 +1,319 @@
+import os
+import mmap
+import struct
+import multiprocessing
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+SOURCE_BLOCK_FRAMES = 65536
+DECODER_WAIT_MS = 5000
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+class AudioSource(ABC):
+    # Yields float32 frames shaped (frames, channels) in [-1, 1]. Arrays returned by read()
+    # are reused scratch space and stay valid only until the next call.
+
+    sample_rate = 0
+    channels = 0
+    frames = None
+    position = 0
+
+    @abstractmethod
+    def seek(self, frame):
+        ...
+
+    @abstractmethod
+    def read(self, frames):
+        ...
+
+    def close(self):
+        pass
+
+    def read_range(self, start, count):
+        self.seek(start)
+        return self.read(count)
+
+    def blocks(self, block_frames=SOURCE_BLOCK_FRAMES, start=0, end=None):
+        if start or self.position:
+            self.seek(start)
+        remaining = None if end is None else max(0, end - start)
+        while remaining is None or remaining > 0:
+            want = block_frames if remaining is None else min(block_frames, remaining)
+            block = self.read(want)
+            if not len(block):
+                break
+            if remaining is not None:
+                remaining -= len(block)
+            yield block
+
+    @property
+    def duration(self):
+        return self.frames / self.sample_rate if self.frames is not None and self.sample_rate else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _scratch(self, frames):
+        buf = getattr(self, '_block', None)
+        if buf is None or buf.shape[0] < frames:
+            buf = np.zeros((frames, self.channels), dtype=np.float32)
+            self._block = buf
+        return buf[:frames]
+
+def parse_wav_header(path):
+    # Returns (format_code, channels, sample_rate, bits, data_offset, frames) or None if the
+    # file is not a plain RIFF/WAVE the memory-mapped reader understands.
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+            return None
+
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return None
+            chunk_id, chunk_size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                body = f.read(chunk_size)
+                code, channels, rate, _, block_align, bits = struct.unpack('<HHIIHH', body[:16])
+                if code == _WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    code = struct.unpack('<H', body[24:26])[0]
+                fmt = (code, channels, rate, bits, block_align)
+                if chunk_size % 2:
+                    f.seek(1, os.SEEK_CUR)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    return None
+                offset = f.tell()
+                code, channels, rate, bits, block_align = fmt
+                # Streamed writers leave the size at 0 or 0xFFFFFFFF; trust the file length instead.
+                available = size - offset
+                data_bytes = chunk_size if 0 < chunk_size <= available else available
+                return code, channels, rate, bits, offset, data_bytes // block_align
+            else:
+                f.seek(chunk_size + (chunk_size % 2), os.SEEK_CUR)
+
+class WavSource(AudioSource):
+    def __init__(self, path, header=None):
+        # `header` is parse_wav_header(path), when the caller has already read it.
+        if header is None:
+            header = parse_wav_header(path)
+        if header is None:
+            raise ValueError(f"Not a readable WAV file: {path}")
+        code, self.channels, self.sample_rate, bits, offset, self.frames = header
+
+        if code == _WAVE_FORMAT_PCM and bits in (8, 16, 24, 32):
+            width = bits // 8
+            dtype = {1: np.uint8, 2: np.int16, 3: np.uint8, 4: np.int32}[width]
+            shape = (self.frames, self.channels, 3) if width == 3 else (self.frames, self.channels)
+            self._scale = 1.0 / float(2 ** (bits - 1))
+        elif code == _WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+            dtype = np.float32 if bits == 32 else np.float64
+            shape = (self.frames, self.channels)
+            self._scale = 1.0
+        else:
+            raise ValueError(f"Unsupported WAV encoding {code:#x} ({bits} bit): {path}")
+
+        self.path = path
+        self.bits = bits
+        self.position = 0
+        self._wide = None
+        self._mmap = None
+        self._map = None
+        if self.frames:
+            # The mapping is owned here rather than by np.memmap so close() can release it.
+            with open(path, 'rb') as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            count = int(np.prod(shape))
+            self._map = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset).reshape(shape)
+
+    def seek(self, frame):
+        self.position = min(max(0, int(frame)), self.frames)
+
+    def read(self, frames):
+        start = self.position
+        count = max(0, min(frames, self.frames - start))
+        out = self._scratch(count)
+        if not count:
+            return out
+
+        samples = self._map[start:start + count]
+        if self.bits == 24:
+            # Place the three little-endian bytes in the top of an int32, which sign-extends
+            # them; the factor of 256 that leaves is folded into the scale.
+            wide = self._wide_scratch(count)
+            wide[..., 1:] = samples
+            np.copyto(out, wide.view(np.int32)[..., 0], casting='unsafe')
+            out *= np.float32(self._scale / 256.0)
+        elif self.bits == 8:
+            np.subtract(samples, np.float32(128.0), out=out)
+            out *= self._scale
+        else:
+            np.multiply(samples, self._scale, out=out, casting='unsafe')
+
+        self.position = start + count
+        return out
+
+    def _wide_scratch(self, frames):
+        # The low byte of every int32 stays zero; reads only fill the top three.
+        buf = self._wide
+        if buf is None or buf.shape[0] < frames:
+            buf = np.zeros((frames, self.channels, 4), dtype=np.uint8)
+            self._wide = buf
+        return buf[:frames]
+
+    def close(self):
+        self._map = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+class DecoderSource(AudioSource):
+    # Pulls buffers from QAudioDecoder on demand. The backend only decodes a few buffers
+    # ahead of read(), so memory stays bounded regardless of file length. Needs a
+    # QCoreApplication; one is created when used from a plain worker process.
+
+    def __init__(self, path):
+        from PyQt6.QtCore import QCoreApplication, QEventLoop, QTimer, QUrl
+        from PyQt6.QtMultimedia import QAudioDecoder
+
+        if QCoreApplication.instance() is None:
+            self._app = QCoreApplication([])
+
+        self.path = path
+        self._decoder = QAudioDecoder()
+        self._loop = QEventLoop()
+        # One timer, restarted for every wait, bounds how long _next_buffer blocks.
+        self._wait_timer = QTimer()
+        self._wait_timer.setSingleShot(True)
+        self._wait_timer.setInterval(DECODER_WAIT_MS)
+        self._wait_timer.timeout.connect(self._loop.quit)
+        self._decoder.bufferReady.connect(self._loop.quit)
+        self._decoder.finished.connect(self._on_finished)
+        self._decoder.error.connect(self._on_error)
+        self._decoder.setSource(QUrl.fromLocalFile(os.path.abspath(path)))
+
+        self._pending = []
+        self._finished = False
+        self._error = None
+        self._start()
+
+        first = self._next_buffer()
+        if first is None:
+            raise ValueError(self._error or f"Could not decode {path}")
+        self._pending.append(first)
+
+        duration_ms = self._decoder.duration()
+        self.frames = int(duration_ms * self.sample_rate / 1000) if duration_ms > 0 else None
+
+    def _start(self):
+        self._decoder.start()
+        self._finished = False
+        self.position = 0
+
+    def _on_finished(self):
+        self._finished = True
+        self._loop.quit()
+
+    def _on_error(self, *args):
+        self._error = self._decoder.errorString()
+        self._finished = True
+        self._loop.quit()
+
+    def _next_buffer(self):
+        from PyQt6.QtMultimedia import QAudioFormat
+
+        while not self._decoder.bufferAvailable():
+            if self._finished:
+                return None
+            self._wait_timer.start()
+            self._loop.exec()
+            self._wait_timer.stop()
+            if not self._decoder.bufferAvailable() and not self._decoder.isDecoding():
+                return None
+
+        buffer = self._decoder.read()
+        fmt = buffer.format()
+        self.sample_rate = fmt.sampleRate()
+        self.channels = fmt.channelCount()
+
+        data = buffer.constData()
+        data.setsize(buffer.byteCount())
+        sample_format = fmt.sampleFormat()
+        if sample_format == QAudioFormat.SampleFormat.Float:
+            samples = np.frombuffer(data, dtype=np.float32).copy()
+        elif sample_format == QAudioFormat.SampleFormat.Int16:
+            samples = np.frombuffer(data, dtype=np.int16) * np.float32(1.0 / 32768.0)
+        elif sample_format == QAudioFormat.SampleFormat.Int32:
+            samples = (np.frombuffer(data, dtype=np.int32) * (1.0 / 2147483648.0)).astype(np.float32)
+        elif sample_format == QAudioFormat.SampleFormat.UInt8:
+            samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+        else:
+            raise ValueError(f"Unsupported decoder sample format: {sample_format}")
+        return samples.reshape(-1, self.channels)
+
+    def _take(self, frames, out=None):
+        filled = 0
+        while filled < frames:
+            if not self._pending:
+                chunk = self._next_buffer()
+                if chunk is None:
+                    break
+                self._pending.append(chunk)
+
+            chunk = self._pending[0]
+            take = min(len(chunk), frames - filled)
+            if out is not None:
+                out[filled:filled + take] = chunk[:take]
+            filled += take
+            if take == len(chunk):
+                self._pending.pop(0)
+            else:
+                self._pending[0] = chunk[take:]
+
+        self.position += filled
+        return filled
+
+    def seek(self, frame):
+        # QAudioDecoder cannot seek: restart when going backwards, then decode and drop.
+        frame = max(0, int(frame))
+        if frame < self.position:
+            self._decoder.stop()
+            self._pending = []
+            self._start()
+        self._take(frame - self.position)
+
+    def read(self, frames):
+        out = self._scratch(frames)
+        return out[:self._take(frames, out)]
+
+    def close(self):
+        if self._decoder is not None:
+            self._wait_timer.stop()
+            self._decoder.stop()
+            self._decoder = None
+        self._pending = []
+
+def open_source(path):
+    header = parse_wav_header(path)
+    if header is not None:
+        try:
+            return WavSource(path, header)
+        except ValueError:
+            pass
+    return DecoderSource(path)
+
+def analysis_pool(workers=None):
+    # Spawned rather than forked: decoder-backed sources start Qt in the child, and the
+    # parent is usually a running Qt application.
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
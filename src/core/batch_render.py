@@ -0,0 +1,156 @@
+import os
+import sys
+import time
+import wave
+import argparse
+from concurrent.futures import as_completed
+
+import numpy as np
+
+from .filter_bank import PeakingFilterBank, EQ_FREQUENCIES
+from .limiter import LookAheadLimiter
+from .audio_source import open_source, analysis_pool
+
+RENDER_BLOCK_FRAMES = 65536
+
+def render_file(input_path, output_path, gains_db, frequencies=EQ_FREQUENCIES, block_frames=RENDER_BLOCK_FRAMES):
+    started = time.perf_counter()
+    frames_rendered = 0
+
+    with open_source(input_path) as src:
+        sample_rate = src.sample_rate
+        channels = src.channels
+
+        bank = PeakingFilterBank(frequencies, sample_rate=sample_rate, channels=channels)
+        bank.set_gains(gains_db)
+        bank.reset(channels)
+        limiter = LookAheadLimiter(sample_rate, channels)
+        skip = limiter.latency
+
+        out = np.zeros((max(block_frames, limiter.latency), channels), dtype=np.int16)
+
+        with wave.open(output_path, 'wb') as dst:
+            dst.setnchannels(channels)
+            dst.setsampwidth(2)
+            dst.setframerate(sample_rate)
+
+            for block in src.blocks(block_frames):
+                processed = bank.process(block)
+                frames = processed.shape[0]
+                limiter.process_into(processed, out[:frames], 32768.0)
+
+                # Drop the limiter's look-ahead delay so the render lines up with the source.
+                dropped = min(skip, frames)
+                skip -= dropped
+                dst.writeframes(out[dropped:frames])
+                frames_rendered += frames - dropped
+
+            tail = limiter.latency
+            flush = np.zeros((tail, channels), dtype=np.float32)
+            limiter.process_into(bank.process(flush), out[:tail], 32768.0)
+            dst.writeframes(out[skip:tail])
+            frames_rendered += tail - skip
+
+    elapsed = time.perf_counter() - started
+    duration = frames_rendered / sample_rate if sample_rate else 0.0
+    return {
+        'input': input_path,
+        'output': output_path,
+        'frames': frames_rendered,
+        'duration': duration,
+        'elapsed': elapsed,
+        'realtime_factor': duration / elapsed if elapsed > 0 else 0.0,
+    }
+
+def output_paths(input_paths, output_dir, suffix="_eq"):
+    # Outputs mirror the inputs' folders below their common root, so A/01.flac and
+    # B/01.flac do not render onto the same file; names that still collide (song.flac
+    # next to song.mp3) get a numeric suffix. Repeated inputs are rendered once.
+    paths = list(dict.fromkeys(os.path.abspath(path) for path in input_paths))
+    if not paths:
+        return {}
+    try:
+        root = os.path.commonpath([os.path.dirname(path) for path in paths])
+    except ValueError:
+        # Different drives: no common root to mirror from.
+        root = None
+
+    outputs = {}
+    taken = set()
+    for path in paths:
+        stem = os.path.splitext(path)[0]
+        relative = os.path.relpath(stem, root) if root else os.path.basename(stem)
+        candidate = os.path.join(output_dir, f"{relative}{suffix}.wav")
+        counter = 2
+        while os.path.normcase(candidate) in taken:
+            candidate = os.path.join(output_dir, f"{relative}{suffix}_{counter}.wav")
+            counter += 1
+        taken.add(os.path.normcase(candidate))
+        outputs[path] = candidate
+    return outputs
+
+def render_files(input_paths, output_dir, gains_db, workers=None, frequencies=EQ_FREQUENCIES,
+                 block_frames=RENDER_BLOCK_FRAMES, suffix="_eq"):
+    outputs = output_paths(input_paths, output_dir, suffix)
+    for output_path in outputs.values():
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    with analysis_pool(workers) as pool:
+        futures = {
+            pool.submit(render_file, path, output_path, list(gains_db), list(frequencies), block_frames): path
+            for path, output_path in outputs.items()
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                yield future.result()
+            except Exception as e:
+                yield {'input': path, 'error': str(e)}
+
+def playlist_paths(playlist_name):
+    from ..database.db_manager import db_manager
+    from ..database.models import Playlist
+
+    session = db_manager.get_session()
+    try:
+        playlist = session.query(Playlist).filter_by(name=playlist_name).first()
+        if not playlist:
+            raise ValueError(f"No playlist named '{playlist_name}'")
+        return [m.file_path for m in playlist.media_items if m.media_type == 'audio']
+    finally:
+        session.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render equalized copies of audio files.")
+    parser.add_argument("files", nargs="*", help="Input audio files")
+    parser.add_argument("--playlist", help="Render every audio item of this playlist")
+    parser.add_argument("--gains", required=True,
+                        help="Comma separated band gains in dB (32 Hz .. 16 kHz)")
+    parser.add_argument("--out", required=True, help="Output directory")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--block-frames", type=int, default=RENDER_BLOCK_FRAMES)
+    args = parser.parse_args(argv)
+
+    gains = [float(g) for g in args.gains.split(",")]
+    if len(gains) != len(EQ_FREQUENCIES):
+        parser.error(f"--gains needs {len(EQ_FREQUENCIES)} values")
+
+    files = list(args.files)
+    if args.playlist:
+        files.extend(playlist_paths(args.playlist))
+    if not files:
+        parser.error("nothing to render")
+
+    failed = 0
+    for result in render_files(files, args.out, gains, args.workers, block_frames=args.block_frames):
+        if 'error' in result:
+            failed += 1
+            print(f"Error rendering {result['input']}: {result['error']}")
+        else:
+            print(f"{result['output']}: {result['duration']:.1f}s audio in "
+                  f"{result['elapsed']:.2f}s ({result['realtime_factor']:.0f}x realtime)")
+
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+import numpy as np
+
+HISTOGRAM_BUCKETS = 32
+
+def _bucket(value):
+    return min(int(value).bit_length(), HISTOGRAM_BUCKETS - 1)
+
+def _histogram_summary(counts):
+    total = int(counts.sum())
+    summary = {'count': total, 'buckets': counts.tolist()}
+    if total == 0:
+        return summary
+
+    cumulative = np.cumsum(counts)
+    for name, q in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99)):
+        index = int(np.searchsorted(cumulative, q * total))
+        # Upper edge of the power-of-two bucket the quantile falls in.
+        summary[name] = 2 ** index
+    return summary
+
+class ProcessorStats:
+    # Written only from the processor thread; readers take a snapshot copy, so no locks.
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.buffers = 0
+        self.frames = 0
+        self.format_changes = 0
+        self.sink_recreations = 0
+        self.exceptions = 0
+        self.last_exception = None
+        self.worker_overruns = 0
+        self.worker_dropped_bytes = 0
+        self.worker_fallbacks = 0
+        self.last_worker_fallback = None
+        self.max_process_ns = 0
+        self.total_process_ns = 0
+        self.process_time_hist = np.zeros(HISTOGRAM_BUCKETS, dtype=np.int64)
+        self.buffer_size_hist = np.zeros(HISTOGRAM_BUCKETS, dtype=np.int64)
+
+    def record_buffer(self, frames, elapsed_ns):
+        self.buffers += 1
+        self.frames += frames
+        self.total_process_ns += elapsed_ns
+        if elapsed_ns > self.max_process_ns:
+            self.max_process_ns = elapsed_ns
+        self.process_time_hist[_bucket(elapsed_ns // 1000)] += 1
+        self.buffer_size_hist[_bucket(frames)] += 1
+
+    def record_exception(self, error):
+        self.exceptions += 1
+        self.last_exception = f"{type(error).__name__}: {error}"
+
+    def record_worker_overrun(self, dropped_bytes):
+        self.worker_overruns += 1
+        self.worker_dropped_bytes += dropped_bytes
+
+    def record_worker_fallback(self, reason):
+        self.worker_fallbacks += 1
+        self.last_worker_fallback = reason
+
+    def snapshot(self):
+        buffers = self.buffers
+        return {
+            'buffers': buffers,
+            'frames': self.frames,
+            'format_changes': self.format_changes,
+            'sink_recreations': self.sink_recreations,
+            'exceptions': self.exceptions,
+            'last_exception': self.last_exception,
+            'worker_overruns': self.worker_overruns,
+            'worker_fallbacks': self.worker_fallbacks,
+            'last_worker_fallback': self.last_worker_fallback,
+            'mean_process_us': self.total_process_ns / buffers / 1000.0 if buffers else 0.0,
+            'max_process_us': self.max_process_ns / 1000.0,
+            'process_time_us': _histogram_summary(self.process_time_hist.copy()),
+            'buffer_frames': _histogram_summary(self.buffer_size_hist.copy()),
+        }
@@ -0,0 +1,287 @@
+import time
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .filter_bank import PeakingFilterBank, EQ_FREQUENCIES
+from .fir_equalizer import FirEqualizer
+from .spectrum_analyzer import SpectrumAnalyzer
+from .limiter import LookAheadLimiter
+
+EQ_ENGINES = {
+    'iir': PeakingFilterBank,
+    'fir': FirEqualizer,
+}
+
+WORKER_RING_SAMPLES = 192000 * 2
+WORKER_MAX_BLOCK_FRAMES = 4096
+WORKER_BAND_SLOTS = 64
+WORKER_IDLE_WAIT = 0.002
+WORKER_STOP_TIMEOUT = 1.0
+
+class SharedAudioRing:
+    # Single producer, single consumer. The header holds monotonically increasing
+    # write/read sample counters; each side only ever advances its own counter. The
+    # producer also stamps a format generation and the write counter it started at, so
+    # the consumer can skip samples written for an older stream format.
+    HEADER_BYTES = 32
+
+    def __init__(self, capacity, name=None, create=False):
+        self.capacity = capacity
+        self.shm = shared_memory.SharedMemory(name=name, create=create,
+                                              size=self.HEADER_BYTES + capacity * 4)
+        self.name = self.shm.name
+        self.header = np.ndarray((4,), dtype=np.int64, buffer=self.shm.buf)
+        self.data = np.ndarray((capacity,), dtype=np.float32, buffer=self.shm.buf, offset=self.HEADER_BYTES)
+        if create:
+            self.header[:] = 0
+
+    def available(self):
+        return int(self.header[0] - self.header[1])
+
+    def free(self):
+        return self.capacity - self.available()
+
+    def _spans(self, start, count):
+        pos = start % self.capacity
+        first = min(count, self.capacity - pos)
+        return pos, first, count - first
+
+    def write(self, samples, scale=1.0):
+        count = min(len(samples), self.free())
+        if count <= 0:
+            return 0
+
+        pos, first, second = self._spans(int(self.header[0]), count)
+        np.multiply(samples[:first], scale, out=self.data[pos:pos + first], casting='unsafe')
+        if second:
+            np.multiply(samples[first:count], scale, out=self.data[:second], casting='unsafe')
+
+        self.header[0] += count
+        return count
+
+    def read_into(self, out):
+        count = min(len(out), self.available())
+        if count <= 0:
+            return 0
+
+        pos, first, second = self._spans(int(self.header[1]), count)
+        out[:first] = self.data[pos:pos + first]
+        if second:
+            out[first:count] = self.data[:second]
+
+        self.header[1] += count
+        return count
+
+    def discard(self):
+        self.header[1] = self.header[0]
+
+    def skip_to(self, position):
+        if position > self.header[1]:
+            self.header[1] = min(position, self.header[0])
+
+    def write_position(self):
+        return int(self.header[0])
+
+    def start_generation(self, generation):
+        # The start position is stored before the generation, so a reader that sees the
+        # new generation also sees where its samples begin.
+        self.header[3] = self.header[0]
+        self.header[2] = generation
+
+    def generation(self):
+        return int(self.header[2]), int(self.header[3])
+
+    def close(self, unlink=False):
+        del self.header
+        del self.data
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+class SharedBands:
+    def __init__(self, name=None, create=False):
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=8 + WORKER_BAND_SLOTS * 4)
+        self.name = self.shm.name
+        self.sequence = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf)
+        self.values = np.ndarray((WORKER_BAND_SLOTS,), dtype=np.float32, buffer=self.shm.buf, offset=8)
+        self._last_seen = 0
+        if create:
+            self.sequence[0] = 0
+
+    def publish(self, bands):
+        self.values[:len(bands)] = bands
+        self.sequence[0] += 1
+
+    def latest(self, count):
+        sequence = int(self.sequence[0])
+        if sequence == self._last_seen:
+            return None
+        self._last_seen = sequence
+        return self.values[:count].copy()
+
+    def close(self, unlink=False):
+        del self.sequence
+        del self.values
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+def worker_main(input_name, output_name, bands_name, capacity, conn, frame_interval):
+    input_ring = SharedAudioRing(capacity, input_name)
+    output_ring = SharedAudioRing(capacity, output_name)
+    bands = SharedBands(bands_name)
+
+    bank = PeakingFilterBank(EQ_FREQUENCIES)
+    analyzer = SpectrumAnalyzer()
+    limiter = LookAheadLimiter()
+    channels = 2
+    scratch = np.zeros(WORKER_MAX_BLOCK_FRAMES * channels, dtype=np.float32)
+    limited = np.zeros(WORKER_MAX_BLOCK_FRAMES * channels, dtype=np.float32)
+    next_frame = time.monotonic()
+    running = True
+    conn.send(('ready',))
+
+    try:
+        while running:
+            while conn.poll(0):
+                message = conn.recv()
+                kind = message[0]
+                if kind == 'stop':
+                    running = False
+                    break
+                elif kind == 'format':
+                    # Input from before the client switched formats is dropped, and output
+                    # from here on carries the new generation.
+                    _, generation, sample_rate, channels, input_start = message
+                    bank.set_sample_rate(sample_rate)
+                    bank.reset(channels)
+                    analyzer.configure(sample_rate)
+                    limiter.configure(sample_rate, channels)
+                    limiter.reset()
+                    if len(scratch) < WORKER_MAX_BLOCK_FRAMES * channels:
+                        scratch = np.zeros(WORKER_MAX_BLOCK_FRAMES * channels, dtype=np.float32)
+                        limited = np.zeros(WORKER_MAX_BLOCK_FRAMES * channels, dtype=np.float32)
+                    input_ring.skip_to(input_start)
+                    output_ring.start_generation(generation)
+                elif kind == 'engine':
+                    _, engine, frequencies, gains = message
+                    bank = EQ_ENGINES[engine](frequencies, sample_rate=bank.sample_rate, channels=channels)
+                    bank.set_gains(gains)
+                elif kind == 'gains':
+                    bank.set_gains(message[1])
+                elif kind == 'frame_interval':
+                    frame_interval = message[1]
+
+            if not running:
+                break
+
+            count = min(input_ring.available(), output_ring.free(), WORKER_MAX_BLOCK_FRAMES * channels)
+            count -= count % channels
+            if count:
+                block = scratch[:count]
+                input_ring.read_into(block)
+                frames = block.reshape(-1, channels)
+
+                processed = frames if bank.is_flat else bank.process(frames)
+                analyzer.push(processed)
+                out = limited[:count].reshape(-1, channels)
+                limiter.process_into(processed, out)
+                output_ring.write(limited[:count])
+
+            now = time.monotonic()
+            if analyzer.pending and now >= next_frame:
+                values = analyzer.compute()
+                if values is not None:
+                    bands.publish(values)
+                next_frame = now + frame_interval
+
+            if not count:
+                conn.poll(WORKER_IDLE_WAIT)
+    finally:
+        input_ring.close()
+        output_ring.close()
+        bands.close()
+
+class DspWorkerClient:
+    def __init__(self, capacity=WORKER_RING_SAMPLES, frame_interval=1 / 30):
+        self.input = SharedAudioRing(capacity, create=True)
+        self.output = SharedAudioRing(capacity, create=True)
+        self.bands = SharedBands(create=True)
+
+        context = multiprocessing.get_context('spawn')
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=worker_main,
+            args=(self.input.name, self.output.name, self.bands.name, capacity, child_conn, frame_interval),
+            name="boombox-dsp",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.generation = 0
+        self.channels = 2
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def check_ready(self):
+        # Spawning and importing numpy/scipy takes a while; callers keep processing locally until then.
+        try:
+            if not self.ready and self._conn.poll(0):
+                self.ready = self._conn.recv()[0] == 'ready'
+        except (EOFError, OSError):
+            self.ready = False
+        return self.ready
+
+    def send(self, *message):
+        self._conn.send(message)
+
+    def configure(self, sample_rate, channels):
+        # Does not wait for the worker: pull_into drops output until it reports the new
+        # generation, so the audio thread never blocks on the handshake.
+        self.generation += 1
+        self.channels = channels
+        self.send('format', self.generation, sample_rate, channels, self.input.write_position())
+
+    def push(self, frames_2d, scale=1.0):
+        # Whole frames only; returns the number of samples accepted, which is short when
+        # the worker has fallen behind and the input ring is full.
+        samples = frames_2d.reshape(-1)
+        free = self.input.free()
+        return self.input.write(samples[:free - free % self.channels], scale)
+
+    def pull_into(self, out):
+        generation, start = self.output.generation()
+        if generation != self.generation:
+            self.output.discard()
+            return 0
+        self.output.skip_to(start)
+        return self.output.read_into(out)
+
+    def latest_bands(self, count):
+        return self.bands.latest(count)
+
+    def close(self):
+        # Joining the process can take seconds, so it happens on a separate thread rather
+        # than on the audio thread that asked for the shutdown.
+        try:
+            self.send('stop')
+        except (BrokenPipeError, OSError):
+            pass
+        reaper = threading.Thread(target=self._reap, name="boombox-dsp-reaper")
+        reaper.start()
+        return reaper
+
+    def _reap(self):
+        self.process.join(WORKER_STOP_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(WORKER_STOP_TIMEOUT)
+        self._conn.close()
+        self.input.close(unlink=True)
+        self.output.close(unlink=True)
+        self.bands.close(unlink=True)
@@ -1,49 +1,237 @@
+import os
+import time
 import numpy as np
-from scipy import signal
-from PyQt6.QtCore import QObject, pyqtSlot, QThread, pyqtSignal
-from PyQt6.QtMultimedia import QAudioSink, QMediaDevices, QAudioFormat, QAudioBuffer
+from PyQt6.QtCore import QObject, pyqtSlot, QThread, pyqtSignal, QTimer, QMetaObject, Qt
+from PyQt6.QtMultimedia import QAudio, QAudioSink, QMediaDevices, QAudioFormat, QAudioBuffer
+
+from .audio_ring import AudioRingBuffer, LATENCY_PROFILES, DEFAULT_LATENCY_PROFILE
+from .spectrum_analyzer import SpectrumAnalyzer
+from .filter_bank import PeakingFilterBank, EQ_FREQUENCIES
+from .dsp_worker import DspWorkerClient, EQ_ENGINES
+from .dsp_stats import ProcessorStats
+from .limiter import LookAheadLimiter
+from .resampler import PolyphaseResampler
+
+SAMPLE_FORMATS = {
+    QAudioFormat.SampleFormat.Int16: (np.int16, 32768.0, -32768.0, 32767.0),
+    QAudioFormat.SampleFormat.Float: (np.float32, 1.0, -1.0, 1.0),
+}
+
+# Consecutive buffers the worker could not take in full before it is treated as dead.
+WORKER_STALL_BUFFERS = 8
+
+OUTPUT_RATE_DEVICE = "device"
+OUTPUT_RATE_SOURCE = "source"
 
 class EqualizerProcessor(QObject):
-    visualizer_data_ready = pyqtSignal(np.ndarray, int, int)
+    visualizer_data_ready = pyqtSignal(np.ndarray)
+    stats_updated = pyqtSignal(dict)
 
     def __init__(self):
         super().__init__()
         self.sink = None
         self.device = None
         self.current_format = None
+        self.sink_format = None
         self.gains = [0.0] * 10
-        self.frequencies = [32, 64, 125, 250, 500, 1000, 2000, 4000, 8000, 16000]
-        self.filter_sos = [None] * 10
-        self.filter_zi = [None] * 10
+        self.frequencies = list(EQ_FREQUENCIES)
+        self.engine = 'iir'
+        self.bank = PeakingFilterBank(self.frequencies)
+        self._gains_version = 0
+        self._applied_gains_version = 0
+        self._engine_version = 0
+        self._applied_engine_version = 0
+        self.isolated = False
+        self.worker = None
+        self._offered_worker = None
+        self._retired_workers = []
+        self._worker_live = False
+        self._worker_stalls = 0
+        self._stream = None
+        self._pull = None
+        self._pull_out = None
         self.enabled = False
         self.current_volume = 0.7
+        self.track_gain = 1.0
+        self.limiter = LookAheadLimiter()
+        self._limiting = False
+
+        self._work = None
+        self._out = None
+
+        self.analyzer = SpectrumAnalyzer()
+        self.visualizer_fps = 30
+        self._visualizer_timer = None
+
+        self.latency_profile = os.environ.get("BOOMBOX_LATENCY_PROFILE", DEFAULT_LATENCY_PROFILE)
+        if self.latency_profile not in LATENCY_PROFILES:
+            self.latency_profile = DEFAULT_LATENCY_PROFILE
+        self._sink_dirty = False
+        self.output_rate = OUTPUT_RATE_DEVICE
+        try:
+            self.set_output_rate(os.environ.get("BOOMBOX_OUTPUT_RATE", OUTPUT_RATE_DEVICE))
+        except ValueError:
+            pass
+        self.resampler = None
+        self.ring = None
+        self.underruns = 0
+        self._drain_timer = None
 
-        self.recalculate_filters(44100)
-
-    def recalculate_filters(self, fs):
-        pass
-
-    def _design_peaking_equalizer(self, center_freq, gain_db, Q, fs):
-        A = 10 ** (gain_db / 40.0)
-        w0 = 2 * np.pi * center_freq / fs
-        alpha = np.sin(w0) / (2 * Q)
-
-        cos_w0 = np.cos(w0)
-
-        b0 = 1 + alpha * A
-        b1 = -2 * cos_w0
-        b2 = 1 - alpha * A
-        a0 = 1 + alpha / A
-        a1 = -2 * cos_w0
-        a2 = 1 - alpha / A
-
-        return np.array([[b0/a0, b1/a0, b2/a0, 1.0, a1/a0, a2/a0]])
+        self.stats = ProcessorStats()
+        self.stats_interval_ms = 1000
+        self._stats_timer = None
 
     @pyqtSlot(list)
     def update_gains(self, new_gains_db):
-        self.gains = new_gains_db
-        if self.current_format:
-            self.update_filters(self.current_format.sampleRate())
+        # Applied at the next buffer boundary, so a burst of slider moves costs one redesign.
+        self.gains = list(new_gains_db)
+        self._gains_version += 1
+
+    def set_engine(self, engine, frequencies=None):
+        if engine not in EQ_ENGINES:
+            raise ValueError(f"Unknown equalizer engine: {engine}")
+        if frequencies is not None and list(frequencies) != self.frequencies:
+            self.frequencies = list(frequencies)
+            self.gains = [0.0] * len(self.frequencies)
+            self._gains_version += 1
+        self.engine = engine
+        self._engine_version += 1
+
+    def set_response(self, frequencies, gains_db):
+        if len(frequencies) != len(gains_db):
+            raise ValueError("frequencies and gains must have the same length")
+        self.frequencies = list(frequencies)
+        self.gains = list(gains_db)
+        self._engine_version += 1
+
+    def set_isolated(self, enabled):
+        # Called on the UI thread: spawning the process and creating its shared memory
+        # happens here, never inside process_frames, which only adopts the offered client
+        # at a buffer boundary. Clients it stops are closed by _release_workers.
+        enabled = bool(enabled)
+        if enabled and self._offered_worker is None:
+            self._offered_worker = DspWorkerClient(frame_interval=1.0 / self.visualizer_fps)
+        self.isolated = enabled
+
+    def _apply_pending_changes(self):
+        offered = self._offered_worker
+        if self.worker is None and self.isolated and offered is not None:
+            self.worker = offered
+        elif self.worker is not None and not self.worker.is_alive():
+            self.stats.record_worker_fallback("worker process exited")
+            self.isolated = False
+            self._retire_worker()
+        elif self.worker is not None and not self.isolated:
+            self._retire_worker()
+
+        if self.worker and not self._worker_live and self._stream and self.worker.check_ready():
+            self.worker.configure(self._stream[0], self._stream[1])
+            self.worker.send('engine', self.engine, self.frequencies, list(self.gains))
+            self._worker_live = True
+
+        if self._applied_engine_version != self._engine_version:
+            self._applied_engine_version = self._engine_version
+            old = self.bank
+            self.bank = EQ_ENGINES[self.engine](
+                self.frequencies, sample_rate=old.sample_rate, channels=old.channels
+            )
+            self._applied_gains_version = -1
+            if self._worker_live:
+                self.worker.send('engine', self.engine, self.frequencies, list(self.gains))
+
+        if self._applied_gains_version != self._gains_version:
+            self._applied_gains_version = self._gains_version
+            self.bank.set_gains(self.gains)
+            if self._worker_live:
+                self.worker.send('gains', list(self.gains))
+
+    def _retire_worker(self):
+        # Only unhooks the client; closing it waits for _release_workers, off the buffer path.
+        worker = self.worker
+        self.worker = None
+        self._worker_live = False
+        self._worker_stalls = 0
+        if worker is not None:
+            if self._offered_worker is worker:
+                self._offered_worker = None
+            self._retired_workers.append(worker)
+
+    def _release_workers(self):
+        while self._retired_workers:
+            self._retired_workers.pop().close()
+
+    def _push_to_worker(self, raw, scale):
+        # A short write means the worker has fallen behind and audio was dropped; it is
+        # counted like a sink ring overrun, and a worker that keeps refusing input is
+        # abandoned the same way as one that exited. Returns False in that case.
+        accepted = self.worker.push(raw, scale)
+        if accepted == raw.size:
+            self._worker_stalls = 0
+            return True
+
+        self.stats.record_worker_overrun((raw.size - accepted) * raw.itemsize)
+        self._worker_stalls += 1
+        if self._worker_stalls < WORKER_STALL_BUFFERS:
+            return True
+
+        self.stats.record_worker_fallback("worker process fell behind")
+        self.isolated = False
+        self._retire_worker()
+        return False
+
+    def set_latency_profile(self, name):
+        if name not in LATENCY_PROFILES:
+            raise ValueError(f"Unknown latency profile: {name}")
+        if name != self.latency_profile:
+            self.latency_profile = name
+            self._sink_dirty = True
+
+    def set_output_rate(self, rate):
+        # "device" resamples everything to the output device's preferred rate, "source" follows
+        # each track (reopening the sink on rate changes), and a number fixes the rate.
+        if rate not in (OUTPUT_RATE_DEVICE, OUTPUT_RATE_SOURCE):
+            rate = int(rate)
+            if rate <= 0:
+                raise ValueError(f"Invalid output sample rate: {rate}")
+        if rate != self.output_rate:
+            self.output_rate = rate
+            self._sink_dirty = True
+
+    def _target_rate(self, source_rate):
+        if self.output_rate == OUTPUT_RATE_SOURCE:
+            return source_rate
+        if self.output_rate == OUTPUT_RATE_DEVICE:
+            preferred = QMediaDevices.defaultAudioOutput().preferredFormat().sampleRate()
+            return preferred if preferred > 0 else source_rate
+        return self.output_rate
+
+    def output_stats(self):
+        ring = self.ring
+        return {
+            'latency_profile': self.latency_profile,
+            'source_rate': self.current_format.sampleRate() if self.current_format else 0,
+            'output_rate': self.sink_format.sampleRate() if self.sink_format else 0,
+            'underruns': self.underruns,
+            'overruns': (ring.overruns if ring else 0) + self.stats.worker_overruns,
+            'dropped_bytes': (ring.dropped_bytes if ring else 0) + self.stats.worker_dropped_bytes,
+            'ring_fill': ring.fill if ring else 0,
+            'ring_capacity': ring.capacity if ring else 0,
+        }
+
+    def stats_snapshot(self):
+        snapshot = self.stats.snapshot()
+        output = self.output_stats()
+        snapshot.update(output)
+        snapshot['dropped_writes'] = output['overruns']
+        return snapshot
+
+    def _emit_stats(self):
+        self._release_workers()
+        self.stats_updated.emit(self.stats_snapshot())
+
+    @pyqtSlot(float)
+    def set_track_gain(self, gain_db):
+        self.track_gain = 10 ** (gain_db / 20.0)
 
     @pyqtSlot(int)
     def set_volume(self, volume):
@@ -51,13 +239,99 @@ class EqualizerProcessor(QObject):
         if self.sink:
             self.sink.setVolume(self.current_volume)
 
-    def update_filters(self, fs):
-        for i, freq in enumerate(self.frequencies):
-            sos = self._design_peaking_equalizer(freq, self.gains[i], 1.414, fs)
-            self.filter_sos[i] = sos
-
-            if self.filter_zi[i] is None:
-                 self.filter_zi[i] = np.zeros((1, 2))
+    def _ensure_work_buffers(self, frames, channels, dtype):
+        if (self._work is None or self._work.shape[0] < frames
+                or self._work.shape[1] != channels or self._out.dtype != dtype):
+            capacity = max(frames, 1024)
+            self._work = np.zeros((capacity, channels), dtype=np.float32)
+            self._out = np.zeros((capacity, channels), dtype=dtype)
+
+    def set_visualizer_rate(self, fps):
+        self.visualizer_fps = max(1, int(fps))
+        QMetaObject.invokeMethod(self, "_restart_visualizer_timer", Qt.ConnectionType.QueuedConnection)
+
+    @pyqtSlot()
+    def _restart_visualizer_timer(self):
+        if self._visualizer_timer is None:
+            self._visualizer_timer = QTimer(self)
+            self._visualizer_timer.timeout.connect(self._emit_spectrum)
+        self._visualizer_timer.start(max(1, round(1000 / self.visualizer_fps)))
+
+    def _emit_spectrum(self):
+        if self._worker_live:
+            bands = self.worker.latest_bands(self.analyzer.bars)
+        elif self.analyzer.pending:
+            bands = self.analyzer.compute()
+        else:
+            return
+        if bands is not None:
+            self.visualizer_data_ready.emit(bands)
+
+    def configure_stream(self, sample_rate, channels, sample_format, frames=0):
+        dtype = SAMPLE_FORMATS[sample_format][0]
+        self.bank.set_sample_rate(sample_rate)
+        self.bank.reset(channels)
+        self._ensure_work_buffers(frames, channels, dtype)
+        self.analyzer.configure(sample_rate)
+        self.limiter.configure(sample_rate, channels)
+        self.limiter.reset()
+        self._limiting = False
+        self._stream = (sample_rate, channels, sample_format)
+        if self._worker_live:
+            self.worker.configure(sample_rate, channels)
+
+    def process_frames(self, data, sample_format, channels):
+        dtype, scaler, _, _ = SAMPLE_FORMATS[sample_format]
+
+        self._apply_pending_changes()
+
+        raw = np.frombuffer(data, dtype=dtype).reshape(-1, channels)
+        frames = raw.shape[0]
+        if frames == 0:
+            return None
+
+        resampler = self.resampler
+        if resampler is not None:
+            raw = resampler.process(raw)
+            frames = raw.shape[0]
+            if frames == 0:
+                return None
+
+        track_gain = self.track_gain
+        if self._worker_live and self._push_to_worker(raw, track_gain / scaler):
+            # Filtering and analysis happen in the worker; _drain_output collects the result.
+            return None
+
+        if resampler is None and self.bank.is_flat and track_gain == 1.0:
+            # Flat EQ: the decoded bytes go to the sink untouched.
+            self.analyzer.push(raw, 1.0 / scaler)
+            if not self._limiting:
+                return data
+            # Leaving the limiter: what is still in its look-ahead delay goes out first.
+            self._limiting = False
+            latency = self.limiter.latency
+            self._ensure_work_buffers(frames + latency, channels, dtype)
+            flushed = self.limiter.flush_into(self._out[:latency], scaler)
+            start = latency - flushed.shape[0]
+            self._out[latency:latency + frames] = raw
+            return self._out[start:latency + frames]
+
+        if not self._limiting:
+            # Coming out of the bypass (or a new stream): no silence in front of the audio.
+            self.limiter.engage()
+            self._limiting = True
+
+        self._ensure_work_buffers(frames, channels, dtype)
+        work = self._work[:frames]
+        np.multiply(raw, track_gain / scaler, out=work)
+
+        processed = self.bank.process(work)
+
+        self.analyzer.push(processed)
+
+        # The limiter gain, the scale back to the sample format and the conversion are one pass.
+        out = self.limiter.process_into(processed, self._out[:frames], scaler)
+        return out if out.shape[0] else None
 
     @pyqtSlot(QAudioBuffer)
     def process_buffer(self, buffer):
@@ -65,95 +339,155 @@ class EqualizerProcessor(QObject):
             return
 
         format = buffer.format()
-        if not format.isValid():
+        if not format.isValid() or format.sampleFormat() not in SAMPLE_FORMATS:
             return
+        channels = format.channelCount()
 
-        if self.sink is None or self.current_format != format:
+        started = time.perf_counter_ns()
+
+        if self.sink is None or self.current_format != format or self._sink_dirty:
+            if self.current_format is not None and self.current_format != format:
+                self.stats.format_changes += 1
             self.current_format = format
-            self.update_filters(format.sampleRate())
+            self._apply_format(format, buffer.frameCount())
 
-            device_info = QMediaDevices.defaultAudioOutput()
-            self.sink = QAudioSink(device_info, format)
-            self.sink.setVolume(self.current_volume)
-            self.device = self.sink.start()
+        try:
+            out = self.process_frames(buffer.data(), format.sampleFormat(), channels)
+            if out is not None:
+                self._queue_output(out)
+        except Exception as e:
+            self.stats.record_exception(e)
+
+        self.stats.record_buffer(buffer.frameCount(), time.perf_counter_ns() - started)
+
+    def _apply_format(self, format, frames):
+        channels = format.channelCount()
+        source_rate = format.sampleRate()
+        sink_format = QAudioFormat()
+        sink_format.setSampleRate(self._target_rate(source_rate))
+        sink_format.setChannelCount(channels)
+        sink_format.setSampleFormat(format.sampleFormat())
+
+        # Only the resampler sees the source rate, so a 44.1k/48k switch between tracks keeps
+        # the sink open and the filter, limiter and analyzer state intact.
+        if source_rate == sink_format.sampleRate():
+            self.resampler = None
+        elif self.resampler is None:
+            self.resampler = PolyphaseResampler(source_rate, sink_format.sampleRate(), channels)
+        else:
+            self.resampler.configure(source_rate, sink_format.sampleRate(), channels)
+
+        stream_changed = self.sink is None or self.sink_format != sink_format
+        if stream_changed:
+            self.configure_stream(sink_format.sampleRate(), channels, format.sampleFormat(), frames)
+        if stream_changed or self._sink_dirty:
+            self._open_sink(sink_format)
+
+    def _open_sink(self, format):
+        if self.sink is not None:
+            self.stats.sink_recreations += 1
+        self._close_sink()
+
+        profile = LATENCY_PROFILES[self.latency_profile]
+        device_info = QMediaDevices.defaultAudioOutput()
+        self.sink = QAudioSink(device_info, format)
+        self.sink.setBufferSize(format.bytesForDuration(profile['sink_buffer_ms'] * 1000))
+        self.sink.setVolume(self.current_volume)
+        self.sink.stateChanged.connect(self._on_sink_state_changed)
+
+        ring_bytes = format.bytesForDuration(profile['ring_ms'] * 1000)
+        if self.ring is None:
+            self.ring = AudioRingBuffer(ring_bytes, format.bytesPerFrame())
+        else:
+            self.ring.resize(ring_bytes, format.bytesPerFrame())
+
+        self.device = self.sink.start()
+        self.sink_format = format
+        self._sink_dirty = False
+
+        if self._visualizer_timer is None or not self._visualizer_timer.isActive():
+            self._restart_visualizer_timer()
+
+        if self._stats_timer is None:
+            self._stats_timer = QTimer(self)
+            self._stats_timer.timeout.connect(self._emit_stats)
+        if not self._stats_timer.isActive():
+            self._stats_timer.start(self.stats_interval_ms)
+
+        if self._drain_timer is None:
+            self._drain_timer = QTimer(self)
+            self._drain_timer.setTimerType(Qt.TimerType.PreciseTimer)
+            self._drain_timer.timeout.connect(self._drain_output)
+        self._drain_timer.start(profile['drain_interval_ms'])
+
+    def _close_sink(self):
+        if self.sink:
+            self.sink.stateChanged.disconnect(self._on_sink_state_changed)
+            self.sink.stop()
+            self.sink = None
+            self.device = None
+        if self.ring:
+            self.ring.clear()
 
-            self.filter_zi = [np.zeros((1, 2)) for _ in range(10)]
+    def _queue_output(self, data):
+        if self.ring is None:
+            return
+        self.ring.write(data)
+        self._drain_output()
+
+    def _pull_worker_output(self):
+        dtype, scaler, _, _ = SAMPLE_FORMATS[self._stream[2]]
+        capacity = self.ring.free() // np.dtype(dtype).itemsize
+        capacity -= capacity % self._stream[1]
+        if capacity <= 0:
+            return
 
-        data_bytes = buffer.data()
+        if self._pull is None or len(self._pull) < capacity or self._pull_out.dtype != dtype:
+            self._pull = np.zeros(max(capacity, self.ring.capacity), dtype=np.float32)
+            self._pull_out = np.zeros(len(self._pull), dtype=dtype)
 
-        try:
-            if format.sampleFormat() == QAudioFormat.SampleFormat.Int16:
-                audio_data = np.frombuffer(data_bytes, dtype=np.int16).astype(np.float32)
-                scaler = 32768.0
-            elif format.sampleFormat() == QAudioFormat.SampleFormat.Float:
-                audio_data = np.frombuffer(data_bytes, dtype=np.float32)
-                scaler = 1.0
-            else:
-                return
-
-            processed_data = audio_data / scaler
-
-            channels = format.channelCount()
-            if channels > 1:
-                processed_data = processed_data.reshape(-1, channels)
-
-            for i in range(10):
-                if abs(self.gains[i]) > 0.1:
-                    if channels > 1:
-                        target_shape = (1, channels, 2)
-                        if self.filter_zi[i].shape != target_shape:
-                             self.filter_zi[i] = np.zeros(target_shape)
-
-                        processed_data, self.filter_zi[i] = signal.sosfilt(
-                            self.filter_sos[i],
-                            processed_data,
-                            axis=0,
-                            zi=self.filter_zi[i]
-                        )
-                    else:
-                        if self.filter_zi[i].ndim == 3:
-                            self.filter_zi[i] = np.zeros((1, 2))
-
-                        processed_data, self.filter_zi[i] = signal.sosfilt(
-                            self.filter_sos[i],
-                            processed_data,
-                            axis=0,
-                            zi=self.filter_zi[i]
-                        )
-
-            vis_data = processed_data
-            if channels > 1:
-                vis_data = np.mean(vis_data, axis=1)
-
-            window = np.hanning(len(vis_data))
-            fft_mag = np.abs(np.fft.rfft(vis_data * window))
-
-            fft_mag = fft_mag / len(vis_data) * 200
-
-            self.visualizer_data_ready.emit(fft_mag, format.sampleRate(), len(vis_data))
-
-            processed_data = processed_data * scaler
-            processed_data = np.clip(processed_data, -scaler, scaler-1)
-
-            if format.sampleFormat() == QAudioFormat.SampleFormat.Int16:
-                out_bytes = processed_data.astype(np.int16).tobytes()
-            elif format.sampleFormat() == QAudioFormat.SampleFormat.Float:
-                out_bytes = processed_data.astype(np.float32).tobytes()
-            else:
-                out_bytes = data_bytes
-
-            if self.device:
-                self.device.write(out_bytes)
+        count = self.worker.pull_into(self._pull[:capacity])
+        if not count:
+            return
 
-        except Exception as e:
-            pass
+        # The worker already limited the block below full scale.
+        out = self._pull_out[:count]
+        np.multiply(self._pull[:count], scaler, out=out, casting='unsafe')
+        self.ring.write(out)
+
+    def _drain_output(self):
+        if self.sink is None or self.device is None:
+            return
+        if self._worker_live:
+            self._pull_worker_output()
+        free = self.sink.bytesFree()
+        if free > 0 and self.ring.fill:
+            self.ring.drain_into(self.device, free)
+
+    def _on_sink_state_changed(self, state):
+        if (state == QAudio.State.IdleState and self.enabled
+                and self.sink and self.sink.error() == QAudio.Error.UnderrunError):
+            self.underruns += 1
 
     def start(self):
         self.enabled = True
 
     def stop(self):
         self.enabled = False
-        if self.sink:
-            self.sink.stop()
-            self.sink = None
-            self.device = None
+        QMetaObject.invokeMethod(self, "shutdown_output", Qt.ConnectionType.QueuedConnection)
+
+    @pyqtSlot()
+    def shutdown_output(self):
+        if self._drain_timer:
+            self._drain_timer.stop()
+        if self._visualizer_timer:
+            self._visualizer_timer.stop()
+        if self._stats_timer:
+            self._stats_timer.stop()
+        self._close_sink()
+        self._retire_worker()
+        if self._offered_worker is not None:
+            self._retired_workers.append(self._offered_worker)
+            self._offered_worker = None
+        self._release_workers()
+        self.analyzer.reset()
@@ -0,0 +1,121 @@
+from collections import OrderedDict
+
+import numpy as np
+from scipy import signal
+
+EQ_FREQUENCIES = [32, 64, 125, 250, 500, 1000, 2000, 4000, 8000, 16000]
+GAIN_DEAD_BAND_DB = 0.1
+BAND_Q = 1.414
+COEFFICIENT_CACHE_SIZE = 1024
+
+_coefficient_cache = OrderedDict()
+
+def design_peaking_sections(frequencies, gains_db, q, fs):
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    gains_db = np.asarray(gains_db, dtype=np.float64)
+
+    A = 10 ** (gains_db / 40.0)
+    w0 = 2 * np.pi * frequencies / fs
+    alpha = np.sin(w0) / (2 * q)
+    cos_w0 = np.cos(w0)
+    a0 = 1 + alpha / A
+
+    sos = np.empty((len(frequencies), 6))
+    sos[:, 0] = (1 + alpha * A) / a0
+    sos[:, 1] = -2 * cos_w0 / a0
+    sos[:, 2] = (1 - alpha * A) / a0
+    sos[:, 3] = 1.0
+    sos[:, 4] = sos[:, 1]
+    sos[:, 5] = (1 - alpha / A) / a0
+    return sos
+
+def cached_peaking_sections(frequencies, gains_db, q, fs):
+    keys = [(float(f), round(float(g), 3), float(q), int(fs)) for f, g in zip(frequencies, gains_db)]
+    rows = [None] * len(keys)
+    missing = []
+
+    for i, key in enumerate(keys):
+        row = _coefficient_cache.get(key)
+        if row is None:
+            missing.append(i)
+        else:
+            _coefficient_cache.move_to_end(key)
+            rows[i] = row
+
+    if missing:
+        designed = design_peaking_sections(
+            [keys[i][0] for i in missing], [keys[i][1] for i in missing], q, fs
+        )
+        for row, i in zip(designed, missing):
+            rows[i] = row
+            _coefficient_cache[keys[i]] = row
+
+        while len(_coefficient_cache) > COEFFICIENT_CACHE_SIZE:
+            _coefficient_cache.popitem(last=False)
+
+    if not rows:
+        return np.empty((0, 6))
+    return np.array(rows)
+
+class PeakingFilterBank:
+    def __init__(self, frequencies=EQ_FREQUENCIES, q=BAND_Q, sample_rate=44100, channels=2):
+        self.frequencies = list(frequencies)
+        self.q = q
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.gains = [0.0] * len(self.frequencies)
+
+        self.band_sos = design_peaking_sections(self.frequencies, self.gains, q, sample_rate)
+        self.active_bands = []
+        self.sos = np.empty((0, 6))
+        self.zi = np.zeros((0, 2, channels))
+
+    @property
+    def is_flat(self):
+        return not self.active_bands
+
+    def set_gains(self, gains_db):
+        gains = [float(g) for g in gains_db]
+        changed = [i for i, (old, new) in enumerate(zip(self.gains, gains)) if old != new]
+        self.gains = gains
+        if changed:
+            self._redesign(changed)
+
+    def set_sample_rate(self, fs):
+        if fs == self.sample_rate:
+            return
+        self.sample_rate = fs
+        self._redesign(range(len(self.frequencies)))
+
+    def reset(self, channels=None):
+        if channels:
+            self.channels = channels
+        self.zi = np.zeros((len(self.active_bands), 2, self.channels))
+
+    def _redesign(self, bands):
+        bands = [i for i in bands if abs(self.gains[i]) > GAIN_DEAD_BAND_DB]
+        if bands:
+            self.band_sos[bands] = cached_peaking_sections(
+                [self.frequencies[i] for i in bands],
+                [self.gains[i] for i in bands],
+                self.q,
+                self.sample_rate,
+            )
+
+        # Bands that stay active keep their delay line so a gain change does not click.
+        active = [i for i, gain in enumerate(self.gains) if abs(gain) > GAIN_DEAD_BAND_DB]
+        zi = np.zeros((len(active), 2, self.channels))
+        if self.zi.shape[2] == self.channels:
+            for row, band in enumerate(active):
+                if band in self.active_bands:
+                    zi[row] = self.zi[self.active_bands.index(band)]
+
+        self.active_bands = active
+        self.sos = self.band_sos[active]
+        self.zi = zi
+
+    def process(self, block):
+        if not self.active_bands:
+            return block
+        out, self.zi = signal.sosfilt(self.sos, block, axis=0, zi=self.zi)
+        return out
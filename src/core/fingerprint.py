@@ -0,0 +1,283 @@
+from collections import defaultdict, Counter
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy import signal
+
+from .audio_source import open_source, analysis_pool
+from .loudness import file_signature
+from .resampler import rate_ratio
+
+FINGERPRINT_RATE = 5500
+FINGERPRINT_SECONDS = 120
+FINGERPRINT_FRAME = 2048
+FINGERPRINT_HOP = 64
+FINGERPRINT_BANDS = 33
+FINGERPRINT_MIN_HZ = 300.0
+FINGERPRINT_MAX_HZ = 2000.0
+FINGERPRINT_CHUNK_FRAMES = 512
+
+INDEX_STRIDE = 8
+QUERY_FRAMES = 2048
+QUERY_BATCH = 500
+MIN_VOTES = 2
+MAX_BIT_ERROR_RATE = 0.35
+
+def _band_matrix():
+    bins = np.fft.rfftfreq(FINGERPRINT_FRAME, d=1.0 / FINGERPRINT_RATE)
+    edges = np.geomspace(FINGERPRINT_MIN_HZ, FINGERPRINT_MAX_HZ, FINGERPRINT_BANDS + 1)
+    band = np.searchsorted(edges, bins, side='right') - 1
+    matrix = np.zeros((len(bins), FINGERPRINT_BANDS))
+    inside = (band >= 0) & (band < FINGERPRINT_BANDS)
+    matrix[np.nonzero(inside)[0], band[inside]] = 1.0
+    return matrix
+
+_BANDS = _band_matrix()
+_BIT_WEIGHTS = (1 << np.arange(FINGERPRINT_BANDS - 1, dtype=np.uint64)).astype(np.uint64)
+_WINNOW_MULTIPLIER = np.uint64(2654435761)
+_WINNOW_SKIP = np.uint64(1 << 32)
+
+def compute_fingerprint(file_path, seconds=FINGERPRINT_SECONDS):
+    # Sub-band energy differences across frequency and time, one 32-bit word per hop
+    # (Haitsma & Kalker). Robust to re-encoding and level changes, so a FLAC and an MP3
+    # of the same recording produce mostly identical words.
+    with open_source(file_path) as src:
+        sample_rate = src.sample_rate
+        end = int(seconds * sample_rate)
+        mono = np.concatenate([block.mean(axis=1) for block in src.blocks(end=end)] or [np.zeros(0)])
+
+    up, down = rate_ratio(sample_rate, FINGERPRINT_RATE)
+    audio = signal.resample_poly(mono, up, down) if up != down else mono
+    duration = len(mono) / sample_rate if sample_rate else 0.0
+    if len(audio) < FINGERPRINT_FRAME + FINGERPRINT_HOP:
+        return np.zeros(0, dtype=np.uint32), duration
+
+    window = np.hanning(FINGERPRINT_FRAME)
+    frames = sliding_window_view(audio, FINGERPRINT_FRAME)[::FINGERPRINT_HOP]
+    energies = []
+    for start in range(0, len(frames), FINGERPRINT_CHUNK_FRAMES):
+        spectrum = np.fft.rfft(frames[start:start + FINGERPRINT_CHUNK_FRAMES] * window, axis=1)
+        energies.append((spectrum.real ** 2 + spectrum.imag ** 2) @ _BANDS)
+    energy = np.concatenate(energies)
+
+    across = energy[:, :-1] - energy[:, 1:]
+    bits = (across[1:] - across[:-1]) > 0
+    words = (bits.astype(np.uint64) @ _BIT_WEIGHTS).astype(np.uint32)
+    return words, duration
+
+def bit_error_rate(a, b):
+    count = min(len(a), len(b))
+    if count == 0:
+        return 1.0
+    diff = np.bitwise_xor(a[:count], b[:count])
+    return float(np.unpackbits(diff.view(np.uint8)).sum()) / (32.0 * count)
+
+def _aligned_bit_error_rate(words, other_words, offset):
+    # `offset` is where words[0] falls in other_words.
+    if offset >= 0:
+        return bit_error_rate(words, other_words[offset:])
+    return bit_error_rate(words[-offset:], other_words)
+
+def index_entries(words):
+    # Winnowing (Schleimer et al.): the word with the smallest key in every window of
+    # INDEX_STRIDE consecutive words. Two copies of a recording pick the same words at
+    # any time offset, so indexes can be compared with each other and not only queried
+    # with a full fingerprint. The key scrambles the word so the choice does not favour
+    # particular bit patterns. Frames whose bits are all equal carry no information
+    # (silence, DC) and would match everything, so they are never picked.
+    if len(words) < INDEX_STRIDE:
+        return []
+    keys = (words.astype(np.uint64) * _WINNOW_MULTIPLIER) & 0xFFFFFFFF
+    keys[(words == 0) | (words == 0xFFFFFFFF)] = _WINNOW_SKIP
+    windows = sliding_window_view(keys, INDEX_STRIDE)
+    positions = np.unique(np.arange(len(windows)) + windows.argmin(axis=1))
+    positions = positions[keys[positions] != _WINNOW_SKIP]
+    return [(int(h), int(p)) for h, p in zip(words[positions], positions)]
+
+def _fingerprint_one(media_id, file_path):
+    try:
+        mtime, size = file_signature(file_path)
+        words, duration = compute_fingerprint(file_path)
+    except Exception as e:
+        return media_id, None, str(e)
+    return media_id, {'data': words.tobytes(), 'duration': duration, 'mtime': mtime, 'size': size}, None
+
+def stale_fingerprints(session):
+    from ..database.models import Media, Fingerprint
+
+    known = {fp.media_id: (fp.mtime, fp.size) for fp in session.query(Fingerprint)}
+    pending = []
+    for media in session.query(Media).filter(Media.media_type == 'audio'):
+        try:
+            signature = file_signature(media.file_path)
+        except OSError:
+            continue
+        if known.get(media.id) != signature:
+            pending.append((media.id, media.file_path))
+    return pending
+
+def _store(session, media_id, result):
+    from ..database.models import Fingerprint, FingerprintHash
+
+    session.query(FingerprintHash).filter(FingerprintHash.media_id == media_id).delete(synchronize_session=False)
+    fingerprint = session.get(Fingerprint, media_id) or Fingerprint(media_id=media_id)
+    for key, value in result.items():
+        setattr(fingerprint, key, value)
+    session.add(fingerprint)
+
+    words = np.frombuffer(result['data'], dtype=np.uint32)
+    session.bulk_insert_mappings(FingerprintHash, [
+        {'media_id': media_id, 'hash': h, 'position': p} for h, p in index_entries(words)
+    ])
+
+def scan_fingerprints(session, workers=None, progress=None, is_cancelled=None, commit_every=50):
+    pending = stale_fingerprints(session)
+    done = 0
+
+    with analysis_pool(workers) as pool:
+        ids = [media_id for media_id, _ in pending]
+        paths = [path for _, path in pending]
+        for media_id, result, error in pool.map(_fingerprint_one, ids, paths, chunksize=4):
+            if is_cancelled and is_cancelled():
+                pool.shutdown(wait=False, cancel_futures=True)
+                break
+
+            if error:
+                print(f"Error fingerprinting media {media_id}: {error}")
+            else:
+                _store(session, media_id, result)
+
+            done += 1
+            if done % commit_every == 0:
+                session.commit()
+            if progress:
+                progress(done, len(pending))
+
+    session.commit()
+    return done
+
+def find_matches(session, media_id, words=None):
+    # Looks the first QUERY_FRAMES words up in the hash index, votes on the time offset
+    # each hit implies, then confirms the best offset per candidate by bit error rate.
+    from ..database.models import Fingerprint, FingerprintHash
+
+    if words is None:
+        fingerprint = session.get(Fingerprint, media_id)
+        if fingerprint is None:
+            return []
+        words = np.frombuffer(fingerprint.data, dtype=np.uint32)
+
+    query_positions = defaultdict(list)
+    for position, word in enumerate(words[:QUERY_FRAMES].tolist()):
+        if word not in (0, 0xFFFFFFFF):
+            query_positions[word].append(position)
+
+    votes = defaultdict(Counter)
+    keys = list(query_positions)
+    for start in range(0, len(keys), QUERY_BATCH):
+        rows = (session.query(FingerprintHash.media_id, FingerprintHash.hash, FingerprintHash.position)
+                .filter(FingerprintHash.hash.in_(keys[start:start + QUERY_BATCH]))
+                .filter(FingerprintHash.media_id != media_id))
+        for other_id, word, position in rows:
+            for query_position in query_positions[word]:
+                votes[other_id][position - query_position] += 1
+
+    matches = []
+    for other_id, offsets in votes.items():
+        offset, count = offsets.most_common(1)[0]
+        if count < MIN_VOTES:
+            continue
+        other = session.get(Fingerprint, other_id)
+        if other is None:
+            continue
+        ber = _aligned_bit_error_rate(words, np.frombuffer(other.data, dtype=np.uint32), offset)
+        if ber <= MAX_BIT_ERROR_RATE:
+            matches.append((other_id, ber))
+    return sorted(matches, key=lambda match: match[1])
+
+def candidate_pairs(session):
+    # One self-join of the hash index: every pair of tracks sharing at least MIN_VOTES
+    # indexed words at the same time offset, with that offset.
+    from sqlalchemy import func
+    from sqlalchemy.orm import aliased
+    from ..database.models import FingerprintHash
+
+    first, second = aliased(FingerprintHash), aliased(FingerprintHash)
+    offset = second.position - first.position
+    rows = (session.query(first.media_id, second.media_id, offset, func.count())
+            .join(second, (first.hash == second.hash) & (first.media_id < second.media_id))
+            .group_by(first.media_id, second.media_id, offset))
+
+    votes = defaultdict(Counter)
+    for media_id, other_id, shift, count in rows:
+        votes[media_id, other_id][shift] += count
+
+    pairs = {}
+    for pair, offsets in votes.items():
+        shift, count = offsets.most_common(1)[0]
+        if count >= MIN_VOTES:
+            pairs[pair] = shift
+    return pairs
+
+def find_duplicates(session, progress=None, is_cancelled=None):
+    # Candidate pairs come from the hash index in one query; each is then confirmed by
+    # bit error rate at the offset it voted for.
+    from ..database.models import Fingerprint
+
+    ids = [media_id for (media_id,) in session.query(Fingerprint.media_id)]
+    parent = {media_id: media_id for media_id in ids}
+
+    def root(media_id):
+        while parent[media_id] != media_id:
+            parent[media_id] = parent[parent[media_id]]
+            media_id = parent[media_id]
+        return media_id
+
+    words = {}
+
+    def words_for(media_id):
+        if media_id not in words:
+            words[media_id] = np.frombuffer(session.get(Fingerprint, media_id).data, dtype=np.uint32)
+        return words[media_id]
+
+    pairs = candidate_pairs(session)
+    for done, ((media_id, other_id), offset) in enumerate(pairs.items(), 1):
+        if is_cancelled and is_cancelled():
+            break
+        if media_id in parent and other_id in parent and root(media_id) != root(other_id):
+            ber = _aligned_bit_error_rate(words_for(media_id), words_for(other_id), offset)
+            if ber <= MAX_BIT_ERROR_RATE:
+                parent[root(other_id)] = root(media_id)
+        if progress:
+            progress(done, len(pairs))
+
+    groups = defaultdict(list)
+    for media_id in ids:
+        groups[root(media_id)].append(media_id)
+    return [sorted(group) for group in groups.values() if len(group) > 1]
+
+MERGED_FIELDS = ('artist', 'album', 'custom_cover_path')
+
+def merge_media(session, keep, duplicates):
+    # Moves playlist memberships onto `keep`, fills in metadata it is missing, then
+    # deletes the duplicates. Their files stay on disk and are recorded as aliases of
+    # `keep`, which the library scanner and watcher skip.
+    from ..database.models import MediaAlias
+
+    for duplicate in duplicates:
+        if duplicate.id == keep.id:
+            continue
+        for alias in list(duplicate.aliases):
+            alias.media = keep
+        keep.aliases.append(MediaAlias(file_path=duplicate.file_path))
+        for playlist in list(duplicate.playlists):
+            if keep not in playlist.media_items:
+                playlist.media_items.append(keep)
+            playlist.media_items.remove(duplicate)
+
+        for field in MERGED_FIELDS:
+            if getattr(keep, field) in (None, '') and getattr(duplicate, field) not in (None, ''):
+                setattr(keep, field, getattr(duplicate, field))
+
+        session.delete(duplicate)
+    session.commit()
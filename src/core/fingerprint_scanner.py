@@ -0,0 +1,40 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from .fingerprint import scan_fingerprints, find_duplicates
+from ..database.db_manager import db_manager
+
+class FingerprintScanner(QThread):
+    progress = pyqtSignal(str, int, int)
+    duplicates_found = pyqtSignal(list)
+
+    def __init__(self, workers=None, parent=None):
+        super().__init__(parent)
+        self.workers = workers
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        session = db_manager.get_session()
+        groups = []
+        try:
+            scan_fingerprints(
+                session,
+                workers=self.workers,
+                progress=lambda done, total: self.progress.emit("Fingerprinting", done, total),
+                is_cancelled=lambda: self._cancelled,
+            )
+            if not self._cancelled:
+                groups = find_duplicates(
+                    session,
+                    progress=lambda done, total: self.progress.emit("Comparing", done, total),
+                    is_cancelled=lambda: self._cancelled,
+                )
+        except Exception as e:
+            session.rollback()
+            print(f"Error finding duplicates: {e}")
+        finally:
+            session.close()
+        if not self._cancelled:
+            self.duplicates_found.emit(groups)
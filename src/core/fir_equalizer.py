@@ -0,0 +1,155 @@
+import numpy as np
+
+from .filter_bank import EQ_FREQUENCIES
+
+GRAPHIC_31_BAND_FREQUENCIES = [
+    20, 25, 31.5, 40, 50, 63, 80, 100, 125, 160, 200, 250, 315, 400, 500, 630,
+    800, 1000, 1250, 1600, 2000, 2500, 3150, 4000, 5000, 6300, 8000, 10000, 12500, 16000, 20000,
+]
+
+FIR_TAPS = 4096
+FIR_PARTITION = 512
+
+def gains_for(frequencies, gains_db, source_frequencies=EQ_FREQUENCIES):
+    # Gains given for another band layout (the ten slider bands) are interpolated onto
+    # `frequencies` on a log-frequency axis, held flat beyond the outermost bands.
+    gains = [float(g) for g in gains_db]
+    if len(gains) == len(frequencies):
+        return gains
+    if len(gains) != len(source_frequencies):
+        raise ValueError(f"expected {len(frequencies)} or {len(source_frequencies)} gains, got {len(gains)}")
+    return np.interp(np.log10(frequencies), np.log10(source_frequencies), gains).tolist()
+
+def design_linear_phase_fir(frequencies, gains_db, fs, taps=FIR_TAPS):
+    bins = np.fft.rfftfreq(taps, d=1.0 / fs)
+    log_freqs = np.log10(np.maximum(np.asarray(frequencies, dtype=np.float64), 1.0))
+    curve_db = np.interp(np.log10(np.maximum(bins, 1.0)), log_freqs, np.asarray(gains_db, dtype=np.float64))
+
+    impulse = np.fft.irfft(10 ** (curve_db / 20.0), n=taps)
+    impulse = np.roll(impulse, taps // 2)
+    impulse *= np.blackman(taps)
+    return impulse
+
+class PartitionedConvolver:
+    def __init__(self, impulse, block_size=FIR_PARTITION, channels=2):
+        self.block_size = block_size
+        self.channels = channels
+        self._spectra = None
+        self.set_impulse(impulse)
+        self.reset(channels)
+
+    def set_impulse(self, impulse):
+        B = self.block_size
+        partitions = max(1, -(-len(impulse) // B))
+        padded = np.zeros(partitions * B)
+        padded[:len(impulse)] = impulse
+        spectra = np.fft.rfft(padded.reshape(partitions, B), n=2 * B, axis=1)
+
+        if self._spectra is not None and len(spectra) != len(self._spectra):
+            self._spectra = spectra
+            self.reset(self.channels)
+        else:
+            # Same partition count: the frequency-domain delay line carries over.
+            self._spectra = spectra
+
+    def reset(self, channels=None):
+        if channels:
+            self.channels = channels
+        B = self.block_size
+        P = len(self._spectra)
+        self._history = np.zeros((2 * B, self.channels))
+        self._fdl = np.zeros((2 * P, B + 1, self.channels), dtype=np.complex128)
+        self._head = 0
+        self._in_block = np.zeros((B, self.channels))
+        self._out_block = np.zeros((B, self.channels))
+        self._fill = 0
+        self._out = np.zeros((0, self.channels))
+
+    @property
+    def latency(self):
+        return self.block_size
+
+    def _convolve_block(self):
+        B = self.block_size
+        P = len(self._spectra)
+
+        self._history[:B] = self._history[B:]
+        self._history[B:] = self._in_block
+        spectrum = np.fft.rfft(self._history, axis=0)
+
+        # The delay line is stored twice so the newest P spectra are always one contiguous slice.
+        self._fdl[self._head] = spectrum
+        self._fdl[self._head + P] = spectrum
+        accumulated = np.einsum('pk,pkc->kc', self._spectra, self._fdl[self._head:self._head + P])
+        self._head = (self._head - 1) % P
+
+        self._out_block[:] = np.fft.irfft(accumulated, n=2 * B, axis=0)[B:]
+
+    def process(self, block):
+        frames = block.shape[0]
+        if len(self._out) < frames:
+            self._out = np.zeros((frames, self.channels))
+        out = self._out[:frames]
+
+        B = self.block_size
+        pos = 0
+        while pos < frames:
+            take = min(B - self._fill, frames - pos)
+            end = self._fill + take
+            self._in_block[self._fill:end] = block[pos:pos + take]
+            out[pos:pos + take] = self._out_block[self._fill:end]
+            self._fill = end
+            pos += take
+
+            if self._fill == B:
+                self._convolve_block()
+                self._fill = 0
+
+        return out
+
+class FirEqualizer:
+    def __init__(self, frequencies=EQ_FREQUENCIES, sample_rate=44100, channels=2, taps=FIR_TAPS,
+                 block_size=FIR_PARTITION):
+        self.frequencies = list(frequencies)
+        self.gains = [0.0] * len(self.frequencies)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.taps = taps
+        self.convolver = PartitionedConvolver(self._design(), block_size, channels)
+
+    @property
+    def is_flat(self):
+        # Never bypassed: dropping in and out of the convolver would shift the output by its latency.
+        return False
+
+    @property
+    def latency(self):
+        return self.convolver.latency + self.taps // 2
+
+    def _design(self):
+        return design_linear_phase_fir(self.frequencies, self.gains, self.sample_rate, self.taps)
+
+    def set_response(self, frequencies, gains_db):
+        self.gains = gains_for(frequencies, gains_db)
+        self.frequencies = list(frequencies)
+        self.convolver.set_impulse(self._design())
+
+    def set_gains(self, gains_db):
+        gains = gains_for(self.frequencies, gains_db)
+        if gains != self.gains:
+            self.gains = gains
+            self.convolver.set_impulse(self._design())
+
+    def set_sample_rate(self, fs):
+        if fs == self.sample_rate:
+            return
+        self.sample_rate = fs
+        self.convolver.set_impulse(self._design())
+
+    def reset(self, channels=None):
+        if channels:
+            self.channels = channels
+        self.convolver.reset(channels)
+
+    def process(self, block):
+        return self.convolver.process(block)
@@ -0,0 +1,200 @@
+import os
+from contextlib import nullcontext
+
+from .audio_source import analysis_pool
+from .metadata import read_tags, default_tags, PHOTO_EXTENSIONS
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v')
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.flac', '.ogg', '.opus', '.m4a', '.aac', '.wma', '.aiff', '.aif')
+MEDIA_EXTENSIONS = AUDIO_EXTENSIONS + VIDEO_EXTENSIONS + PHOTO_EXTENSIONS
+
+SCAN_BATCH_SIZE = 500
+TAG_CHUNK_SIZE = 32
+# Below this many files, starting worker processes costs more than reading tags inline.
+INLINE_IMPORT_LIMIT = 16
+
+TAG_FIELDS = ('title', 'artist', 'album', 'duration', 'sample_rate', 'channels', 'bitrate', 'has_cover')
+EDITABLE_FIELDS = ('title', 'artist', 'album')
+
+def media_type_for(file_path):
+    if file_path.lower().endswith(VIDEO_EXTENSIONS):
+        return 'video'
+    if file_path.lower().endswith(PHOTO_EXTENSIONS):
+        return 'photo'
+    return 'audio'
+
+def walk_media(root, is_cancelled=None):
+    # os.scandir hands back the stat result with each entry, so a tree walk costs one
+    # directory read per folder instead of one stat per file.
+    stack = [root]
+    while stack:
+        if is_cancelled and is_cancelled():
+            return
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.lower().endswith(MEDIA_EXTENSIONS):
+                    stat = entry.stat()
+                    yield entry.path, stat.st_mtime, stat.st_size
+            except OSError:
+                continue
+
+def list_directories(root, is_cancelled=None):
+    # Every directory under (and including) `root`; entries are not stat'ed.
+    directories = []
+    stack = [root]
+    while stack:
+        if is_cancelled and is_cancelled():
+            break
+        directory = stack.pop()
+        directories.append(directory)
+        try:
+            with os.scandir(directory) as entries:
+                stack.extend(entry.path for entry in entries if entry.is_dir(follow_symlinks=False))
+        except OSError:
+            continue
+    return directories
+
+def tags_for(file_path):
+    try:
+        return read_tags(file_path)
+    except Exception as e:
+        print(f"Error reading tags for {file_path}: {e}")
+        return default_tags(file_path)
+
+def media_row(file_path, tags, mtime, size):
+    row = {field: tags[field] for field in TAG_FIELDS}
+    row.update({
+        'file_path': file_path,
+        'media_type': media_type_for(file_path),
+        'file_mtime': mtime,
+        'file_size': size,
+    })
+    return row
+
+def _keep_edits(row, existing):
+    # Title, artist and album may have been edited by hand; a stored value only gives way
+    # when it is empty or still the file name the row was created with.
+    default_title = default_tags(row['file_path'])['title']
+    for field in EDITABLE_FIELDS:
+        value = existing.get(field)
+        if value and not (field == 'title' and value == default_title):
+            row[field] = value
+
+def _library_rows(session):
+    # Plain column tuples rather than ORM objects: a large library is walked row by row.
+    from ..database.models import Media
+
+    columns = [Media.id, Media.file_path, Media.file_mtime, Media.file_size, Media.has_cover]
+    return session.query(*columns, *(getattr(Media, field) for field in EDITABLE_FIELDS))
+
+def _existing(media):
+    return media.id, {field: getattr(media, field) for field in EDITABLE_FIELDS}
+
+def merged_paths(session):
+    # Files whose rows were merged into another track; never imported again.
+    from ..database.models import MediaAlias
+
+    return {file_path for (file_path,) in session.query(MediaAlias.file_path)}
+
+def changed_files(session, root, is_cancelled=None):
+    # Files under `root` that are new, or whose mtime/size differ from the stored row.
+    known = {media.file_path: media for media in _library_rows(session)}
+    merged = merged_paths(session)
+    pending = []
+    for file_path, mtime, size in walk_media(root, is_cancelled):
+        if file_path in merged:
+            continue
+        media = known.get(file_path)
+        if media is None:
+            pending.append((file_path, mtime, size, None, None))
+        elif media.file_mtime != mtime or media.file_size != size:
+            pending.append((file_path, mtime, size) + _existing(media))
+    return pending
+
+def needs_backfill(session):
+    # has_cover is only NULL for rows imported before tags were stored. A single query
+    # with no file access, so it is cheap enough to run on every launch.
+    from ..database.models import Media
+
+    return session.query(Media.id).filter(Media.has_cover.is_(None)).first() is not None
+
+def stale_tags(session):
+    # Rows imported before tags were stored. Files changed later are re-tagged by folder
+    # rescans and the library watcher, so only these rows are stat'ed.
+    from ..database.models import Media
+
+    pending = []
+    for media in _library_rows(session).filter(Media.has_cover.is_(None)):
+        try:
+            stat = os.stat(media.file_path)
+        except OSError:
+            continue
+        pending.append((media.file_path, stat.st_mtime, stat.st_size) + _existing(media))
+    return pending
+
+def import_files(session, pending, workers=None, progress=None, is_cancelled=None, batch_size=SCAN_BATCH_SIZE):
+    # Reads tags for (path, mtime, size, media_id, existing) entries across the analysis
+    # pool and writes them back as bulk inserts/updates, one transaction per batch.
+    from ..database.models import Media, add_sort_keys
+
+    if not pending:
+        return 0, 0
+
+    entries = {entry[0]: entry for entry in pending}
+    inserts, updates = [], []
+    added = updated = done = 0
+
+    def flush():
+        nonlocal added, updated
+        if inserts:
+            session.bulk_insert_mappings(Media, inserts)
+        if updates:
+            session.bulk_update_mappings(Media, updates)
+        session.commit()
+        added += len(inserts)
+        updated += len(updates)
+        inserts.clear()
+        updates.clear()
+
+    paths = list(entries)
+    with (analysis_pool(workers) if len(paths) > INLINE_IMPORT_LIMIT else nullcontext()) as pool:
+        results = pool.map(tags_for, paths, chunksize=TAG_CHUNK_SIZE) if pool else map(tags_for, paths)
+        for file_path, tags in zip(paths, results):
+            if is_cancelled and is_cancelled():
+                if pool:
+                    pool.shutdown(wait=False, cancel_futures=True)
+                break
+
+            _, mtime, size, media_id, existing = entries[file_path]
+            row = media_row(file_path, tags, mtime, size)
+            if media_id is None:
+                inserts.append(add_sort_keys(row))
+            else:
+                row['id'] = media_id
+                _keep_edits(row, existing)
+                updates.append(add_sort_keys(row))
+
+            done += 1
+            if len(inserts) + len(updates) >= batch_size:
+                flush()
+            if progress:
+                progress(done, len(pending))
+
+    flush()
+    return added, updated
+
+def scan_folder(session, root, workers=None, progress=None, is_cancelled=None):
+    pending = changed_files(session, os.path.abspath(root), is_cancelled)
+    if is_cancelled and is_cancelled():
+        return 0, 0
+    return import_files(session, pending, workers, progress, is_cancelled)
+
+def backfill_tags(session, workers=None, progress=None, is_cancelled=None):
+    return import_files(session, stale_tags(session), workers, progress, is_cancelled)
@@ -0,0 +1,35 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from .library import scan_folder, backfill_tags
+from ..database.db_manager import db_manager
+
+class LibraryScanner(QThread):
+    # Imports new and changed files under `root`; with no root it backfills tags for rows
+    # already in the library.
+    progress = pyqtSignal(int, int)
+    scan_finished = pyqtSignal(int, int)
+
+    def __init__(self, root=None, workers=None, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.workers = workers
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        session = db_manager.get_session()
+        added = updated = 0
+        try:
+            options = dict(workers=self.workers, progress=self.progress.emit, is_cancelled=lambda: self._cancelled)
+            if self.root is None:
+                added, updated = backfill_tags(session, **options)
+            else:
+                added, updated = scan_folder(session, self.root, **options)
+        except Exception as e:
+            session.rollback()
+            print(f"Error scanning {self.root or 'library'}: {e}")
+        finally:
+            session.close()
+        self.scan_finished.emit(added, updated)
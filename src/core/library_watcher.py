@@ -0,0 +1,210 @@
+import os
+
+from PyQt6.QtCore import QObject, QThread, QTimer, QFileSystemWatcher, pyqtSignal
+
+from .library import MEDIA_EXTENSIONS, media_type_for, walk_media, list_directories, import_files, merged_paths
+from ..database.db_manager import db_manager
+
+WATCH_DEBOUNCE_MS = 1500
+
+def _like_escape(path):
+    return path.replace('!', '!!').replace('%', '!%').replace('_', '!_')
+
+def _rows_below(session, directory, recursive=True):
+    from ..database.models import Media
+
+    prefix = _like_escape(os.path.join(directory, ''))
+    query = session.query(Media).filter(Media.file_path.like(prefix + '%', escape='!'))
+    if not recursive:
+        query = query.filter(~Media.file_path.like(prefix + '%' + _like_escape(os.sep) + '%', escape='!'))
+    return query.all()
+
+def sync_directories(session, directories, known_directories, workers=None):
+    # Brings the rows for the files directly inside each changed directory in line with
+    # the disk, in one batch: new files are imported, changed ones re-tagged, missing ones
+    # deleted. A removed file whose mtime/size reappears under a new name in the same batch
+    # is treated as a move and keeps its row (and playlists and edits). Directories that
+    # are not in `known_directories` are new and imported recursively. Files merged away
+    # as duplicates are left out.
+    # Returns (inserted ids, updated ids, deleted ids, new directories).
+    from ..database.models import Media
+
+    found = {}
+    missing = []
+    pending = []
+    new_directories = []
+
+    for directory in directories:
+        if not os.path.isdir(directory):
+            missing.extend(_rows_below(session, directory))
+            continue
+
+        stored = {media.file_path: media for media in _rows_below(session, directory, recursive=False)}
+        present = set()
+        try:
+            with os.scandir(directory) as entries:
+                entries = list(entries)
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path not in known_directories:
+                        new_directories.extend(list_directories(entry.path))
+                        for file_path, mtime, size in walk_media(entry.path):
+                            found[file_path] = (mtime, size)
+                elif entry.name.lower().endswith(MEDIA_EXTENSIONS):
+                    stat = entry.stat()
+                    present.add(entry.path)
+                    media = stored.get(entry.path)
+                    if media is None:
+                        found[entry.path] = (stat.st_mtime, stat.st_size)
+                    elif media.file_mtime != stat.st_mtime or media.file_size != stat.st_size:
+                        pending.append((entry.path, stat.st_mtime, stat.st_size, media.id,
+                                        {'title': media.title, 'artist': media.artist, 'album': media.album}))
+            except OSError:
+                continue
+        missing.extend(media for path, media in stored.items() if path not in present)
+
+    for file_path in merged_paths(session).intersection(found):
+        del found[file_path]
+
+    missing = list({media.id: media for media in missing}.values())
+    moved = []
+    by_signature = {}
+    for file_path, signature in found.items():
+        by_signature.setdefault(signature, []).append(file_path)
+    deleted = []
+    for media in missing:
+        candidates = by_signature.get((media.file_mtime, media.file_size))
+        if media.file_mtime is not None and candidates:
+            new_path = candidates.pop()
+            del found[new_path]
+            media.file_path = new_path
+            media.media_type = media_type_for(new_path)
+            moved.append(media.id)
+        else:
+            deleted.append(media.id)
+            session.delete(media)
+    session.commit()
+
+    pending.extend((file_path, mtime, size, None, None) for file_path, (mtime, size) in found.items())
+    import_files(session, pending, workers)
+
+    inserted = []
+    paths = list(found)
+    for start in range(0, len(paths), 500):
+        inserted.extend(media_id for (media_id,) in
+                        session.query(Media.id).filter(Media.file_path.in_(paths[start:start + 500])))
+    updated = moved + [entry[3] for entry in pending if entry[3] is not None]
+    return inserted, updated, deleted, new_directories
+
+class LibrarySync(QThread):
+    synced = pyqtSignal(list, list, list)
+    directories_found = pyqtSignal(list)
+
+    def __init__(self, directories=(), known_directories=(), roots=(), parent=None):
+        super().__init__(parent)
+        self.directories = list(directories)
+        self.known_directories = set(known_directories)
+        self.roots = list(roots)
+
+    def run(self):
+        # New roots only need their directory tree listed for watching; their files are
+        # imported by the folder scanner.
+        found = []
+        for root in self.roots:
+            found.extend(list_directories(root))
+
+        session = db_manager.get_session()
+        inserted = updated = deleted = []
+        try:
+            if self.directories:
+                inserted, updated, deleted, new_directories = sync_directories(
+                    session, self.directories, self.known_directories)
+                found.extend(new_directories)
+        except Exception as e:
+            session.rollback()
+            print(f"Error syncing library: {e}")
+        finally:
+            session.close()
+
+        if found:
+            self.directories_found.emit(found)
+        if inserted or updated or deleted:
+            self.synced.emit(inserted, updated, deleted)
+
+class LibraryWatcher(QObject):
+    # Watches every directory under the library roots. Change notifications are collected
+    # for WATCH_DEBOUNCE_MS after the last one, then the affected directories are synced in
+    # one LibrarySync pass; events arriving meanwhile wait for the next pass. Directory
+    # watches report entries being created, removed and renamed (which is how most taggers
+    # save), not in-place writes to a file's contents.
+    media_changed = pyqtSignal(list, list, list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._directories = set()
+        self._dirty = set()
+        self._roots = []
+        self._sync = None
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(WATCH_DEBOUNCE_MS)
+        self._debounce.timeout.connect(self._start_sync)
+
+    def add_roots(self, roots):
+        self._roots.extend(root for root in roots if root not in self._roots and os.path.isdir(root))
+        self._start_sync()
+
+    def _on_directory_changed(self, directory):
+        self._dirty.add(directory)
+        self._debounce.start()
+
+    def _start_sync(self):
+        if self._sync is not None and self._sync.isRunning():
+            return
+        if not self._dirty and not self._roots:
+            return
+
+        directories, self._dirty = self._dirty, set()
+        roots, self._roots = self._roots, []
+        self._sync = LibrarySync(directories, self._directories, roots, self)
+        self._sync.directories_found.connect(self._watch)
+        self._sync.synced.connect(self.media_changed)
+        self._sync.finished.connect(self._on_sync_finished)
+        self._sync.start()
+
+    def _on_sync_finished(self):
+        self._forget_missing(self._sync.directories)
+        # Anything that changed while the last pass ran.
+        if self._dirty or self._roots:
+            self._debounce.start()
+
+    def _watch(self, directories):
+        new = [directory for directory in directories if directory not in self._directories]
+        if new:
+            self._directories.update(new)
+            self._watcher.addPaths(new)
+
+    def _forget_missing(self, synced):
+        removed = [os.path.join(directory, '') for directory in synced if not os.path.isdir(directory)]
+        if not removed:
+            return
+        gone = [directory for directory in self._directories
+                if any(os.path.join(directory, '').startswith(prefix) for prefix in removed)]
+        if gone:
+            self._directories.difference_update(gone)
+            # The watcher has usually dropped deleted directories already.
+            watched = set(self._watcher.directories())
+            stale = [directory for directory in gone if directory in watched]
+            if stale:
+                self._watcher.removePaths(stale)
+
+    def shutdown(self):
+        self._debounce.stop()
+        if self._sync is not None:
+            self._sync.wait()
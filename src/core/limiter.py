@@ -0,0 +1,179 @@
+import numpy as np
+
+LIMITER_CEILING_DB = -0.3
+LIMITER_LOOKAHEAD_MS = 1.5
+LIMITER_RELEASE_DB_PER_S = 60.0
+# Block size the working buffers are sized for up front; larger blocks grow them once.
+LIMITER_BLOCK_FRAMES = 4096
+
+class LookAheadLimiter:
+    # Gain path, all vectorized over the buffer:
+    #   required gain per frame -> release (linear in dB, via minimum.accumulate)
+    #   -> trailing block-wise minimum over the look-ahead window (van Herk)
+    #   -> trailing box average over the same window.
+    # Delaying the audio by lookahead - 1 frames makes every averaged minimum cover
+    # the peak it is attenuating, so the output never exceeds the ceiling.
+
+    def __init__(self, sample_rate=44100, channels=2, ceiling_db=LIMITER_CEILING_DB,
+                 lookahead_ms=LIMITER_LOOKAHEAD_MS, release_db_per_s=LIMITER_RELEASE_DB_PER_S):
+        self.ceiling_db = ceiling_db
+        self.lookahead_ms = lookahead_ms
+        self.release_db_per_s = release_db_per_s
+        self.sample_rate = 0
+        self.channels = 0
+        self._scratch = {}
+        self._ramp = None
+        self._skip = 0
+        self.configure(sample_rate, channels)
+
+    @property
+    def latency(self):
+        return self.window - 1
+
+    def configure(self, sample_rate, channels, block_frames=LIMITER_BLOCK_FRAMES):
+        if sample_rate == self.sample_rate and channels == self.channels:
+            return
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.window = max(2, int(round(sample_rate * self.lookahead_ms / 1000.0)))
+        self.ceiling = 10 ** (self.ceiling_db / 20.0)
+        self._ceiling_gain_db = 20.0 * np.log10(self.ceiling)
+        self.release_per_frame = self.release_db_per_s / sample_rate
+        self._scratch = {}
+        self._ramp = None
+        self._allocate(block_frames)
+        self.reset()
+
+    def _allocate(self, frames):
+        # Every working array for a block of `frames`, so the audio callback itself never
+        # allocates; a larger block than configured grows them once.
+        L = self.window
+        blocks = -(-(L - 1 + frames) // L)
+        for name, shape in (('abs', (frames, self.channels)), ('peak', (frames,)),
+                            ('silence', (L - 1, self.channels)), ('released', (frames,)), ('linear', (L - 1 + frames,)),
+                            ('padded', (blocks * L,)), ('prefix', (blocks * L,)), ('suffix', (blocks * L,)),
+                            ('minimum', (L - 1 + frames,)), ('cumulative', (L + frames,)),
+                            ('gain', (frames,)), ('delayed', (L - 1 + frames, self.channels))):
+            self._buffer(name, shape)
+        if self._ramp is None or len(self._ramp) < frames:
+            self._ramp = self.release_per_frame * np.arange(1, max(frames, 1024) + 1)
+
+    def reset(self):
+        L = self.window
+        self._delay = np.zeros((L - 1, self.channels), dtype=np.float64)
+        self._released_db = 0.0
+        self._released_hist = np.ones(L - 1)
+        self._min_hist = np.ones(L - 1)
+        self._skip = 0
+
+    def engage(self):
+        # Re-entering the signal path after a bypass. The delay line would put `latency`
+        # frames of silence in front of audio that was playing undelayed a buffer ago, so
+        # they are trimmed from the next outputs instead.
+        self.reset()
+        self._skip = self.latency
+
+    def flush_into(self, out, scale=1.0):
+        # Leaving the signal path: the frames still in the delay line, limited and scaled,
+        # so the bypassed audio that follows continues where they end. Returns a view of
+        # `out` holding them (at most `latency` frames).
+        silence = self._buffer('silence', (self.latency, self.channels))
+        silence[:] = 0.0
+        flushed = self.process_into(silence, out[:self.latency], scale)
+        self.reset()
+        return flushed
+
+    def _buffer(self, name, shape, dtype=np.float64):
+        buf = self._scratch.get(name)
+        if buf is None or buf.shape[0] < shape[0] or buf.shape[1:] != shape[1:] or buf.dtype != dtype:
+            buf = np.empty((max(shape[0], 1024),) + shape[1:], dtype=dtype)
+            self._scratch[name] = buf
+        return buf[:shape[0]]
+
+    def gains(self, block):
+        frames = block.shape[0]
+        L = self.window
+        if len(self._ramp) < frames:
+            self._allocate(frames)
+
+        peak = self._buffer('peak', (frames,))
+        # Copied in first: abs() or max() converting from the block's dtype would go through
+        # numpy's cast buffers.
+        magnitude = self._buffer('abs', (frames, self.channels))
+        np.copyto(magnitude, block)
+        np.abs(magnitude, out=magnitude)
+        np.max(magnitude, axis=1, out=peak)
+        np.maximum(peak, 1e-12, out=peak)
+
+        # Required gain in dB, never above unity.
+        required = peak
+        np.log10(required, out=required)
+        required *= -20.0
+        required += self._ceiling_gain_db
+        np.minimum(required, 0.0, out=required)
+
+        # released[t] = min(required[t], released[t-1] + r), solved as a running minimum.
+        ramp = self._ramp[:frames]
+        released = self._buffer('released', (frames,))
+        np.subtract(required, ramp, out=released)
+        np.minimum.accumulate(released, out=released)
+        np.minimum(released, self._released_db, out=released)
+        released += ramp
+        np.minimum(released, 0.0, out=released)
+        self._released_db = float(released[-1])
+
+        linear = self._buffer('linear', (L - 1 + frames,))
+        linear[:L - 1] = self._released_hist
+        np.multiply(released, 0.05 * np.log(10.0), out=linear[L - 1:])
+        np.exp(linear[L - 1:], out=linear[L - 1:])
+        self._released_hist[:] = linear[frames:]
+
+        # Trailing minimum over L frames, computed block-wise (van Herk / Gil-Werman).
+        total = L - 1 + frames
+        blocks = -(-total // L)
+        padded = self._buffer('padded', (blocks * L,))
+        padded[:total] = linear
+        padded[total:] = np.inf
+        grid = padded.reshape(blocks, L)
+        prefix = self._buffer('prefix', (blocks * L,))
+        np.minimum.accumulate(grid, axis=1, out=prefix.reshape(blocks, L))
+        suffix = self._buffer('suffix', (blocks * L,))
+        np.minimum.accumulate(grid[:, ::-1], axis=1, out=suffix.reshape(blocks, L)[:, ::-1])
+        minimum = self._buffer('minimum', (L - 1 + frames,))
+        minimum[:L - 1] = self._min_hist
+        np.minimum(suffix[:frames], prefix[L - 1:total], out=minimum[L - 1:])
+        self._min_hist[:] = minimum[frames:]
+
+        # Trailing box average smooths the attack over the look-ahead window.
+        cumulative = self._buffer('cumulative', (L + frames,))
+        cumulative[0] = 0.0
+        np.add.accumulate(minimum, out=cumulative[1:])
+        gain = self._buffer('gain', (frames,))
+        np.subtract(cumulative[L:], cumulative[:frames], out=gain)
+        gain *= 1.0 / L
+        return gain
+
+    def process_into(self, block, out, scale=1.0):
+        frames = block.shape[0]
+        gain = self.gains(block)
+        gain *= scale
+
+        # History is rolled through the preallocated buffers rather than copied out.
+        L = self.window
+        delayed = self._buffer('delayed', (L - 1 + frames, self.channels))
+        delayed[:L - 1] = self._delay
+        delayed[L - 1:] = block
+        self._delay[:] = delayed[frames:]
+
+        # Per channel and in place, then one cast into `out`: a broadcast multiply or a
+        # converting ufunc output would allocate numpy iterator buffers on every call.
+        delayed = delayed[:frames]
+        for channel in range(self.channels):
+            np.multiply(delayed[:, channel], gain, out=delayed[:, channel])
+        np.copyto(out, delayed, casting='unsafe')
+
+        if self._skip:
+            dropped = min(self._skip, frames)
+            self._skip -= dropped
+            return out[dropped:]
+        return out
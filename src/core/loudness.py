@@ -0,0 +1,177 @@
+import os
+
+import numpy as np
+from scipy import signal
+
+from .audio_source import open_source, analysis_pool
+
+REPLAY_GAIN_REFERENCE_LUFS = -18.0
+TRUE_PEAK_CEILING_DBTP = -1.0
+ABSOLUTE_GATE_LUFS = -70.0
+RELATIVE_GATE_LU = -10.0
+OVERSAMPLE = 4
+
+_TRUE_PEAK_TAPS = signal.firwin(12 * OVERSAMPLE + 1, 1.0 / OVERSAMPLE) * OVERSAMPLE
+
+def k_weighting_sos(fs):
+    # ITU-R BS.1770 pre-filter (high shelf) and RLB high-pass, re-derived for any sample rate.
+    f0 = 1681.974450955533
+    gain_db = 3.999843853973347
+    q = 0.7071752369554196
+    K = np.tan(np.pi * f0 / fs)
+    Vh = 10 ** (gain_db / 20.0)
+    Vb = Vh ** 0.4996667741545416
+    a0 = 1 + K / q + K * K
+    shelf = [
+        (Vh + Vb * K / q + K * K) / a0,
+        2 * (K * K - Vh) / a0,
+        (Vh - Vb * K / q + K * K) / a0,
+        1.0,
+        2 * (K * K - 1) / a0,
+        (1 - K / q + K * K) / a0,
+    ]
+
+    f0 = 38.13547087602444
+    q = 0.5003270373238773
+    K = np.tan(np.pi * f0 / fs)
+    a0 = 1 + K / q + K * K
+    highpass = [1.0, -2.0, 1.0, 1.0, 2 * (K * K - 1) / a0, (1 - K / q + K * K) / a0]
+
+    return np.array([shelf, highpass])
+
+def channel_weights(channels):
+    weights = np.ones(channels)
+    if channels == 6:
+        weights[3] = 0.0
+        weights[4:] = 1.41
+    return weights
+
+def integrated_loudness(segment_energy, segment_frames, weights):
+    if len(segment_energy) == 0:
+        return None
+
+    if len(segment_energy) < 4:
+        blocks = segment_energy.sum(axis=0, keepdims=True) / (segment_frames * len(segment_energy))
+    else:
+        blocks = (segment_energy[:-3] + segment_energy[1:-2] + segment_energy[2:-1] + segment_energy[3:])
+        blocks /= 4 * segment_frames
+
+    power = blocks @ weights
+    with np.errstate(divide='ignore'):
+        block_loudness = -0.691 + 10 * np.log10(power)
+
+    gated = block_loudness > ABSOLUTE_GATE_LUFS
+    if not gated.any():
+        return None
+
+    relative_gate = -0.691 + 10 * np.log10(power[gated].mean()) + RELATIVE_GATE_LU
+    gated &= block_loudness > relative_gate
+    if not gated.any():
+        return None
+
+    return float(-0.691 + 10 * np.log10(power[gated].mean()))
+
+def measure_loudness(file_path):
+    with open_source(file_path) as src:
+        fs = src.sample_rate
+        channels = src.channels
+
+        sos = k_weighting_sos(fs)
+        zi = np.zeros((len(sos), 2, channels))
+        phases = [_TRUE_PEAK_TAPS[p::OVERSAMPLE] for p in range(OVERSAMPLE)]
+        phase_zi = [np.zeros((len(h) - 1, channels)) for h in phases]
+
+        segment_frames = int(round(fs * 0.1))
+        carry = np.zeros((0, channels))
+        segments = []
+        peak = 0.0
+
+        for block in src.blocks():
+            peak = max(peak, float(np.abs(block).max()))
+            for p, h in enumerate(phases):
+                upsampled, phase_zi[p] = signal.lfilter(h, 1.0, block, axis=0, zi=phase_zi[p])
+                peak = max(peak, float(np.abs(upsampled).max()))
+
+            weighted, zi = signal.sosfilt(sos, block, axis=0, zi=zi)
+            np.square(weighted, out=weighted)
+            if len(carry):
+                weighted = np.concatenate([carry, weighted])
+
+            full = len(weighted) // segment_frames
+            segments.append(weighted[:full * segment_frames].reshape(full, segment_frames, channels).sum(axis=1))
+            carry = weighted[full * segment_frames:]
+
+    energy = np.concatenate(segments) if segments else np.zeros((0, channels))
+    loudness = integrated_loudness(energy, segment_frames, channel_weights(channels))
+    true_peak = 20 * np.log10(peak) if peak > 0 else None
+
+    return {
+        'loudness_lufs': loudness,
+        'true_peak_dbtp': float(true_peak) if true_peak is not None else None,
+        'replay_gain_db': REPLAY_GAIN_REFERENCE_LUFS - loudness if loudness is not None else None,
+    }
+
+def playback_gain_db(replay_gain_db, true_peak_dbtp):
+    if replay_gain_db is None:
+        return 0.0
+    if true_peak_dbtp is not None:
+        return min(replay_gain_db, TRUE_PEAK_CEILING_DBTP - true_peak_dbtp)
+    return replay_gain_db
+
+def file_signature(file_path):
+    stat = os.stat(file_path)
+    return stat.st_mtime, stat.st_size
+
+def _scan_one(media_id, file_path):
+    try:
+        mtime, size = file_signature(file_path)
+        result = measure_loudness(file_path)
+    except Exception as e:
+        return media_id, None, str(e)
+    result['loudness_mtime'] = mtime
+    result['loudness_size'] = size
+    return media_id, result, None
+
+def stale_media(session):
+    from ..database.models import Media
+
+    pending = []
+    for media in session.query(Media).filter(Media.media_type == 'audio'):
+        try:
+            mtime, size = file_signature(media.file_path)
+        except OSError:
+            continue
+        if media.loudness_mtime != mtime or media.loudness_size != size:
+            pending.append((media.id, media.file_path))
+    return pending
+
+def scan_library(session, workers=None, progress=None, is_cancelled=None, commit_every=50):
+    from ..database.models import Media
+
+    pending = stale_media(session)
+    done = 0
+
+    with analysis_pool(workers) as pool:
+        ids = [media_id for media_id, _ in pending]
+        paths = [path for _, path in pending]
+        for media_id, result, error in pool.map(_scan_one, ids, paths, chunksize=4):
+            if is_cancelled and is_cancelled():
+                pool.shutdown(wait=False, cancel_futures=True)
+                break
+
+            if error:
+                print(f"Error measuring loudness for media {media_id}: {error}")
+            else:
+                media = session.get(Media, media_id)
+                if media:
+                    for key, value in result.items():
+                        setattr(media, key, value)
+
+            done += 1
+            if done % commit_every == 0:
+                session.commit()
+            if progress:
+                progress(done, len(pending))
+
+    session.commit()
+    return done
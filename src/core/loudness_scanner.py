@@ -0,0 +1,33 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from .loudness import scan_library
+from ..database.db_manager import db_manager
+
+class LoudnessScanner(QThread):
+    progress = pyqtSignal(int, int)
+    scan_finished = pyqtSignal(int)
+
+    def __init__(self, workers=None, parent=None):
+        super().__init__(parent)
+        self.workers = workers
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        session = db_manager.get_session()
+        scanned = 0
+        try:
+            scanned = scan_library(
+                session,
+                workers=self.workers,
+                progress=self.progress.emit,
+                is_cancelled=lambda: self._cancelled,
+            )
+        except Exception as e:
+            session.rollback()
+            print(f"Error scanning loudness: {e}")
+        finally:
+            session.close()
+        self.scan_finished.emit(scanned)
@@ -7,34 +7,111 @@ class MediaPlayer(QObject):
     media_status_changed = pyqtSignal(QMediaPlayer.MediaStatus)
     state_changed = pyqtSignal(QMediaPlayer.PlaybackState)
 
+    # Statuses in which a preloaded standby player can take over without reopening the file.
+    PRIMED_STATUSES = (
+        QMediaPlayer.MediaStatus.LoadedMedia,
+        QMediaPlayer.MediaStatus.BufferingMedia,
+        QMediaPlayer.MediaStatus.BufferedMedia,
+    )
+
     def __init__(self):
         super().__init__()
-        self._player = QMediaPlayer()
-        self._audio_output = QAudioOutput()
-        self._player.setAudioOutput(self._audio_output)
-
-        self._player.positionChanged.connect(self._on_position_changed)
-        self._player.durationChanged.connect(self._on_duration_changed)
-        self._player.mediaStatusChanged.connect(self.media_status_changed)
-        self._player.playbackStateChanged.connect(self.state_changed)
+        self._player, self._audio_output = self._create_player()
+        # Second player, opened and paused on the next queue item so a track switch is a swap
+        # instead of a cold open.
+        self._standby, self._standby_output = self._create_player()
+        self._standby_path = None
+        self._video_output = None
+        self._buffer_output = None
 
         self._current_volume = 70
         self._muted = False
+        self._track_gain = 1.0
+
+    def _create_player(self):
+        player = QMediaPlayer()
+        audio_output = QAudioOutput()
+        player.setAudioOutput(audio_output)
+
+        player.positionChanged.connect(self._on_position_changed)
+        player.durationChanged.connect(self._on_duration_changed)
+        player.mediaStatusChanged.connect(self._on_media_status_changed)
+        player.playbackStateChanged.connect(self._on_state_changed)
+        return player, audio_output
 
     def _on_position_changed(self, position):
-        self.position_changed.emit(position)
+        if self.sender() is self._player:
+            self.position_changed.emit(position)
 
     def _on_duration_changed(self, duration):
-        self.duration_changed.emit(duration)
-        self._audio_output.setVolume(self._current_volume / 100)
+        if self.sender() is self._player:
+            self.duration_changed.emit(duration)
+            self._apply_volume()
+
+    def _on_media_status_changed(self, status):
+        if self.sender() is self._player:
+            self.media_status_changed.emit(status)
+
+    def _on_state_changed(self, state):
+        if self.sender() is self._player:
+            self.state_changed.emit(state)
+
+    def _apply_volume(self):
+        # QAudioOutput volume is linear and capped at 1.0, so a track gain can always
+        # attenuate but only boost as far as the headroom left by the volume slider.
+        volume = 0 if self._muted else min(1.0, self._current_volume / 100 * self._track_gain)
+        self._audio_output.setVolume(volume)
+        self._standby_output.setVolume(volume)
 
     def set_video_output(self, video_widget):
+        self._video_output = video_widget
         self._player.setVideoOutput(video_widget)
 
     def load_media(self, file_path):
+        if file_path == self._standby_path and self._standby.mediaStatus() in self.PRIMED_STATUSES:
+            self._swap_to_standby()
+            return
         url = QUrl.fromLocalFile(file_path)
         self._player.setSource(url)
 
+    def preload(self, file_path):
+        if file_path == self._standby_path:
+            return
+        self._standby_path = file_path
+        self._standby.setSource(QUrl.fromLocalFile(file_path))
+        # Pausing a loaded source prerolls the decoder without producing output.
+        self._standby.pause()
+
+    def clear_preload(self):
+        if self._standby_path is not None:
+            self._standby_path = None
+            self._standby.stop()
+            self._standby.setSource(QUrl())
+
+    def _swap_to_standby(self):
+        # Swapped before the old player is stopped: its signals only reach listeners while it
+        # is self._player, so its StoppedState never shows up as a stop between tracks.
+        previous = self._player
+        self._player, self._standby = self._standby, previous
+        self._audio_output, self._standby_output = self._standby_output, self._audio_output
+        self._standby_path = None
+
+        previous.setVideoOutput(None)
+        if self._buffer_output is not None:
+            previous.setAudioBufferOutput(None)
+        if self._video_output is not None:
+            self._player.setVideoOutput(self._video_output)
+        if self._buffer_output is not None:
+            self._player.setAudioBufferOutput(self._buffer_output)
+        self._apply_volume()
+
+        previous.stop()
+        previous.setSource(QUrl())
+
+        self.duration_changed.emit(self._player.duration())
+        self.position_changed.emit(self._player.position())
+        self.media_status_changed.emit(self._player.mediaStatus())
+
     def play(self):
         self._player.play()
 
@@ -44,20 +121,23 @@ class MediaPlayer(QObject):
     def stop(self):
         self._player.stop()
 
+    def position(self):
+        return self._player.position()
+
     def set_position(self, position):
         self._player.setPosition(position)
 
     def set_volume(self, volume):
         self._current_volume = volume
-        if not self._muted:
-            self._audio_output.setVolume(volume / 100)
+        self._apply_volume()
+
+    def set_track_gain(self, gain_db):
+        self._track_gain = 10 ** (gain_db / 20.0)
+        self._apply_volume()
 
     def set_muted(self, muted):
         self._muted = muted
-        if muted:
-            self._audio_output.setVolume(0)
-        else:
-            self._audio_output.setVolume(self._current_volume / 100)
+        self._apply_volume()
 
     def get_state(self):
         return self._player.playbackState()
@@ -67,4 +147,5 @@ class MediaPlayer(QObject):
 
     def set_audio_buffer_output(self, output):
         if hasattr(self._player, "setAudioBufferOutput"):
+            self._buffer_output = output
             self._player.setAudioBufferOutput(output)
@@ -1,8 +1,54 @@
 import os
 from mutagen import File
-from mutagen.mp3 import MP3
-from mutagen.id3 import ID3, APIC
-from PyQt6.QtGui import QImage
+
+from .thumbnail_cache import thumbnail_cache, cover_from, COVER_THUMBNAIL_SIZE
+
+PHOTO_EXTENSIONS = ('.gif', '.jpg', '.png', '.jpeg', '.bmp')
+
+def _first_tag(audio, id3_key, key):
+    if id3_key in audio:
+        return str(audio[id3_key])
+    if key in audio and len(audio[key]) > 0:
+        return str(audio[key][0])
+    return None
+
+def default_tags(file_path):
+    return {
+        'title': os.path.splitext(os.path.basename(file_path))[0],
+        'artist': None,
+        'album': None,
+        'duration': 0,
+        'sample_rate': None,
+        'channels': None,
+        'bitrate': None,
+        'has_cover': False,
+    }
+
+def read_tags(file_path):
+    # Text tags and stream info only: the cover is checked for but not decoded, so this
+    # is cheap enough to run over a whole library in worker processes. Missing tags come
+    # back as None.
+    tags = default_tags(file_path)
+    if file_path.lower().endswith(PHOTO_EXTENSIONS):
+        return tags
+
+    audio = File(file_path)
+    # An untagged file is falsy but still carries stream info.
+    if audio is None:
+        return tags
+
+    tags['title'] = _first_tag(audio, 'TIT2', 'title') or tags['title']
+    tags['artist'] = _first_tag(audio, 'TPE1', 'artist')
+    tags['album'] = _first_tag(audio, 'TALB', 'album')
+    info = audio.info
+    if info is not None:
+        if getattr(info, 'length', None):
+            tags['duration'] = int(info.length * 1000)
+        tags['sample_rate'] = getattr(info, 'sample_rate', None) or None
+        tags['channels'] = getattr(info, 'channels', None) or None
+        tags['bitrate'] = getattr(info, 'bitrate', None) or None
+    tags['has_cover'] = cover_from(audio) is not None
+    return tags
 
 def extract_metadata(file_path):
     metadata = {
@@ -11,7 +57,7 @@ def extract_metadata(file_path):
         'cover_art': None
     }
 
-    if file_path.lower().endswith(('.gif', '.jpg', '.png', '.jpeg', '.bmp')):
+    if file_path.lower().endswith(PHOTO_EXTENSIONS):
         return metadata
 
     try:
@@ -19,44 +65,10 @@ def extract_metadata(file_path):
         if not audio:
             return metadata
 
-        if 'TIT2' in audio:
-            metadata['title'] = str(audio['TIT2'])
-        elif 'title' in audio and len(audio['title']) > 0:
-            metadata['title'] = str(audio['title'][0])
-
-        if 'TPE1' in audio:
-            metadata['artist'] = str(audio['TPE1'])
-        elif 'artist' in audio and len(audio['artist']) > 0:
-            metadata['artist'] = str(audio['artist'][0])
-
-        image = None
-
-        if isinstance(audio, MP3) or isinstance(audio, ID3):
-             if not isinstance(audio, ID3):
-                 try:
-                     audio = ID3(file_path)
-                 except:
-                     pass
-
-             if audio:
-                 for key in audio.keys():
-                     if key.startswith('APIC'):
-                         apic = audio[key]
-                         img_data = apic.data
-                         image = QImage.fromData(img_data)
-                         break
-
-        elif hasattr(audio, 'pictures') and audio.pictures:
-             p = audio.pictures[0]
-             image = QImage.fromData(p.data)
-
-        elif 'covr' in audio:
-             if len(audio['covr']) > 0:
-                 img_data = audio['covr'][0]
-                 image = QImage.fromData(img_data)
+        metadata['title'] = _first_tag(audio, 'TIT2', 'title') or metadata['title']
+        metadata['artist'] = _first_tag(audio, 'TPE1', 'artist') or metadata['artist']
 
-        if image and not image.isNull():
-            metadata['cover_art'] = image
+        metadata['cover_art'] = thumbnail_cache.for_media(file_path, COVER_THUMBNAIL_SIZE)
 
     except Exception as e:
         print(f"Error extracting metadata for {file_path}: {e}")
@@ -0,0 +1,56 @@
+from PyQt6.QtCore import QObject
+
+class PlayQueue(QObject):
+    # Ordered file paths taken from the view playback was started from, plus the track
+    # info (stored tags, gain and cover art) prefetched for the upcoming item on the
+    # TrackInfoLoader's pool.
+
+    def __init__(self, loader, parent=None):
+        super().__init__(parent)
+        self.items = []
+        self.index = -1
+        self._info = {}
+        self.loader = loader
+        self.loader.prefetched.connect(self._on_prefetched)
+
+    def set_items(self, file_paths, current=None):
+        self.items = list(file_paths)
+        self.index = self.items.index(current) if current in self.items else -1
+
+    def current(self):
+        if 0 <= self.index < len(self.items):
+            return self.items[self.index]
+        return None
+
+    def peek_next(self):
+        if self.index + 1 < len(self.items):
+            return self.items[self.index + 1]
+        return None
+
+    def advance(self):
+        if self.index + 1 >= len(self.items):
+            return None
+        self.index += 1
+        return self.items[self.index]
+
+    def previous(self):
+        if self.index <= 0:
+            return None
+        self.index -= 1
+        return self.items[self.index]
+
+    def jump_to(self, file_path):
+        if file_path in self.items:
+            self.index = self.items.index(file_path)
+
+    def prefetch(self, file_path):
+        if file_path not in self._info:
+            self.loader.prefetch(file_path)
+
+    def _on_prefetched(self, file_path, info):
+        # Only the upcoming item is worth holding on to; cover art can be large.
+        if file_path == self.peek_next() or file_path == self.current():
+            self._info = {file_path: info}
+
+    def take_info(self, file_path):
+        return self._info.pop(file_path, None)
@@ -0,0 +1,118 @@
+from collections import OrderedDict
+from math import gcd
+
+import numpy as np
+from scipy import signal
+
+RESAMPLER_TAPS_PER_PHASE = 32
+RESAMPLER_KAISER_BETA = 8.0
+RESAMPLER_ROLLOFF = 0.95
+KERNEL_CACHE_SIZE = 16
+# Input block size the working buffers are sized for up front; larger blocks grow them once.
+RESAMPLER_BLOCK_FRAMES = 4096
+
+_kernel_cache = OrderedDict()
+
+def rate_ratio(source_rate, target_rate):
+    divisor = gcd(int(source_rate), int(target_rate))
+    return int(target_rate) // divisor, int(source_rate) // divisor
+
+def polyphase_kernel(up, down, taps_per_phase=RESAMPLER_TAPS_PER_PHASE):
+    # Rows are phases, columns are taps ordered oldest input sample first so each row
+    # lines up with a sliding window over the input.
+    key = (up, down, taps_per_phase)
+    phases = _kernel_cache.get(key)
+    if phases is not None:
+        _kernel_cache.move_to_end(key)
+        return phases
+
+    cutoff = RESAMPLER_ROLLOFF / max(up, down)
+    prototype = signal.firwin(up * taps_per_phase, cutoff, window=('kaiser', RESAMPLER_KAISER_BETA))
+    phases = (prototype * up).reshape(taps_per_phase, up).T[:, ::-1].copy()
+    phases.setflags(write=False)
+
+    _kernel_cache[key] = phases
+    while len(_kernel_cache) > KERNEL_CACHE_SIZE:
+        _kernel_cache.popitem(last=False)
+    return phases
+
+class PolyphaseResampler:
+    def __init__(self, source_rate, target_rate, channels=2, taps_per_phase=RESAMPLER_TAPS_PER_PHASE):
+        self.taps = taps_per_phase
+        self.source_rate = 0
+        self.target_rate = 0
+        self.channels = 0
+        self._capacity = 0
+        self.configure(source_rate, target_rate, channels)
+
+    @property
+    def is_identity(self):
+        return self.up == self.down
+
+    def configure(self, source_rate, target_rate, channels, block_frames=RESAMPLER_BLOCK_FRAMES):
+        if (source_rate, target_rate, channels) == (self.source_rate, self.target_rate, self.channels):
+            return
+        self.source_rate = source_rate
+        self.target_rate = target_rate
+        self.channels = channels
+        self.up, self.down = rate_ratio(source_rate, target_rate)
+        self.phases = polyphase_kernel(self.up, self.down, self.taps)
+        self._allocate(block_frames)
+        self.reset()
+
+    def _allocate(self, frames):
+        # Working arrays for an input block of `frames`, so process() itself never
+        # allocates; a larger block than configured grows them once.
+        K = self.taps
+        count = frames * self.up // self.down + 2
+        self._capacity = frames
+        self._ext = np.zeros((K - 1 + frames, self.channels))
+        self._steps = np.arange(count) * self.down
+        # Tap offsets per output, laid out in full: adding a broadcast row would go
+        # through numpy's iterator buffers on every call.
+        self._taps = np.tile(np.arange(K), (count, 1))
+        self._positions = np.empty(count, dtype=np.intp)
+        self._index = np.empty(count, dtype=np.intp)
+        self._phase = np.empty(count, dtype=np.intp)
+        self._window_index = np.empty((count, K), dtype=np.intp)
+        self._coefficients = np.empty((count, K))
+        self._windows = np.empty((count, K, self.channels))
+        self._out = np.empty((count, self.channels))
+
+    def reset(self):
+        self._history = np.zeros((self.taps - 1, self.channels))
+        # Position of the next output sample on the upsampled grid, relative to the history start.
+        self._position = (self.taps - 1) * self.up
+
+    def process(self, block):
+        frames = block.shape[0]
+        K = self.taps
+        if frames > self._capacity:
+            self._allocate(frames)
+        ext = self._ext[:K - 1 + frames]
+        ext[:K - 1] = self._history
+        ext[K - 1:] = block
+
+        end = (K - 1 + frames) * self.up
+        count = max(0, -(-(end - self._position) // self.down))
+        positions = self._positions[:count]
+        np.add(self._steps[:count], self._position, out=positions)
+        index = self._index[:count]
+        np.floor_divide(positions, self.up, out=index)
+        index -= K - 1
+        phase = self._phase[:count]
+        np.remainder(positions, self.up, out=phase)
+
+        # Output n needs the K inputs ending at index[n]: windows[n] = ext[index[n] - K + 1:][:K].
+        # mode='clip' lets take() write straight into `out`; the indices are always in range.
+        window_index = self._window_index[:count]
+        np.copyto(window_index, index[:, None])
+        window_index += self._taps[:count]
+        windows = np.take(ext, window_index, axis=0, out=self._windows[:count], mode='clip')
+        coefficients = np.take(self.phases, phase, axis=0, out=self._coefficients[:count], mode='clip')
+        out = self._out[:count]
+        np.matmul(coefficients[:, None, :], windows, out=out[:, None, :])
+
+        self._position += count * self.down - frames * self.up
+        self._history[:] = ext[frames:]
+        return out
@@ -0,0 +1,92 @@
+import numpy as np
+
+_hann_windows = {}
+
+def hann_window(size):
+    window = _hann_windows.get(size)
+    if window is None:
+        window = np.hanning(size).astype(np.float32)
+        _hann_windows[size] = window
+    return window
+
+class SpectrumAnalyzer:
+    def __init__(self, bars=30, fft_size=2048, min_freq=20, max_freq=20000):
+        self.bars = bars
+        self.fft_size = fft_size
+        self.min_freq = min_freq
+        self.max_freq = max_freq
+        self.sample_rate = 0
+
+        self._ring = np.zeros(fft_size, dtype=np.float32)
+        self._write_pos = 0
+        self._frame = np.zeros(fft_size, dtype=np.float32)
+        self._mono = np.zeros(0, dtype=np.float32)
+        self._cumsum = np.zeros(fft_size // 2 + 2, dtype=np.float64)
+        self._starts = None
+        self._ends = None
+        self._counts = None
+        self.pending = False
+
+    def configure(self, sample_rate):
+        if sample_rate == self.sample_rate:
+            return
+        self.sample_rate = sample_rate
+        self.reset()
+
+        n_bins = self.fft_size // 2 + 1
+        freq_per_bin = sample_rate / self.fft_size
+        edges = np.logspace(np.log10(self.min_freq), np.log10(self.max_freq), self.bars + 1)
+
+        starts = np.clip((edges[:-1] / freq_per_bin).astype(np.int64), 0, n_bins - 1)
+        ends = np.clip((edges[1:] / freq_per_bin).astype(np.int64), 0, n_bins)
+        ends = np.maximum(ends, starts + 1)
+
+        self._starts = starts
+        self._ends = ends
+        self._counts = (ends - starts).astype(np.float64)
+
+    def reset(self):
+        self._ring.fill(0.0)
+        self._write_pos = 0
+        self.pending = False
+
+    def push(self, frames_2d, scale=1.0):
+        frames = frames_2d.shape[0]
+        if frames == 0:
+            return
+
+        if len(self._mono) < frames:
+            self._mono = np.zeros(frames, dtype=np.float32)
+        mono = self._mono[:frames]
+        np.mean(frames_2d, axis=1, out=mono)
+        if scale != 1.0:
+            mono *= scale
+
+        if frames >= self.fft_size:
+            self._ring[:] = mono[-self.fft_size:]
+            self._write_pos = 0
+        else:
+            first = min(frames, self.fft_size - self._write_pos)
+            self._ring[self._write_pos:self._write_pos + first] = mono[:first]
+            self._ring[:frames - first] = mono[first:]
+            self._write_pos = (self._write_pos + frames) % self.fft_size
+
+        self.pending = True
+
+    def compute(self):
+        if self._starts is None:
+            return None
+        self.pending = False
+
+        split = self.fft_size - self._write_pos
+        self._frame[:split] = self._ring[self._write_pos:]
+        self._frame[split:] = self._ring[:self._write_pos]
+        np.multiply(self._frame, hann_window(self.fft_size), out=self._frame)
+
+        magnitude = np.abs(np.fft.rfft(self._frame))
+        magnitude *= 200.0 / self.fft_size
+
+        np.cumsum(magnitude, out=self._cumsum[1:])
+        bands = (self._cumsum[self._ends] - self._cumsum[self._starts]) / self._counts
+        np.minimum(bands, 1.0, out=bands)
+        return bands.astype(np.float32)
@@ -0,0 +1,205 @@
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+
+from mutagen import File
+from PyQt6.QtCore import QBuffer, QByteArray, QIODevice, Qt
+from PyQt6.QtGui import QImage, QImageReader
+
+THUMBNAIL_CACHE_DIR = os.path.join("cache", "thumbnails")
+THUMBNAIL_SIZES = (64, 128, 256)
+THUMBNAIL_MEMORY_BUDGET = 32 * 1024 * 1024
+THUMBNAIL_FORMAT = "png"
+COVER_THUMBNAIL_SIZE = 64
+
+_NO_IMAGE = "-"
+
+def cover_from(audio):
+    # Raw bytes of the first embedded picture of an already parsed mutagen file (ID3 APIC,
+    # FLAC/Vorbis pictures or MP4 covr), without decoding them.
+    if audio is None:
+        return None
+
+    for key in audio.keys():
+        if key.startswith('APIC'):
+            return bytes(audio[key].data)
+
+    if getattr(audio, 'pictures', None):
+        return bytes(audio.pictures[0].data)
+
+    if 'covr' in audio and len(audio['covr']) > 0:
+        return bytes(audio['covr'][0])
+    return None
+
+def embedded_cover_data(file_path):
+    return cover_from(File(file_path))
+
+def fixed_size_for(size):
+    for candidate in THUMBNAIL_SIZES:
+        if candidate >= size:
+            return candidate
+    return THUMBNAIL_SIZES[-1]
+
+def _read_scaled(reader, width, height):
+    # Asking the reader for the target size lets JPEG decode at 1/2, 1/4 or 1/8 scale
+    # instead of decoding every pixel and throwing most of them away.
+    reader.setAutoTransform(True)
+    original = reader.size()
+    if original.isValid() and (original.width() > width or original.height() > height):
+        reader.setScaledSize(original.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio))
+    return reader.read()
+
+def load_scaled(file_path, width, height):
+    image = _read_scaled(QImageReader(file_path), width, height)
+    return None if image.isNull() else image
+
+def _read_file(file_path):
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+class ThumbnailCache:
+    # Downscaled covers stored once per image content (sha1 of the encoded bytes) at each
+    # of THUMBNAIL_SIZES, so album art shared by a whole album is decoded and kept once.
+    # Small index files map a source (path, mtime, size) to its content hash, which lets
+    # a repeat lookup skip both hashing and tag parsing. Decoded thumbnails are kept in
+    # an LRU bounded by THUMBNAIL_MEMORY_BUDGET bytes.
+
+    def __init__(self, cache_dir=THUMBNAIL_CACHE_DIR, memory_budget=THUMBNAIL_MEMORY_BUDGET):
+        self.cache_dir = cache_dir
+        self.memory_budget = memory_budget
+        self._images = OrderedDict()
+        self._memory_bytes = 0
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    def for_media(self, file_path, size=COVER_THUMBNAIL_SIZE):
+        return self._lookup('cover', file_path, size, embedded_cover_data)
+
+    def for_file(self, file_path, size=COVER_THUMBNAIL_SIZE):
+        return self._lookup('file', file_path, size, _read_file)
+
+    def for_image_data(self, data, size=COVER_THUMBNAIL_SIZE):
+        if not data:
+            return None
+        content = hashlib.sha1(data).hexdigest()
+        return self._thumbnail(content, fixed_size_for(size), lambda: data)
+
+    def _lookup(self, kind, file_path, size, read_data):
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        source = f"{kind}|{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+        content = self._content_hash(source)
+
+        data = None
+        if content is None:
+            try:
+                data = read_data(file_path)
+            except Exception as e:
+                print(f"Error reading image data for {file_path}: {e}")
+                return None
+            content = hashlib.sha1(data).hexdigest() if data else _NO_IMAGE
+            self._remember_source(source, content)
+
+        if content == _NO_IMAGE:
+            return None
+        return self._thumbnail(content, fixed_size_for(size), lambda: data or read_data(file_path))
+
+    def _index_path(self, source):
+        return os.path.join(self.cache_dir, "index", hashlib.sha1(source.encode('utf-8')).hexdigest())
+
+    def _content_hash(self, source):
+        with self._lock:
+            if source in self._sources:
+                return self._sources[source]
+        try:
+            with open(self._index_path(source), 'r') as f:
+                content = f.read().strip()
+        except OSError:
+            return None
+        with self._lock:
+            self._sources[source] = content
+        return content
+
+    def _remember_source(self, source, content):
+        with self._lock:
+            self._sources[source] = content
+        self._write_atomic(self._index_path(source), content.encode('ascii'))
+
+    def _thumbnail_path(self, content, size):
+        return os.path.join(self.cache_dir, content[:2], f"{content}_{size}.{THUMBNAIL_FORMAT}")
+
+    def _thumbnail(self, content, size, read_data):
+        key = (content, size)
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                return image
+
+        path = self._thumbnail_path(content, size)
+        image = QImage(path) if os.path.exists(path) else QImage()
+        if image.isNull():
+            image = self._build(content, read_data).get(size)
+        if image is None or image.isNull():
+            return None
+
+        self._remember_image(key, image)
+        return image
+
+    def _build(self, content, read_data):
+        # One decode at the largest fixed size, then every smaller size is derived from it.
+        try:
+            data = read_data()
+        except Exception as e:
+            print(f"Error reading image data: {e}")
+            return {}
+        if not data:
+            return {}
+
+        buffer = QBuffer()
+        buffer.setData(QByteArray(data))
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        largest = _read_scaled(QImageReader(buffer), THUMBNAIL_SIZES[-1], THUMBNAIL_SIZES[-1])
+        if largest.isNull():
+            return {}
+
+        images = {}
+        for size in THUMBNAIL_SIZES:
+            if largest.width() > size or largest.height() > size:
+                image = largest.scaled(size, size, Qt.AspectRatioMode.KeepAspectRatio,
+                                       Qt.TransformationMode.SmoothTransformation)
+            else:
+                image = largest
+            images[size] = image
+
+            path = self._thumbnail_path(content, size)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            if image.save(temporary, THUMBNAIL_FORMAT.upper()):
+                os.replace(temporary, path)
+        return images
+
+    def _remember_image(self, key, image):
+        with self._lock:
+            if key in self._images:
+                return
+            self._images[key] = image
+            self._memory_bytes += image.sizeInBytes()
+            while self._memory_bytes > self.memory_budget and len(self._images) > 1:
+                _, evicted = self._images.popitem(last=False)
+                self._memory_bytes -= evicted.sizeInBytes()
+
+    def _write_atomic(self, path, data):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temporary = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporary, 'wb') as f:
+                f.write(data)
+            os.replace(temporary, path)
+        except OSError as e:
+            print(f"Error writing thumbnail index {path}: {e}")
+
+thumbnail_cache = ThumbnailCache()
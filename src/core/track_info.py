@@ -0,0 +1,139 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .library import media_type_for
+from .metadata import extract_metadata
+from .thumbnail_cache import thumbnail_cache, load_scaled, COVER_THUMBNAIL_SIZE
+from ..database.db_manager import db_manager
+
+TRACK_INFO_WORKERS = 2
+STORED_FIELDS = ('title', 'artist', 'has_cover', 'custom_cover_path', 'replay_gain_db', 'true_peak_dbtp')
+
+def placeholder_info(file_path):
+    return {
+        'title': os.path.splitext(os.path.basename(file_path))[0],
+        'artist': "",
+        'cover_art': None,
+    }
+
+def stored_fields(file_path):
+    # A short-lived session per lookup: sessions are not shared across threads.
+    from ..database.models import Media
+
+    session = db_manager.get_session()
+    try:
+        media = session.query(Media).filter_by(file_path=file_path).first()
+        if media is None:
+            return None
+        return {field: getattr(media, field) for field in STORED_FIELDS}
+    finally:
+        session.close()
+
+def describe_track(file_path, stored=None):
+    # Title, artist, cover and gain for a track. Library rows carry their tags, so the
+    # file is only parsed when it is not in the library or was imported before tags were
+    # stored (has_cover is NULL); the cover comes from the thumbnail cache.
+    stored = stored or {}
+    info = placeholder_info(file_path)
+    info.update({
+        'file_path': file_path,
+        'replay_gain_db': stored.get('replay_gain_db'),
+        'true_peak_dbtp': stored.get('true_peak_dbtp'),
+    })
+
+    if stored.get('has_cover') is not None:
+        metadata = {
+            'title': info['title'],
+            'artist': "Unknown Artist",
+            'cover_art': thumbnail_cache.for_media(file_path, COVER_THUMBNAIL_SIZE) if stored['has_cover'] else None,
+        }
+    else:
+        metadata = extract_metadata(file_path)
+    info['title'] = stored.get('title') or metadata['title']
+    info['artist'] = stored.get('artist') or metadata['artist']
+    info['cover_art'] = metadata['cover_art']
+
+    if stored.get('custom_cover_path'):
+        info['cover_art'] = thumbnail_cache.for_file(stored['custom_cover_path'], COVER_THUMBNAIL_SIZE) or info['cover_art']
+    return info
+
+class TrackInfoLoader(QObject):
+    # Resolves what the UI shows for a track (DB row, tags, cover, and the photo itself
+    # for images) on a small thread pool, so play_media can start the decoder first.
+    # Every request gets a token; only the newest one is resolved and delivered, and
+    # anything older is cancelled before it starts or dropped between steps. Prefetches
+    # for the upcoming track share the pool but not the token.
+    info_ready = pyqtSignal(int, dict)
+    prefetched = pyqtSignal(str, dict)
+
+    def __init__(self, workers=TRACK_INFO_WORKERS, parent=None):
+        super().__init__(parent)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="track-info")
+        self._lock = threading.Lock()
+        self._token = 0
+        self._future = None
+        self._prefetching = set()
+
+    def request(self, file_path, photo_size=None, prefetched=None):
+        with self._lock:
+            self._token += 1
+            token = self._token
+            if self._future is not None:
+                self._future.cancel()
+            self._future = self._executor.submit(self._resolve, token, file_path, photo_size, prefetched)
+        return token
+
+    def prefetch(self, file_path):
+        with self._lock:
+            if file_path in self._prefetching:
+                return
+            self._prefetching.add(file_path)
+            self._executor.submit(self._prefetch, file_path)
+
+    def is_current(self, token):
+        return token == self._token
+
+    def shutdown(self):
+        with self._lock:
+            self._token += 1
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _resolve(self, token, file_path, photo_size, prefetched):
+        try:
+            info = self._load(token, file_path, photo_size, prefetched)
+        except Exception as e:
+            print(f"Error loading track info for {file_path}: {e}")
+            return
+        if info is not None and self.is_current(token):
+            self.info_ready.emit(token, info)
+
+    def _prefetch(self, file_path):
+        try:
+            info = describe_track(file_path, stored_fields(file_path))
+        except Exception as e:
+            print(f"Error prefetching track info for {file_path}: {e}")
+            info = None
+        finally:
+            with self._lock:
+                self._prefetching.discard(file_path)
+        if info is not None:
+            self.prefetched.emit(file_path, info)
+
+    def _load(self, token, file_path, photo_size, prefetched=None):
+        info = prefetched
+        if info is None:
+            stored = stored_fields(file_path)
+            if not self.is_current(token):
+                return None
+            info = describe_track(file_path, stored)
+
+        if not self.is_current(token):
+            return None
+
+        info['photo'] = None
+        if media_type_for(file_path) == 'photo' and photo_size is not None and not file_path.lower().endswith('.gif'):
+            info['photo'] = load_scaled(file_path, photo_size[0], photo_size[1])
+        return info
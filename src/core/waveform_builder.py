@@ -0,0 +1,36 @@
+import multiprocessing
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from .waveform_cache import WAVEFORM_CACHE_DIR, build_waveform, load_waveform
+
+class WaveformBuilder(QThread):
+    waveform_ready = pyqtSignal(str, object)
+
+    def __init__(self, file_path, cache_dir=WAVEFORM_CACHE_DIR, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.cache_dir = cache_dir
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        # Decoding a whole track is CPU heavy, so it runs in its own process to keep the
+        # GIL free for the audio thread.
+        context = multiprocessing.get_context('spawn')
+        process = context.Process(target=build_waveform, args=(self.file_path, self.cache_dir),
+                                  name="boombox-waveform", daemon=True)
+        process.start()
+        while process.is_alive():
+            if self._cancelled:
+                process.terminate()
+                process.join()
+                return
+            process.join(0.1)
+
+        peaks = load_waveform(self.file_path, self.cache_dir)
+        if peaks is None:
+            print(f"Error building waveform for {self.file_path} (exit code {process.exitcode})")
+        self.waveform_ready.emit(self.file_path, peaks)
@@ -0,0 +1,136 @@
+import os
+import struct
+import hashlib
+
+import numpy as np
+
+from .audio_source import open_source
+
+WAVEFORM_CACHE_DIR = os.path.join("cache", "waveforms")
+WAVEFORM_BASE_FRAMES = 256
+WAVEFORM_LEVEL_FACTOR = 4
+WAVEFORM_MIN_PEAKS = 1024
+
+# magic, version, base frames, level factor, sample rate, total frames, level 0 peaks
+_HEADER = struct.Struct('<4sHHHIqq')
+_MAGIC = b'BBWF'
+_VERSION = 1
+
+def cache_key(file_path):
+    stat = os.stat(file_path)
+    identity = f"{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}"
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+def cache_path(file_path, cache_dir=WAVEFORM_CACHE_DIR):
+    return os.path.join(cache_dir, cache_key(file_path) + ".peaks")
+
+def level_lengths(base_peaks, factor=WAVEFORM_LEVEL_FACTOR, min_peaks=WAVEFORM_MIN_PEAKS):
+    lengths = [base_peaks]
+    while lengths[-1] > min_peaks:
+        lengths.append(-(-lengths[-1] // factor))
+    return lengths
+
+def _reduce(peaks, factor):
+    # Pads with the last peak so the final partial group reduces like a full one.
+    count = -(-len(peaks) // factor)
+    padded = np.concatenate([peaks, np.repeat(peaks[-1:], count * factor - len(peaks), axis=0)])
+    grouped = padded.reshape(count, factor, 2)
+    return np.stack([grouped[:, :, 0].min(axis=1), grouped[:, :, 1].max(axis=1)], axis=1)
+
+class WaveformPeaks:
+    # Level 0 holds one min/max pair per WAVEFORM_BASE_FRAMES frames (all channels folded
+    # together); every further level is WAVEFORM_LEVEL_FACTOR times coarser.
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER.size)
+        magic, version, base, factor, rate, frames, base_peaks = _HEADER.unpack(header)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Not a waveform cache file: {path}")
+
+        self.base_frames = base
+        self.factor = factor
+        self.sample_rate = rate
+        self.frames = frames
+        lengths = level_lengths(base_peaks, factor)
+        if sum(lengths):
+            data = np.memmap(path, dtype=np.int8, mode='r', offset=_HEADER.size, shape=(sum(lengths), 2))
+        else:
+            data = np.zeros((0, 2), dtype=np.int8)
+
+        self.levels = []
+        start = 0
+        for length in lengths:
+            self.levels.append(data[start:start + length])
+            start += length
+
+    @property
+    def duration_ms(self):
+        return int(self.frames * 1000 / self.sample_rate) if self.sample_rate else 0
+
+    def peaks_for(self, width):
+        # Min/max in [-1, 1] for `width` equal slices of the track, read from the coarsest
+        # level that still has at least one peak per slice.
+        if width <= 0 or not len(self.levels[0]):
+            return np.zeros((max(width, 0), 2), dtype=np.float32)
+
+        level = self.levels[0]
+        for candidate in self.levels[1:]:
+            if len(candidate) < width:
+                break
+            level = candidate
+
+        edges = (np.arange(width) * len(level)) // width
+        edges = np.minimum(edges, len(level) - 1)
+        lows = np.minimum.reduceat(level[:, 0], edges)
+        highs = np.maximum.reduceat(level[:, 1], edges)
+        return np.stack([lows, highs], axis=1).astype(np.float32) / 127.0
+
+def build_waveform(file_path, cache_dir=WAVEFORM_CACHE_DIR):
+    target = cache_path(file_path, cache_dir)
+    if os.path.exists(target):
+        return target
+    os.makedirs(cache_dir, exist_ok=True)
+
+    base = WAVEFORM_BASE_FRAMES
+    chunks = []
+    with open_source(file_path) as src:
+        sample_rate = src.sample_rate
+        carry = np.zeros((0,), dtype=np.float32)
+        frames = 0
+        for block in src.blocks(base * 1024):
+            frames += len(block)
+            mono_min = block.min(axis=1)
+            mono_max = block.max(axis=1)
+            if len(carry):
+                mono_min = np.concatenate([carry[0], mono_min])
+                mono_max = np.concatenate([carry[1], mono_max])
+            full = len(mono_min) // base * base
+            if full:
+                chunks.append(np.stack([mono_min[:full].reshape(-1, base).min(axis=1),
+                                        mono_max[:full].reshape(-1, base).max(axis=1)], axis=1))
+            carry = np.stack([mono_min[full:], mono_max[full:]])
+        if carry.size:
+            chunks.append(np.array([[carry[0].min(), carry[1].max()]]))
+
+    base_level = np.concatenate(chunks) if chunks else np.zeros((0, 2))
+    levels = [base_level]
+    while len(levels[-1]) > WAVEFORM_MIN_PEAKS:
+        levels.append(_reduce(levels[-1], WAVEFORM_LEVEL_FACTOR))
+
+    temporary = f"{target}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, base, WAVEFORM_LEVEL_FACTOR, sample_rate, frames, len(base_level)))
+        for level in levels:
+            f.write(np.clip(np.round(level * 127.0), -127, 127).astype(np.int8).tobytes())
+    os.replace(temporary, target)
+    return target
+
+def load_waveform(file_path, cache_dir=WAVEFORM_CACHE_DIR):
+    try:
+        path = cache_path(file_path, cache_dir)
+        if not os.path.exists(path):
+            return None
+        return WaveformPeaks(path)
+    except (OSError, ValueError, struct.error):
+        return None
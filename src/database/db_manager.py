@@ -1,7 +1,8 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
 from .models import Base
+from .migrations import run_migrations
 
 DATABASE_URL = "sqlite:///boombox.db"
 
@@ -13,10 +14,23 @@ class DatabaseManager:
     def init_db(self):
         try:
             Base.metadata.create_all(self.engine)
+            self.add_missing_columns()
+            run_migrations(self.engine)
             print("Database initialized successfully.")
         except Exception as e:
             print(f"Error initializing database: {e}")
 
+    def add_missing_columns(self):
+        inspector = inspect(self.engine)
+        with self.engine.begin() as conn:
+            for table in Base.metadata.sorted_tables:
+                existing = {col['name'] for col in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    col_type = column.type.compile(dialect=self.engine.dialect)
+                    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+
     def get_session(self):
         return self.Session()
 
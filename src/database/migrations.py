@@ -0,0 +1,88 @@
+from datetime import datetime
+
+from sqlalchemy import Table, Column, Integer, DateTime, MetaData, bindparam, inspect, select, text, update
+
+from .models import Media, Fingerprint, FingerprintHash, playlist_media_association, sort_key
+
+# Changes create_all/add_missing_columns cannot make on an existing database: indexes,
+# keys and data backfills. Each step runs once, in order, inside its own transaction, and
+# is written so it is also harmless on a database create_all has just built.
+MIGRATIONS = []
+
+BACKFILL_BATCH = 1000
+
+_versions = Table(
+    'schema_migrations', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('applied_at', DateTime, default=datetime.now),
+)
+
+def migration(version):
+    def register(func):
+        MIGRATIONS.append((version, func))
+        MIGRATIONS.sort(key=lambda entry: entry[0])
+        return func
+    return register
+
+def applied_versions(conn):
+    _versions.create(conn, checkfirst=True)
+    return {version for (version,) in conn.execute(select(_versions.c.version))}
+
+def run_migrations(engine):
+    with engine.begin() as conn:
+        done = applied_versions(conn)
+    for version, func in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            func(conn)
+            conn.execute(_versions.insert().values(version=version, applied_at=datetime.now()))
+        print(f"Applied database migration {version}: {func.__name__}")
+
+def _create_indexes(conn, table):
+    for index in table.indexes:
+        index.create(conn, checkfirst=True)
+
+@migration(1)
+def playlist_media_key(conn):
+    # The association table had no key, so the same track could be listed twice and every
+    # lookup scanned the table. Rebuilt with (playlist_id, media_id) as primary key plus a
+    # media_id index for the reverse direction, dropping duplicate rows and rows whose
+    # playlist or media no longer exists.
+    table = playlist_media_association
+    key = inspect(conn).get_pk_constraint(table.name).get('constrained_columns') or []
+    if sorted(key) == ['media_id', 'playlist_id']:
+        _create_indexes(conn, table)
+        return
+
+    conn.execute(text(f'ALTER TABLE {table.name} RENAME TO {table.name}_old'))
+    table.create(conn)
+    conn.execute(text(
+        f'INSERT INTO {table.name} (playlist_id, media_id) '
+        f'SELECT DISTINCT playlist_id, media_id FROM {table.name}_old '
+        f'WHERE playlist_id IN (SELECT id FROM playlists) AND media_id IN (SELECT id FROM media)'
+    ))
+    conn.execute(text(f'DROP TABLE {table.name}_old'))
+
+@migration(2)
+def media_sort_keys(conn):
+    # add_missing_columns has created title_sort/artist_sort by now; fill them for rows
+    # written before they existed, then index the columns refresh_library orders by.
+    table = Media.__table__
+    rows = conn.execute(select(table.c.id, table.c.title, table.c.artist)).all()
+    statement = (update(table).where(table.c.id == bindparam('row_id'))
+                 .values(title_sort=bindparam('new_title_sort'), artist_sort=bindparam('new_artist_sort')))
+    for start in range(0, len(rows), BACKFILL_BATCH):
+        conn.execute(statement, [
+            {'row_id': row.id, 'new_title_sort': sort_key(row.title), 'new_artist_sort': sort_key(row.artist)}
+            for row in rows[start:start + BACKFILL_BATCH]
+        ])
+    _create_indexes(conn, table)
+
+@migration(3)
+def winnowed_fingerprint_index(conn):
+    # The hash index now keeps the winnowed minimum of every window instead of every
+    # eighth word. Fingerprints are dropped so the next scan rebuilds them; an index
+    # mixing both schemes would miss duplicates.
+    conn.execute(FingerprintHash.__table__.delete())
+    conn.execute(Fingerprint.__table__.delete())
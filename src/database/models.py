@@ -1,31 +1,92 @@
-from sqlalchemy import Column, Integer, String, Enum, Table, ForeignKey, DateTime
-from sqlalchemy.orm import relationship, declarative_base
+import unicodedata
+from sqlalchemy import Column, Integer, String, Enum, Table, ForeignKey, DateTime, Float, LargeBinary, Boolean, event
+from sqlalchemy.orm import relationship, declarative_base, backref
 from datetime import datetime
 
 Base = declarative_base()
 
 playlist_media_association = Table(
     'playlist_media', Base.metadata,
-    Column('playlist_id', Integer, ForeignKey('playlists.id')),
-    Column('media_id', Integer, ForeignKey('media.id'))
+    Column('playlist_id', Integer, ForeignKey('playlists.id'), primary_key=True),
+    Column('media_id', Integer, ForeignKey('media.id'), primary_key=True, index=True)
 )
 
+def sort_key(text):
+    # Case- and accent-folded form used for ordering, so "Émile" sorts with "emile".
+    if text is None:
+        return None
+    decomposed = unicodedata.normalize('NFKD', text.strip())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+SORTED_FIELDS = {'title': 'title_sort', 'artist': 'artist_sort'}
+
+def add_sort_keys(row):
+    # For bulk insert/update mappings, which bypass the ORM hooks below.
+    for field, key_field in SORTED_FIELDS.items():
+        if field in row:
+            row[key_field] = sort_key(row[field])
+    return row
+
 class Media(Base):
     __tablename__ = 'media'
 
     id = Column(Integer, primary_key=True)
     title = Column(String, nullable=False)
+    title_sort = Column(String, nullable=True, index=True)
     file_path = Column(String, nullable=False, unique=True)
     media_type = Column(String)
     artist = Column(String, nullable=True)
+    artist_sort = Column(String, nullable=True, index=True)
     album = Column(String, nullable=True)
-    duration = Column(Integer, default=0)
+    duration = Column(Integer, default=0, index=True)
+    sample_rate = Column(Integer, nullable=True)
+    channels = Column(Integer, nullable=True)
+    bitrate = Column(Integer, nullable=True)
+    has_cover = Column(Boolean, nullable=True)
     custom_cover_path = Column(String, nullable=True)
-    date_added = Column(DateTime, default=datetime.now)
+    date_added = Column(DateTime, default=datetime.now, index=True)
+    file_mtime = Column(Float, nullable=True)
+    file_size = Column(Integer, nullable=True)
+    loudness_lufs = Column(Float, nullable=True)
+    true_peak_dbtp = Column(Float, nullable=True)
+    replay_gain_db = Column(Float, nullable=True)
+    loudness_mtime = Column(Float, nullable=True)
+    loudness_size = Column(Integer, nullable=True)
 
     def __repr__(self):
         return f"<Media(title='{self.title}', type='{self.media_type}')>"
 
+@event.listens_for(Media, 'before_insert')
+@event.listens_for(Media, 'before_update')
+def _update_sort_keys(mapper, connection, target):
+    for field, key_field in SORTED_FIELDS.items():
+        setattr(target, key_field, sort_key(getattr(target, field)))
+
+class MediaAlias(Base):
+    # Files whose rows were merged into another track as duplicates. Imports skip them, so
+    # rescans and the watcher do not bring the duplicates back.
+    __tablename__ = 'media_aliases'
+
+    id = Column(Integer, primary_key=True)
+    file_path = Column(String, nullable=False, unique=True)
+    media_id = Column(Integer, ForeignKey('media.id'), nullable=False, index=True)
+    date_added = Column(DateTime, default=datetime.now)
+
+    media = relationship("Media", backref=backref("aliases", cascade="all, delete-orphan"))
+
+    def __repr__(self):
+        return f"<MediaAlias(file_path='{self.file_path}', media_id={self.media_id})>"
+
+class LibraryRoot(Base):
+    __tablename__ = 'library_roots'
+
+    id = Column(Integer, primary_key=True)
+    path = Column(String, nullable=False, unique=True)
+    date_added = Column(DateTime, default=datetime.now)
+
+    def __repr__(self):
+        return f"<LibraryRoot(path='{self.path}')>"
+
 class Playlist(Base):
     __tablename__ = 'playlists'
 
@@ -36,3 +97,27 @@ class Playlist(Base):
 
     def __repr__(self):
         return f"<Playlist(name='{self.name}')>"
+
+class Fingerprint(Base):
+    __tablename__ = 'fingerprints'
+
+    media_id = Column(Integer, ForeignKey('media.id'), primary_key=True)
+    data = Column(LargeBinary, nullable=False)
+    duration = Column(Float, nullable=True)
+    mtime = Column(Float, nullable=True)
+    size = Column(Integer, nullable=True)
+
+    media = relationship("Media", backref=backref("fingerprint", uselist=False, cascade="all, delete-orphan"))
+
+    def __repr__(self):
+        return f"<Fingerprint(media_id={self.media_id}, words={len(self.data) // 4})>"
+
+class FingerprintHash(Base):
+    __tablename__ = 'fingerprint_hashes'
+
+    id = Column(Integer, primary_key=True)
+    media_id = Column(Integer, ForeignKey('media.id'), nullable=False, index=True)
+    hash = Column(Integer, nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+
+    media = relationship("Media", backref=backref("fingerprint_hashes", cascade="all, delete-orphan"))
@@ -0,0 +1,65 @@
+from PyQt6.QtCore import QObject, QTimer, QEvent, Qt
+
+DEFAULT_REFRESH_RATE = 60.0
+
+class FrameScheduler(QObject):
+    # One display-rate clock per top-level window. post() keeps only the latest value per
+    # key and applies it on the next frame; animations are ticked every frame until they
+    # return False. The timer only runs while there is work and the window is on screen,
+    # so a hidden or minimized window costs no wakeups at all.
+
+    def __init__(self, window, parent=None):
+        super().__init__(parent or window)
+        self.window = window
+        self._pending = {}
+        self._animations = []
+
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._tick)
+        window.installEventFilter(self)
+
+    def frame_interval_ms(self):
+        screen = self.window.screen()
+        rate = screen.refreshRate() if screen else 0.0
+        return max(1, round(1000.0 / (rate if rate > 0 else DEFAULT_REFRESH_RATE)))
+
+    def is_active(self):
+        return self.window.isVisible() and not self.window.window().isMinimized()
+
+    def post(self, key, callback, value, priority=0):
+        # Lower priority runs first within a frame (e.g. a new duration before the position).
+        self._pending[key] = (priority, callback, value)
+        self._wake()
+
+    def animate(self, callback):
+        if callback not in self._animations:
+            self._animations.append(callback)
+        self._wake()
+
+    def _wake(self):
+        if not self._timer.isActive() and self.is_active():
+            self._timer.start(self.frame_interval_ms())
+
+    def _tick(self):
+        if not self.is_active():
+            self._timer.stop()
+            return
+
+        pending, self._pending = self._pending, {}
+        for _, callback, value in sorted(pending.values(), key=lambda entry: entry[0]):
+            callback(value)
+        self._animations = [callback for callback in self._animations if callback()]
+
+        if not self._pending and not self._animations:
+            self._timer.stop()
+
+    def eventFilter(self, obj, event):
+        if obj is self.window:
+            kind = event.type()
+            if kind == QEvent.Type.Hide:
+                self._timer.stop()
+            elif kind in (QEvent.Type.Show, QEvent.Type.WindowStateChange):
+                if self._pending or self._animations:
+                    self._wake()
+        return False
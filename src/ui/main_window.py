@@ -1,5 +1,6 @@
 import os
-from PyQt6.QtWidgets import QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QFileDialog, QMessageBox, QMenu, QStackedWidget, QLabel
+from datetime import datetime
+from PyQt6.QtWidgets import QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QFileDialog, QMessageBox, QMenu, QStackedWidget, QLabel, QPushButton
 from PyQt6.QtMultimediaWidgets import QVideoWidget
 from PyQt6.QtGui import QAction, QPixmap
 from PyQt6.QtCore import Qt
@@ -11,9 +12,29 @@ from .widgets.media_list import MediaList
 from .widgets.edit_dialog import MediaEditDialog
 from .widgets.equalizer_window import EqualizerWindow
 from ..core.media_player import MediaPlayer
-from ..core.metadata import extract_metadata
+from ..core.play_queue import PlayQueue
+from ..core.track_info import TrackInfoLoader, placeholder_info
+from ..core.library import media_type_for, media_row, tags_for, needs_backfill
+from ..core.library_scanner import LibraryScanner
+from ..core.library_watcher import LibraryWatcher
+from ..core.loudness import playback_gain_db
+from ..core.loudness_scanner import LoudnessScanner
+from ..core.waveform_cache import load_waveform
+from ..core.waveform_builder import WaveformBuilder
+from ..core.fingerprint import merge_media
+from ..core.fingerprint_scanner import FingerprintScanner
+from .widgets.duplicates_dialog import DuplicatesDialog
+from .frame_scheduler import FrameScheduler
 from ..database.db_manager import db_manager
-from ..database.models import Media, Playlist
+from ..database.models import Media, Playlist, LibraryRoot
+
+LIBRARY_SORTS = {
+    "date_desc": ("date_added", True),
+    "date_asc": ("date_added", False),
+    "title_asc": ("title_sort", False),
+    "artist_asc": ("artist_sort", False),
+    "duration_desc": ("duration", True),
+}
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -27,6 +48,13 @@ class MainWindow(QMainWindow):
         self.session = db_manager.get_session()
 
         self.player = MediaPlayer()
+        self.track_info = TrackInfoLoader(parent=self)
+        self.track_info.info_ready.connect(self.on_track_info_ready)
+        self.queue = PlayQueue(self.track_info, self)
+        self.track_info_token = 0
+        self.library_watcher = LibraryWatcher(self)
+        self.library_watcher.media_changed.connect(self.on_library_changed)
+        self.frame_scheduler = FrameScheduler(self)
         self.equalizer_window = EqualizerWindow(self.player, self)
 
         self.setup_ui()
@@ -35,9 +63,19 @@ class MainWindow(QMainWindow):
         self.current_playlist_id = None
         self.current_sort_mode = "date_desc"
         self.current_media_type = None
+        self.loudness_scanner = None
+        self.fingerprint_scanner = None
+        self.library_scanner = None
+        self.queued_scan_roots = []
+        self.current_file_path = None
+        self.waveform_builders = []
 
         self.refresh_library()
         self.load_playlists_sidebar()
+        # Rows imported before tags were stored get them filled in once, in the background.
+        if needs_backfill(self.session):
+            self.start_library_scan()
+        self.library_watcher.add_roots([root.path for root in self.session.query(LibraryRoot)])
 
     def load_styles(self):
         style_path = os.path.join("assets", "styles.qss")
@@ -94,6 +132,11 @@ class MainWindow(QMainWindow):
         self.controls = PlayerControls()
         main_layout.addWidget(self.controls)
 
+        self.cancel_scan_btn = QPushButton("Cancel Import")
+        self.cancel_scan_btn.clicked.connect(self.cancel_library_scan)
+        self.cancel_scan_btn.hide()
+        self.statusBar().addPermanentWidget(self.cancel_scan_btn)
+
         self.create_menus()
 
     def create_close_button(self, callback):
@@ -117,6 +160,18 @@ class MainWindow(QMainWindow):
         add_file_action.triggered.connect(self.add_media_file)
         file_menu.addAction(add_file_action)
 
+        add_folder_action = QAction("Add Folder", self)
+        add_folder_action.triggered.connect(self.add_media_folder)
+        file_menu.addAction(add_folder_action)
+
+        scan_loudness_action = QAction("Scan Loudness", self)
+        scan_loudness_action.triggered.connect(self.scan_loudness)
+        file_menu.addAction(scan_loudness_action)
+
+        find_duplicates_action = QAction("Find Duplicates", self)
+        find_duplicates_action.triggered.connect(self.find_duplicates)
+        file_menu.addAction(find_duplicates_action)
+
         create_playlist_action = QAction("Create Playlist", self)
         create_playlist_action.triggered.connect(self.create_playlist)
         file_menu.addAction(create_playlist_action)
@@ -143,6 +198,10 @@ class MainWindow(QMainWindow):
         sort_artist.triggered.connect(lambda: self.change_sort("artist_asc"))
         sort_menu.addAction(sort_artist)
 
+        sort_duration = QAction("Duration (Longest)", self)
+        sort_duration.triggered.connect(lambda: self.change_sort("duration_desc"))
+        sort_menu.addAction(sort_duration)
+
         equalizer_action = QAction("Equalizer", self)
         equalizer_action.triggered.connect(self.equalizer_window.show)
         menubar.addAction(equalizer_action)
@@ -152,7 +211,7 @@ class MainWindow(QMainWindow):
         self.sidebar.playlist_clicked.connect(self.show_playlist)
         self.sidebar.playlist_delete_requested.connect(self.delete_playlist)
 
-        self.media_list.media_selected.connect(self.play_media)
+        self.media_list.media_selected.connect(self.on_media_selected)
         self.media_list.context_menu_requested.connect(self.on_media_context_menu)
 
         self.controls.title_clicked.connect(self.return_to_media_view)
@@ -161,25 +220,26 @@ class MainWindow(QMainWindow):
         self.controls.pause_clicked.connect(self.player.pause)
         self.controls.volume_changed.connect(self.player.set_volume)
         self.controls.seek_position.connect(self.player.set_position)
+        self.controls.next_clicked.connect(self.play_next)
+        self.controls.prev_clicked.connect(self.play_previous)
 
-        self.player.position_changed.connect(self.controls.update_progress)
-        self.player.duration_changed.connect(self.controls.update_duration)
+        self.player.position_changed.connect(self.on_position_changed)
+        self.player.duration_changed.connect(self.on_duration_changed)
         self.player.state_changed.connect(self.on_player_state_changed)
+        self.player.media_status_changed.connect(self.on_media_status_changed)
+
+    def on_position_changed(self, position):
+        self.frame_scheduler.post('position', self.controls.update_progress, position, priority=1)
+
+    def on_duration_changed(self, duration):
+        self.frame_scheduler.post('duration', self.controls.update_duration, duration)
 
     def add_media_file(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "Open Media", "", "Media Files (*.mp3 *.wav *.mp4 *.avi *.mkv *.mov *.wmv *.flv *.webm *.m4v *.jpg *.png *.gif)")
         if file_path:
-            filename = os.path.basename(file_path)
-            title = os.path.splitext(filename)[0]
-
-            media_type = 'audio'
-            if file_path.lower().endswith(('.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v')):
-                media_type = 'video'
-            elif file_path.lower().endswith(('.jpg', '.png', '.jpeg', '.bmp', '.gif')):
-                 media_type = 'photo'
-
             try:
-                new_media = Media(title=title, file_path=file_path, media_type=media_type)
+                stat = os.stat(file_path)
+                new_media = Media(**media_row(file_path, tags_for(file_path), stat.st_mtime, stat.st_size))
                 self.session.add(new_media)
                 self.session.commit()
                 self.refresh_library()
@@ -188,6 +248,127 @@ class MainWindow(QMainWindow):
                 print(f"Error adding media: {e}")
                 QMessageBox.warning(self, "Error", "Could not add media. It might already exist.")
 
+    def add_media_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "Add Folder")
+        if not folder:
+            return
+        folder = os.path.abspath(folder)
+        if not self.session.query(LibraryRoot).filter_by(path=folder).first():
+            self.session.add(LibraryRoot(path=folder))
+            self.session.commit()
+        self.library_watcher.add_roots([folder])
+
+        # One scan at a time; folders added meanwhile are imported when it finishes.
+        if self.library_scanner and self.library_scanner.isRunning():
+            if folder not in self.queued_scan_roots:
+                self.queued_scan_roots.append(folder)
+            self.statusBar().showMessage(f"Queued {folder}; it will be imported after the current scan.", 5000)
+            return
+        self.statusBar().showMessage(f"Scanning {folder}...")
+        self.start_library_scan(folder)
+
+    def start_library_scan(self, root=None):
+        label = "Importing media" if root else "Reading tags"
+        self.library_scanner = LibraryScanner(root, parent=self)
+        self.library_scanner.progress.connect(
+            lambda done, total: self.statusBar().showMessage(f"{label}: {done}/{total}")
+        )
+        self.library_scanner.scan_finished.connect(self.on_library_scan_finished)
+        self.cancel_scan_btn.show()
+        self.library_scanner.start()
+
+    def cancel_library_scan(self):
+        if self.library_scanner and self.library_scanner.isRunning():
+            self.queued_scan_roots.clear()
+            self.library_scanner.cancel()
+            self.statusBar().showMessage("Cancelling import...")
+
+    def on_library_scan_finished(self, added, updated):
+        self.cancel_scan_btn.hide()
+        if added or updated:
+            self.statusBar().showMessage(f"Import finished: {added} added, {updated} updated", 5000)
+            self.session.expire_all()
+            if self.current_playlist_id is None:
+                self.refresh_library()
+        elif not self.queued_scan_roots:
+            self.statusBar().clearMessage()
+
+        if self.queued_scan_roots:
+            self.start_library_scan(self.queued_scan_roots.pop(0))
+
+    def scan_loudness(self):
+        if self.loudness_scanner and self.loudness_scanner.isRunning():
+            return
+
+        self.loudness_scanner = LoudnessScanner(parent=self)
+        self.loudness_scanner.progress.connect(
+            lambda done, total: self.statusBar().showMessage(f"Measuring loudness: {done}/{total}")
+        )
+        self.loudness_scanner.scan_finished.connect(
+            lambda count: self.statusBar().showMessage(f"Loudness scan finished ({count} tracks)", 5000)
+        )
+        self.loudness_scanner.start()
+
+    def find_duplicates(self):
+        if self.fingerprint_scanner and self.fingerprint_scanner.isRunning():
+            return
+
+        self.fingerprint_scanner = FingerprintScanner(parent=self)
+        self.fingerprint_scanner.progress.connect(
+            lambda stage, done, total: self.statusBar().showMessage(f"{stage}: {done}/{total}")
+        )
+        self.fingerprint_scanner.duplicates_found.connect(self.on_duplicates_found)
+        self.fingerprint_scanner.start()
+
+    def on_duplicates_found(self, groups):
+        if not groups:
+            self.statusBar().showMessage("No duplicate tracks found", 5000)
+            return
+        self.statusBar().showMessage(f"Found {len(groups)} groups of duplicate tracks", 5000)
+
+        media_groups = []
+        for ids in groups:
+            items = [self.session.get(Media, media_id) for media_id in ids]
+            items = sorted((m for m in items if m), key=lambda m: m.date_added or datetime.min)
+            if len(items) > 1:
+                media_groups.append(items)
+
+        dialog = DuplicatesDialog(media_groups, self)
+        if dialog.exec() != DuplicatesDialog.DialogCode.Accepted:
+            return
+
+        try:
+            for keep_id, duplicate_ids in dialog.merge_plan():
+                keep = self.session.get(Media, keep_id)
+                duplicates = [self.session.get(Media, media_id) for media_id in duplicate_ids]
+                merge_media(self.session, keep, [m for m in duplicates if m])
+        except Exception as e:
+            self.session.rollback()
+            QMessageBox.critical(self, "Error", f"Could not merge duplicates: {e}")
+        self.refresh_library()
+        self.load_playlists_sidebar()
+
+    def load_track_waveform(self, file_path):
+        for builder in self.waveform_builders:
+            builder.cancel()
+
+        # A cache hit is a header read plus a memory map, cheap enough for the GUI thread.
+        peaks = load_waveform(file_path)
+        self.controls.set_waveform(peaks)
+        if peaks is not None or not os.path.exists(file_path):
+            return
+
+        builder = WaveformBuilder(file_path, parent=self)
+        builder.waveform_ready.connect(self.on_waveform_ready)
+        builder.finished.connect(lambda: self.waveform_builders.remove(builder))
+        builder.finished.connect(builder.deleteLater)
+        self.waveform_builders.append(builder)
+        builder.start()
+
+    def on_waveform_ready(self, file_path, peaks):
+        if file_path == self.current_file_path:
+            self.controls.set_waveform(peaks)
+
     def refresh_library(self):
         self.current_playlist_id = None
         self.media_list.header_label.setText("Library")
@@ -197,21 +378,43 @@ class MainWindow(QMainWindow):
         try:
             query = self.session.query(Media)
 
-            if self.current_sort_mode == "date_desc":
-                query = query.order_by(Media.date_added.desc())
-            elif self.current_sort_mode == "date_asc":
-                query = query.order_by(Media.date_added.asc())
-            elif self.current_sort_mode == "title_asc":
-                query = query.order_by(Media.title.asc())
-            elif self.current_sort_mode == "artist_asc":
-                query = query.order_by(Media.artist.asc())
+            if self.current_sort_mode in LIBRARY_SORTS:
+                field, descending = LIBRARY_SORTS[self.current_sort_mode]
+                column = getattr(Media, field)
+                query = query.order_by(column.desc() if descending else column.asc())
 
             media_items = query.all()
             for item in media_items:
-                self.media_list.add_media_item(item.title, item.artist, item.file_path, item.id, item.date_added)
+                self.media_list.add_media_item(item.title, item.artist, item.file_path, item.id, item.date_added,
+                                               item.duration, self.library_sort_key(item))
         except Exception as e:
             print(f"Database error: {e}")
 
+    def library_sort_key(self, media):
+        # Mirrors the ORDER BY above (NULLs first ascending, last descending) so single rows
+        # can be placed into the list without re-querying it.
+        field, _ = LIBRARY_SORTS.get(self.current_sort_mode, ("id", False))
+        value = getattr(media, field)
+        return (value is not None, value if value is not None else 0)
+
+    def on_library_changed(self, inserted, updated, deleted):
+        self.media_list.remove_media_items(deleted)
+        changed = set(inserted) | set(updated)
+        if changed:
+            self.session.expire_all()
+        _, descending = LIBRARY_SORTS.get(self.current_sort_mode, ("id", False))
+        for start in range(0, len(changed), 500):
+            ids = list(changed)[start:start + 500]
+            for item in self.session.query(Media).filter(Media.id.in_(ids)):
+                fields = (item.title, item.artist, item.file_path, item.id, item.date_added, item.duration)
+                if self.media_list.has_media_item(item.id):
+                    sort_key = self.library_sort_key(item) if self.current_playlist_id is None else None
+                    self.media_list.update_media_item(*fields, sort_key, descending)
+                elif self.current_playlist_id is None:
+                    self.media_list.insert_media_item(*fields, self.library_sort_key(item), descending)
+        self.statusBar().showMessage(
+            f"Library updated: {len(inserted)} added, {len(updated)} changed, {len(deleted)} removed", 5000)
+
     def change_sort(self, sort_mode):
         self.current_sort_mode = sort_mode
         if self.current_playlist_id is None:
@@ -250,7 +453,7 @@ class MainWindow(QMainWindow):
         self.content_stack.setCurrentWidget(self.media_list)
 
         for item in playlist.media_items:
-             self.media_list.add_media_item(item.title, item.artist, item.file_path, item.id)
+             self.media_list.add_media_item(item.title, item.artist, item.file_path, item.id, duration=item.duration)
 
     def delete_playlist(self, playlist_id):
         playlist = self.session.query(Playlist).get(playlist_id)
@@ -376,11 +579,9 @@ class MainWindow(QMainWindow):
             QMessageBox.critical(self, "Error", f"Could not delete media: {e}")
 
     def play_media(self, file_path):
-        media_type = 'audio'
-        if file_path.lower().endswith(('.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v')):
-            media_type = 'video'
-        elif file_path.lower().endswith(('.jpg', '.png', '.jpeg', '.bmp', '.gif')):
-             media_type = 'photo'
+        # Starts the decoder first; the DB row, tags, cover and photo pixels are resolved on
+        # the track info pool and applied in on_track_info_ready.
+        media_type = media_type_for(file_path)
 
         if media_type == 'video':
             self.player.set_video_output(self.video_widget)
@@ -388,31 +589,12 @@ class MainWindow(QMainWindow):
             self.player.set_video_output(None)
 
         self.current_media_type = media_type
+        self.current_file_path = file_path
 
-        db_media = self.session.query(Media).filter_by(file_path=file_path).first()
-
-        metadata = extract_metadata(file_path)
-
-        title = metadata.get('title', "Unknown Title")
-        artist = metadata.get('artist', "Unknown Artist")
-        cover_image = metadata.get('cover_art')
-        cover_pixmap = QPixmap.fromImage(cover_image) if cover_image else None
-
-        if db_media:
-            if db_media.title:
-                title = db_media.title
-            if db_media.artist:
-                artist = db_media.artist
-
-            if db_media.custom_cover_path and os.path.exists(db_media.custom_cover_path):
-                custom_pixmap = QPixmap(db_media.custom_cover_path)
-                if not custom_pixmap.isNull():
-                    cover_pixmap = custom_pixmap
-
-        if media_type in ['video', 'photo']:
-            self.controls.update_track_info(title, "", cover_pixmap)
-        else:
-            self.controls.update_track_info(title, artist, cover_pixmap)
+        # The previous track's gain must not carry over while the info loads: use the
+        # prefetched gain when there is one, unity otherwise.
+        prefetched = self.queue.take_info(file_path)
+        self.apply_track_gain(prefetched)
 
         if media_type == 'photo':
             self.player.stop()
@@ -422,13 +604,6 @@ class MainWindow(QMainWindow):
                 self.photo_label.setMovie(movie)
                 movie.start()
                 self.content_stack.setCurrentWidget(self.photo_container)
-            else:
-                pixmap = QPixmap(file_path)
-                if not pixmap.isNull():
-                     self.photo_label.setPixmap(pixmap.scaled(self.photo_label.size(), Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
-                     self.content_stack.setCurrentWidget(self.photo_container)
-                else:
-                     QMessageBox.warning(self, "Error", "Could not load image.")
 
         elif media_type == 'video':
             self.content_stack.setCurrentWidget(self.video_container)
@@ -442,12 +617,109 @@ class MainWindow(QMainWindow):
             self.player.play()
             self.controls.set_playing_state(True)
 
+        placeholder = placeholder_info(file_path)
+        self.controls.update_track_info(placeholder['title'], placeholder['artist'], None)
+        size = self.photo_label.size()
+        self.track_info_token = self.track_info.request(
+            file_path,
+            photo_size=(size.width(), size.height()) if media_type == 'photo' else None,
+            prefetched=prefetched,
+        )
+
+        if media_type == 'audio':
+            self.load_track_waveform(file_path)
+        else:
+            self.controls.set_waveform(None)
+
+        self.queue.jump_to(file_path)
+        self.prepare_next_track()
+
+    def apply_track_gain(self, info):
+        # The processor applies the gain while the equalizer is open (the player is muted
+        # then); otherwise it is folded into the player's output volume.
+        gain_db = playback_gain_db(info['replay_gain_db'], info['true_peak_dbtp']) if info else 0.0
+        self.player.set_track_gain(gain_db)
+        self.equalizer_window.processor.set_track_gain(gain_db)
+
+    def on_track_info_ready(self, token, info):
+        if token != self.track_info_token or info['file_path'] != self.current_file_path:
+            return
+
+        self.apply_track_gain(info)
+
+        cover_pixmap = QPixmap.fromImage(info['cover_art']) if info['cover_art'] else None
+        if self.current_media_type in ['video', 'photo']:
+            self.controls.update_track_info(info['title'], "", cover_pixmap)
+        else:
+            self.controls.update_track_info(info['title'], info['artist'], cover_pixmap)
+
+        if self.current_media_type == 'photo' and not info['file_path'].lower().endswith('.gif'):
+            if info['photo'] is not None:
+                self.photo_label.setPixmap(QPixmap.fromImage(info['photo']))
+                self.content_stack.setCurrentWidget(self.photo_container)
+            else:
+                QMessageBox.warning(self, "Error", "Could not load image.")
+
+    def on_media_selected(self, file_path):
+        # The queue follows whatever view playback was started from; photos are skipped
+        # unless one is what was picked.
+        paths = [p for p in self.media_list.file_paths() if p == file_path or media_type_for(p) != 'photo']
+        self.queue.set_items(paths, file_path)
+        self.play_media(file_path)
+
+    def prepare_next_track(self):
+        next_path = self.queue.peek_next()
+        if next_path is None:
+            self.player.clear_preload()
+            return
+        self.queue.prefetch(next_path)
+        if media_type_for(next_path) == 'audio' and self.current_media_type == 'audio':
+            self.player.preload(next_path)
+        else:
+            self.player.clear_preload()
+
+    def play_next(self):
+        next_path = self.queue.advance()
+        if next_path:
+            self.play_media(next_path)
+
+    def play_previous(self):
+        # Like most players: restart the track unless it only just began.
+        if self.player.position() > 3000 or self.queue.index <= 0:
+            self.player.set_position(0)
+            return
+        previous_path = self.queue.previous()
+        if previous_path:
+            self.play_media(previous_path)
+
+    def on_media_status_changed(self, status):
+        from PyQt6.QtMultimedia import QMediaPlayer
+        if status == QMediaPlayer.MediaStatus.EndOfMedia:
+            self.play_next()
+
     def return_to_media_view(self):
         if self.current_media_type == 'video':
             self.content_stack.setCurrentWidget(self.video_container)
         elif self.current_media_type == 'photo':
             self.content_stack.setCurrentWidget(self.photo_container)
 
+    def closeEvent(self, event):
+        if self.library_scanner and self.library_scanner.isRunning():
+            self.library_scanner.cancel()
+            self.library_scanner.wait()
+        if self.loudness_scanner and self.loudness_scanner.isRunning():
+            self.loudness_scanner.cancel()
+            self.loudness_scanner.wait()
+        if self.fingerprint_scanner and self.fingerprint_scanner.isRunning():
+            self.fingerprint_scanner.cancel()
+            self.fingerprint_scanner.wait()
+        for builder in list(self.waveform_builders):
+            builder.cancel()
+            builder.wait()
+        self.track_info.shutdown()
+        self.library_watcher.shutdown()
+        super().closeEvent(event)
+
     def on_player_state_changed(self, state):
         from PyQt6.QtMultimedia import QMediaPlayer
         self.controls.set_playing_state(state == QMediaPlayer.PlaybackState.PlayingState)
@@ -0,0 +1,90 @@
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTreeWidget, QTreeWidgetItem
+from PyQt6.QtCore import Qt
+
+class DuplicatesDialog(QDialog):
+    # One branch per group of matching recordings. The bold entry is kept; checked entries
+    # are merged into it. Double-click an entry to keep it instead.
+    MEDIA_ID_ROLE = Qt.ItemDataRole.UserRole
+    KEEP_ROLE = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, groups, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Duplicate Tracks")
+        self.resize(700, 450)
+        self.groups = groups
+
+        self.setup_ui()
+        self.load_groups()
+
+    def setup_ui(self):
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+
+        layout.addWidget(QLabel("Checked tracks are merged into the bold one, including their playlist "
+                                "memberships. Double-click a track to keep it instead."))
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["Title", "Artist", "File"])
+        self.tree.setColumnWidth(0, 200)
+        self.tree.itemDoubleClicked.connect(self.make_keeper)
+        layout.addWidget(self.tree)
+
+        actions_layout = QHBoxLayout()
+        self.merge_btn = QPushButton("Merge")
+        self.merge_btn.clicked.connect(self.accept)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.reject)
+        actions_layout.addStretch()
+        actions_layout.addWidget(self.merge_btn)
+        actions_layout.addWidget(self.cancel_btn)
+        layout.addLayout(actions_layout)
+
+    def load_groups(self):
+        for group in self.groups:
+            parent = QTreeWidgetItem([f"{len(group)} copies of '{group[0].title}'"])
+            self.tree.addTopLevelItem(parent)
+            for media in group:
+                item = QTreeWidgetItem([media.title or "", media.artist or "", media.file_path])
+                item.setData(0, self.MEDIA_ID_ROLE, media.id)
+                parent.addChild(item)
+            self.set_keeper(parent.child(0))
+            parent.setExpanded(True)
+
+    def set_keeper(self, keeper):
+        parent = keeper.parent()
+        for i in range(parent.childCount()):
+            item = parent.child(i)
+            is_keeper = item is keeper
+            item.setData(0, self.KEEP_ROLE, is_keeper)
+            font = item.font(0)
+            font.setBold(is_keeper)
+            for column in range(3):
+                item.setFont(column, font)
+            if is_keeper:
+                item.setData(0, Qt.ItemDataRole.CheckStateRole, None)
+                item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsUserCheckable)
+            else:
+                item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+                item.setCheckState(0, Qt.CheckState.Checked)
+
+    def make_keeper(self, item, column):
+        if item.parent() is not None:
+            self.set_keeper(item)
+
+    def merge_plan(self):
+        # [(keep_id, [duplicate_id, ...]), ...] for groups with at least one checked track.
+        plan = []
+        for i in range(self.tree.topLevelItemCount()):
+            parent = self.tree.topLevelItem(i)
+            keep_id = None
+            duplicates = []
+            for j in range(parent.childCount()):
+                item = parent.child(j)
+                media_id = item.data(0, self.MEDIA_ID_ROLE)
+                if item.data(0, self.KEEP_ROLE):
+                    keep_id = media_id
+                elif item.checkState(0) == Qt.CheckState.Checked:
+                    duplicates.append(media_id)
+            if keep_id is not None and duplicates:
+                plan.append((keep_id, duplicates))
+        return plan
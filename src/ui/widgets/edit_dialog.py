@@ -1,7 +1,8 @@
 from PyQt6.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QFileDialog, QMessageBox, QWidget
 from PyQt6.QtGui import QPixmap
 from PyQt6.QtCore import Qt
-import os
+
+from ...core.thumbnail_cache import thumbnail_cache
 
 class MediaEditDialog(QDialog):
     def __init__(self, media_item, parent=None):
@@ -72,9 +73,10 @@ class MediaEditDialog(QDialog):
         self.update_cover_display()
 
     def update_cover_display(self):
-        if self.custom_cover_path and os.path.exists(self.custom_cover_path):
-             pixmap = QPixmap(self.custom_cover_path)
-             if not pixmap.isNull():
+        if self.custom_cover_path:
+             image = thumbnail_cache.for_file(self.custom_cover_path, 200)
+             if image is not None:
+                 pixmap = QPixmap.fromImage(image)
                  self.cover_lbl.setPixmap(pixmap.scaled(200, 200, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation))
                  return
 
@@ -1,79 +1,99 @@
 import numpy as np
-from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QSlider, QLabel, QFrame
-from PyQt6.QtCore import Qt, QTimer, QRectF, QThread
+from PyQt6.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QSlider, QLabel, QFrame, QComboBox, QCheckBox
+from PyQt6.QtCore import Qt, QRectF, QThread
 from PyQt6.QtGui import QPainter, QColor, QBrush, QLinearGradient
 from PyQt6.QtMultimedia import QAudioBufferOutput, QAudioBuffer
 
 from ...core.equalizer_processor import EqualizerProcessor
+from ...core.filter_bank import EQ_FREQUENCIES
+from ...core.fir_equalizer import GRAPHIC_31_BAND_FREQUENCIES
+from ..frame_scheduler import FrameScheduler
 
 class VisualizerWidget(QWidget):
-    def __init__(self, parent=None):
+    DECAY = 0.85
+    PEAK_HOLD_FRAMES = 20
+    PEAK_FALL = 0.02
+
+    def __init__(self, parent=None, scheduler=None):
         super().__init__(parent)
         self.setMinimumHeight(150)
         self.setStyleSheet("background-color: #111;")
         self.bars = 30
-        self.values = [0.0] * self.bars
-        self.gains = [1.0] * 10
-
-    def update_data(self, fft_mag, sample_rate, total_samples):
-        if len(fft_mag) == 0:
-             return
-
-        min_freq = 20
-        max_freq = 20000
-
-        log_bins = np.logspace(np.log10(min_freq), np.log10(max_freq), self.bars + 1)
-
-        freq_per_bin = sample_rate / total_samples
-
-        new_values = []
-        for i in range(self.bars):
-            start_freq = log_bins[i]
-            end_freq = log_bins[i+1]
-
-            start_bin = int(start_freq / freq_per_bin)
-            end_bin = int(end_freq / freq_per_bin)
-
-            start_bin = max(0, min(start_bin, len(fft_mag) - 1))
-            end_bin = max(start_bin + 1, min(end_bin, len(fft_mag)))
-
-            chunk = fft_mag[start_bin:end_bin]
-
-            val = 0.0
-            if len(chunk) > 0:
-                val = np.mean(chunk)
+        self.values = np.zeros(self.bars, dtype=np.float32)
+        self.targets = np.zeros(self.bars, dtype=np.float32)
+        self.peaks = np.zeros(self.bars, dtype=np.float32)
+        self.peak_age = np.zeros(self.bars, dtype=np.int32)
+
+        self._bar_brush = None
+        self._peak_brush = QBrush(QColor(255, 255, 255, 200))
+        self._bar_x = []
+        self._bar_width = 0.0
+
+        # Frames are driven by the owning window's scheduler, so the bars animate on the
+        # display clock and stop ticking once they have decayed or the window is hidden.
+        self.scheduler = scheduler or FrameScheduler(self)
+
+    def update_data(self, bands):
+        if len(bands) != self.bars:
+            return
+
+        np.maximum(self.targets, bands, out=self.targets)
+        self.scheduler.animate(self.advance_frame)
+
+    def advance_frame(self):
+        self.values *= self.DECAY
+        np.maximum(self.values, self.targets, out=self.values)
+        self.targets.fill(0.0)
+
+        self.peak_age += 1
+        rising = self.values >= self.peaks
+        self.peaks[rising] = self.values[rising]
+        self.peak_age[rising] = 0
+        falling = self.peak_age > self.PEAK_HOLD_FRAMES
+        self.peaks[falling] = np.maximum(self.peaks[falling] - self.PEAK_FALL, self.values[falling])
+
+        if self.peaks.max() > 0.001:
+            self.update()
+            return True
+        return False
+
+    def _rebuild_geometry(self):
+        width = self.width()
+        height = self.height()
 
-            new_values.append(min(1.0, val))
+        gradient = QLinearGradient(0, height, 0, 0)
+        gradient.setColorAt(0, QColor(0, 255, 0))
+        gradient.setColorAt(0.5, QColor(255, 255, 0))
+        gradient.setColorAt(1, QColor(255, 0, 0))
+        self._bar_brush = QBrush(gradient)
 
-        self.values = new_values
-        self.update()
+        self._bar_width = width / self.bars
+        self._bar_x = [i * self._bar_width + 1 for i in range(self.bars)]
 
-    def set_gains(self, gains):
-        self.gains = gains
+    def resizeEvent(self, event):
+        self._rebuild_geometry()
+        super().resizeEvent(event)
 
     def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        if self._bar_brush is None:
+            self._rebuild_geometry()
 
-        width = self.width()
         height = self.height()
-        bar_width = width / self.bars
+        bar_width = self._bar_width - 2
+        bar_heights = (self.values * height).tolist()
+        peak_ys = (height - self.peaks * height).tolist()
 
-        for i, val in enumerate(self.values):
-            bar_height = val * height
-            x = i * bar_width
-            y = height - bar_height
+        bars = [QRectF(x, height - h, bar_width, h) for x, h in zip(self._bar_x, bar_heights) if h > 0]
+        peaks = [QRectF(x, y - 2, bar_width, 2) for x, y in zip(self._bar_x, peak_ys) if y < height - 2]
 
-            rect = QRectF(x + 1, y, bar_width - 2, bar_height)
-
-            gradient = QLinearGradient(x, height, x, 0)
-            gradient.setColorAt(0, QColor(0, 255, 0))
-            gradient.setColorAt(0.5, QColor(255, 255, 0))
-            gradient.setColorAt(1, QColor(255, 0, 0))
-
-            painter.setBrush(QBrush(gradient))
-            painter.setPen(Qt.PenStyle.NoPen)
-            painter.drawRect(rect)
+        painter = QPainter(self)
+        painter.setPen(Qt.PenStyle.NoPen)
+        if bars:
+            painter.setBrush(self._bar_brush)
+            painter.drawRects(bars)
+        if peaks:
+            painter.setBrush(self._peak_brush)
+            painter.drawRects(peaks)
 
 class EqualizerWindow(QMainWindow):
     def __init__(self, player_instance, parent=None):
@@ -99,6 +119,7 @@ class EqualizerWindow(QMainWindow):
             self.buffer_output.audioBufferReceived.connect(self.processor.process_buffer)
 
         self.processor.visualizer_data_ready.connect(self.on_visualizer_data)
+        self.processor.stats_updated.connect(self.on_stats)
 
         self.setup_ui()
 
@@ -109,7 +130,8 @@ class EqualizerWindow(QMainWindow):
 
         layout = QVBoxLayout(central_widget)
 
-        self.visualizer = VisualizerWidget()
+        self.frame_scheduler = FrameScheduler(self)
+        self.visualizer = VisualizerWidget(scheduler=self.frame_scheduler)
         layout.addWidget(self.visualizer)
 
         line = QFrame()
@@ -117,6 +139,25 @@ class EqualizerWindow(QMainWindow):
         line.setFrameShadow(QFrame.Shadow.Sunken)
         layout.addWidget(line)
 
+        engine_layout = QHBoxLayout()
+        engine_label = QLabel("Mode")
+        engine_label.setStyleSheet("font-size: 10px; color: #aaa;")
+        self.engine_combo = QComboBox()
+        self.engine_combo.addItem("Standard (IIR)", ("iir", EQ_FREQUENCIES))
+        self.engine_combo.addItem("Linear phase (FIR)", ("fir", EQ_FREQUENCIES))
+        # The ten sliders are interpolated onto the 31 bands.
+        self.engine_combo.addItem("Linear phase, 31 bands (FIR)", ("fir", GRAPHIC_31_BAND_FREQUENCIES))
+        self.engine_combo.currentIndexChanged.connect(self.change_engine)
+        engine_layout.addWidget(engine_label)
+        engine_layout.addWidget(self.engine_combo)
+        engine_layout.addStretch()
+
+        self.isolated_check = QCheckBox("Separate DSP process")
+        self.isolated_check.setStyleSheet("font-size: 10px; color: #aaa;")
+        self.isolated_check.toggled.connect(self.set_isolated)
+        engine_layout.addWidget(self.isolated_check)
+        layout.addLayout(engine_layout)
+
         sliders_layout = QHBoxLayout()
         layout.addLayout(sliders_layout)
 
@@ -175,12 +216,37 @@ class EqualizerWindow(QMainWindow):
 
         sliders_layout.addLayout(preamp_layout)
 
+        # Audio path health, refreshed from the processor's periodic stats_updated snapshot.
+        self.stats_label = QLabel()
+        self.stats_label.setStyleSheet("font-size: 10px; color: #aaa;")
+        layout.addWidget(self.stats_label)
+
     def update_gain(self, index, value):
         self.slider_gains_db[index] = float(value)
         self.processor.update_gains(self.slider_gains_db)
 
-    def on_visualizer_data(self, fft_mag, sample_rate, total_samples):
-        self.visualizer.update_data(fft_mag, sample_rate, total_samples)
+    def set_isolated(self, checked):
+        # A direct call on this (the UI) thread: a slot on the processor itself would be
+        # queued onto its thread, and starting the worker process there stalls playback.
+        self.processor.set_isolated(checked)
+
+    def change_engine(self, index):
+        engine, frequencies = self.engine_combo.itemData(index)
+        self.processor.set_engine(engine, frequencies)
+        self.processor.update_gains(self.slider_gains_db)
+
+    def on_visualizer_data(self, bands):
+        self.visualizer.update_data(bands)
+
+    def on_stats(self, stats):
+        text = (f"{stats['output_rate'] / 1000:g} kHz  ·  "
+                f"p95 ≤{stats['process_time_us'].get('p95', 0)} µs, max {stats['max_process_us']:.0f} µs  ·  "
+                f"underruns {stats['underruns']}, overruns {stats['overruns']}")
+        if stats['worker_fallbacks']:
+            text += f"  ·  DSP process fell back: {stats['last_worker_fallback']}"
+        if stats['exceptions']:
+            text += f"  ·  errors {stats['exceptions']} ({stats['last_exception']})"
+        self.stats_label.setText(text)
 
     def showEvent(self, event):
         self.player.set_muted(True)
@@ -2,12 +2,15 @@ from PyQt6.QtWidgets import QWidget, QVBoxLayout, QListWidget, QListWidgetItem,
 from PyQt6.QtCore import Qt, pyqtSignal, QPoint
 from datetime import datetime
 
+SORT_KEY_ROLE = Qt.ItemDataRole.UserRole + 2
+
 class MediaList(QWidget):
     media_selected = pyqtSignal(str)
     context_menu_requested = pyqtSignal(QPoint)
 
     def __init__(self, parent=None):
         super().__init__(parent)
+        self._items = {}
         self.setObjectName("content_area")
         self.setup_ui()
 
@@ -25,19 +28,62 @@ class MediaList(QWidget):
         self.list_widget.itemDoubleClicked.connect(self.on_item_double_clicked)
         layout.addWidget(self.list_widget)
 
-    def add_media_item(self, title, artist, file_path, media_id, date_added=None):
+    def _display_text(self, title, artist, date_added=None, duration=None):
         display_text = f"{title}"
         if artist:
             display_text += f" - {artist}"
 
+        if duration:
+            display_text += f"  [{duration // 60000}:{(duration // 1000) % 60:02}]"
+
         if date_added:
             date_str = date_added.strftime("%Y-%m-%d")
             display_text += f"  (Added: {date_str})"
+        return display_text
 
-        item = QListWidgetItem(display_text)
+    def _make_item(self, title, artist, file_path, media_id, date_added, duration, sort_key):
+        item = QListWidgetItem(self._display_text(title, artist, date_added, duration))
         item.setData(Qt.ItemDataRole.UserRole, file_path)
         item.setData(Qt.ItemDataRole.UserRole + 1, media_id)
-        self.list_widget.addItem(item)
+        item.setData(SORT_KEY_ROLE, sort_key)
+        self._items[media_id] = item
+        return item
+
+    def add_media_item(self, title, artist, file_path, media_id, date_added=None, duration=None, sort_key=None):
+        self.list_widget.addItem(self._make_item(title, artist, file_path, media_id, date_added, duration, sort_key))
+
+    def insert_media_item(self, title, artist, file_path, media_id, date_added, duration, sort_key, descending=False):
+        # Binary search over the keys the list was filled with, so a single new row lands in
+        # place without rebuilding a large list.
+        low, high = 0, self.list_widget.count()
+        while low < high:
+            mid = (low + high) // 2
+            key = self.list_widget.item(mid).data(SORT_KEY_ROLE)
+            if (key >= sort_key) if descending else (key <= sort_key):
+                low = mid + 1
+            else:
+                high = mid
+        self.list_widget.insertItem(low, self._make_item(title, artist, file_path, media_id, date_added, duration, sort_key))
+
+    def update_media_item(self, title, artist, file_path, media_id, date_added, duration, sort_key=None, descending=False):
+        item = self._items.get(media_id)
+        if item is None:
+            return
+        if sort_key is not None and item.data(SORT_KEY_ROLE) != sort_key:
+            self.remove_media_items([media_id])
+            self.insert_media_item(title, artist, file_path, media_id, date_added, duration, sort_key, descending)
+            return
+        item.setText(self._display_text(title, artist, date_added, duration))
+        item.setData(Qt.ItemDataRole.UserRole, file_path)
+
+    def remove_media_items(self, media_ids):
+        for media_id in media_ids:
+            item = self._items.pop(media_id, None)
+            if item is not None:
+                self.list_widget.takeItem(self.list_widget.row(item))
+
+    def has_media_item(self, media_id):
+        return media_id in self._items
 
     def on_item_double_clicked(self, item):
         file_path = item.data(Qt.ItemDataRole.UserRole)
@@ -46,5 +92,9 @@ class MediaList(QWidget):
     def show_context_menu(self, position):
         self.context_menu_requested.emit(position)
 
+    def file_paths(self):
+        return [self.list_widget.item(i).data(Qt.ItemDataRole.UserRole) for i in range(self.list_widget.count())]
+
     def clear(self):
+        self._items = {}
         self.list_widget.clear()
@@ -1,6 +1,8 @@
 from PyQt6.QtWidgets import QWidget, QHBoxLayout, QVBoxLayout, QPushButton, QLabel, QSlider
 from PyQt6.QtCore import Qt, pyqtSignal, QEvent
 
+from .waveform_seek_bar import WaveformSeekBar
+
 class ClickableLabel(QLabel):
     clicked = pyqtSignal()
 
@@ -85,7 +87,7 @@ class PlayerControls(QWidget):
         self.current_time_lbl = QLabel("0:00")
         self.total_time_lbl = QLabel("0:00")
 
-        self.progress_slider = QSlider(Qt.Orientation.Horizontal)
+        self.progress_slider = WaveformSeekBar()
         self.progress_slider.setRange(0, 0)
         self.progress_slider.sliderMoved.connect(self.seek_position)
 
@@ -139,12 +141,18 @@ class PlayerControls(QWidget):
 
     def update_progress(self, position):
         self.progress_slider.setValue(position)
-        self.current_time_lbl.setText(self.format_time(position))
+        # The label only changes once a second; skip relayout-prone setText calls in between.
+        text = self.format_time(position)
+        if text != self.current_time_lbl.text():
+            self.current_time_lbl.setText(text)
 
     def update_duration(self, duration):
         self.progress_slider.setRange(0, duration)
         self.total_time_lbl.setText(self.format_time(duration))
 
+    def set_waveform(self, peaks):
+        self.progress_slider.set_peaks(peaks)
+
     def format_time(self, ms):
         seconds = (ms // 1000) % 60
         minutes = (ms // 60000)
@@ -0,0 +1,148 @@
+from PyQt6.QtWidgets import QWidget, QSizePolicy
+from PyQt6.QtCore import Qt, pyqtSignal, QRect, QRectF
+from PyQt6.QtGui import QPainter, QColor, QPixmap
+
+class WaveformSeekBar(QWidget):
+    # Drop-in for the horizontal QSlider the controls bar used: same range/value API and
+    # sliderMoved signal, but draws the track's peak overview when one is available.
+    sliderMoved = pyqtSignal(int)
+    sliderReleased = pyqtSignal()
+
+    PLAYED_COLOR = QColor("#1DB954")
+    REMAINING_COLOR = QColor("#535353")
+    HANDLE_COLOR = QColor("#FFFFFF")
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(28)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
+        self.setCursor(Qt.CursorShape.PointingHandCursor)
+        self._minimum = 0
+        self._maximum = 0
+        self._value = 0
+        self._dragging = False
+        self._peaks = None
+        self._played_pixmap = None
+        self._remaining_pixmap = None
+
+    def setRange(self, minimum, maximum):
+        self._minimum = minimum
+        self._maximum = max(minimum, maximum)
+        self._value = min(max(self._value, self._minimum), self._maximum)
+        self.update()
+
+    def maximum(self):
+        return self._maximum
+
+    def minimum(self):
+        return self._minimum
+
+    def value(self):
+        return self._value
+
+    def setValue(self, value):
+        if self._dragging:
+            return
+        value = min(max(value, self._minimum), self._maximum)
+        if value == self._value:
+            return
+        old_x = self._position_x(self._value)
+        self._value = value
+        new_x = self._position_x(value)
+        # Only the strip between the old and new playhead changes.
+        left, right = min(old_x, new_x), max(old_x, new_x)
+        self.update(QRect(left - 2, 0, right - left + 4, self.height()))
+
+    def isSliderDown(self):
+        return self._dragging
+
+    def set_peaks(self, peaks):
+        self._peaks = peaks
+        self._played_pixmap = None
+        self._remaining_pixmap = None
+        self.update()
+
+    def _position_x(self, value):
+        span = self._maximum - self._minimum
+        if span <= 0:
+            return 0
+        return int((value - self._minimum) * self.width() / span)
+
+    def _value_at(self, x):
+        span = self._maximum - self._minimum
+        fraction = min(max(x / max(1, self.width()), 0.0), 1.0)
+        return self._minimum + int(round(fraction * span))
+
+    def _render_pixmaps(self):
+        height = self.height()
+        ratio = self.devicePixelRatioF()
+        columns = max(1, int(self.width() * ratio))
+        bars = self._peaks.peaks_for(columns)
+        mid = height / 2.0
+
+        rects = [QRectF(i / ratio, mid - high * mid, 1.0 / ratio, max((high - low) * mid, 1.0 / ratio))
+                 for i, (low, high) in enumerate(bars.tolist())]
+
+        pixmaps = []
+        for color in (self.PLAYED_COLOR, self.REMAINING_COLOR):
+            pixmap = QPixmap(columns, int(height * ratio))
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            painter = QPainter(pixmap)
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(color)
+            painter.drawRects(rects)
+            painter.end()
+            pixmaps.append(pixmap)
+        self._played_pixmap, self._remaining_pixmap = pixmaps
+
+    def resizeEvent(self, event):
+        self._played_pixmap = None
+        self._remaining_pixmap = None
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        width, height = self.width(), self.height()
+        x = self._position_x(self._value)
+
+        if self._peaks is not None:
+            if self._played_pixmap is None:
+                self._render_pixmaps()
+            self._draw_span(painter, self._played_pixmap, 0, x)
+            self._draw_span(painter, self._remaining_pixmap, x, width)
+        else:
+            groove = QRect(0, height // 2 - 2, width, 4)
+            painter.fillRect(groove, self.REMAINING_COLOR)
+            painter.fillRect(QRect(0, groove.y(), x, 4), self.PLAYED_COLOR)
+
+        painter.fillRect(QRect(x - 1, 0, 2, height), self.HANDLE_COLOR)
+        painter.end()
+
+    def _draw_span(self, painter, pixmap, left, right):
+        if right <= left:
+            return
+        ratio = pixmap.devicePixelRatio()
+        source = QRectF(left * ratio, 0, (right - left) * ratio, self.height() * ratio)
+        painter.drawPixmap(QRectF(left, 0, right - left, self.height()), pixmap, source)
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton and self._maximum > self._minimum:
+            self._dragging = True
+            self._move_to(event.position().x())
+
+    def mouseMoveEvent(self, event):
+        if self._dragging:
+            self._move_to(event.position().x())
+
+    def mouseReleaseEvent(self, event):
+        if self._dragging and event.button() == Qt.MouseButton.LeftButton:
+            self._dragging = False
+            self.sliderReleased.emit()
+
+    def _move_to(self, x):
+        value = self._value_at(x)
+        if value != self._value:
+            self._value = value
+            self.update()
+            self.sliderMoved.emit(value)
@@ -0,0 +1,45 @@
+from src.core.audio_ring import AudioRingBuffer
+
+class Device:
+    def __init__(self, room=None):
+        self.room = room
+        self.received = bytearray()
+
+    def write(self, chunk):
+        size = len(chunk) if self.room is None else min(len(chunk), self.room)
+        self.received += bytes(chunk[:size])
+        if self.room is not None:
+            self.room -= size
+        return size
+
+def test_overrun_drops_whole_frames_and_counts_them():
+    ring = AudioRingBuffer(100, frame_bytes=4)
+    assert ring.write(bytes(60)) == 60
+    # 40 bytes free: 10 frames of the 12 offered fit, the rest is dropped.
+    assert ring.write(bytes(48)) == 40
+    assert (ring.overruns, ring.dropped_bytes) == (1, 8)
+    # A full ring drops the whole write and still counts it.
+    assert ring.write(bytes(8)) == 0
+    assert (ring.overruns, ring.dropped_bytes) == (2, 16)
+    assert ring.fill == 100
+
+def test_writes_that_fit_are_not_overruns():
+    ring = AudioRingBuffer(64, frame_bytes=4)
+    ring.write(bytes(64))
+    ring.drain_into(Device(), 32)
+    ring.write(bytes(32))
+    assert (ring.overruns, ring.dropped_bytes) == (0, 0)
+
+def test_wrapped_data_drains_in_order():
+    ring = AudioRingBuffer(8)
+    ring.write(b"abcdef")
+    device = Device()
+    ring.drain_into(device, 4)
+    ring.write(b"ghijkl")
+    # The device takes less than offered: the rest stays queued.
+    device.room = 5
+    assert ring.drain_into(device, 100) == 5
+    device.room = None
+    ring.drain_into(device, 100)
+    assert bytes(device.received) == b"abcdefghijkl"
+    assert ring.fill == 0
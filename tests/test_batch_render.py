@@ -0,0 +1,42 @@
+import wave
+
+import numpy as np
+
+from src.core.batch_render import output_paths, render_files
+from src.core.filter_bank import EQ_FREQUENCIES
+
+def write_tone(path, frequency, sample_rate=8000, seconds=0.25):
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    samples = (0.3 * np.sin(2 * np.pi * frequency * t) * 32767).astype(np.int16)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+
+def read_frames(path):
+    with wave.open(str(path), 'rb') as f:
+        return f.readframes(f.getnframes())
+
+def test_same_named_inputs_render_to_separate_files(tmp_path):
+    first = tmp_path / "music" / "A" / "01 - Intro.wav"
+    second = tmp_path / "music" / "B" / "01 - Intro.wav"
+    write_tone(first, 220.0)
+    write_tone(second, 880.0)
+
+    results = list(render_files([str(first), str(second)], str(tmp_path / "out"),
+                                [0.0] * len(EQ_FREQUENCIES), workers=2))
+
+    assert all('error' not in result for result in results)
+    outputs = sorted(result['output'] for result in results)
+    assert outputs == [str(tmp_path / "out" / "A" / "01 - Intro_eq.wav"),
+                       str(tmp_path / "out" / "B" / "01 - Intro_eq.wav")]
+    assert read_frames(outputs[0]) != read_frames(outputs[1])
+
+def test_colliding_stems_get_a_suffix(tmp_path):
+    outputs = output_paths([str(tmp_path / "song.flac"), str(tmp_path / "song.mp3"), str(tmp_path / "song.flac")],
+                           str(tmp_path / "out"))
+
+    assert sorted(outputs.values()) == [str(tmp_path / "out" / "song_eq.wav"),
+                                        str(tmp_path / "out" / "song_eq_2.wav")]
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from scipy import signal
+
+from src.core.filter_bank import PeakingFilterBank, design_peaking_sections, EQ_FREQUENCIES, BAND_Q
+
+GAINS = [6.0, -3.0, 0.0, 4.5, 0.05, -8.0, 2.0, 0.0, -1.5, 3.0]
+
+def per_band(block, gains, fs):
+    # Reference: every active band as its own biquad, run one after another.
+    out = block
+    for frequency, gain in zip(EQ_FREQUENCIES, gains):
+        if abs(gain) > 0.1:
+            out = signal.sosfilt(design_peaking_sections([frequency], [gain], BAND_Q, fs), out, axis=0)
+    return out
+
+@pytest.mark.parametrize("fs", [44100, 48000])
+def test_cascade_matches_per_band_filters_across_blocks(fs):
+    rng = np.random.default_rng(0)
+    audio = rng.standard_normal((9000, 2))
+    bank = PeakingFilterBank(sample_rate=fs)
+    bank.set_gains(GAINS)
+
+    out = np.concatenate([bank.process(audio[start:start + 700]) for start in range(0, len(audio), 700)])
+    np.testing.assert_allclose(out, per_band(audio, GAINS, fs), atol=1e-10)
+
+def test_bands_inside_the_dead_band_are_skipped():
+    bank = PeakingFilterBank()
+    bank.set_gains(GAINS)
+    assert bank.active_bands == [0, 1, 3, 5, 6, 8, 9]
+    bank.set_gains([0.05] * len(EQ_FREQUENCIES))
+    assert bank.is_flat
+    block = np.ones((16, 2))
+    assert bank.process(block) is block
+
+def test_each_band_peaks_at_its_gain():
+    for frequency, gain in zip(EQ_FREQUENCIES, GAINS):
+        sos = design_peaking_sections([frequency], [gain], BAND_Q, 44100)
+        _, response = signal.sosfreqz(sos, worN=[frequency], fs=44100)
+        assert 20 * np.log10(abs(response[0])) == pytest.approx(gain, abs=1e-9)
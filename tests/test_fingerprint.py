@@ -0,0 +1,60 @@
+import os
+import wave
+
+import numpy as np
+import pytest
+from scipy import signal
+
+from src.core.fingerprint import find_duplicates, find_matches, scan_fingerprints, MAX_BIT_ERROR_RATE
+from src.core.library import scan_folder
+from src.database.db_manager import DatabaseManager
+from src.database.models import Media
+
+def melody(seed, sample_rate=44100, seconds=20):
+    # Random three-note chords, four a second: enough structure to fingerprint.
+    rng = np.random.default_rng(seed)
+    frames = int(sample_rate * 0.25)
+    t = np.arange(frames) / sample_rate
+    chords = []
+    for _ in range(seconds * 4):
+        notes = 220.0 * 2 ** (rng.integers(0, 36, 3) / 12)
+        chords.append(sum(np.sin(2 * np.pi * f * t) for f in notes) * np.hanning(frames))
+    return 0.2 * np.concatenate(chords)
+
+def write_wav(path, samples, sample_rate):
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes((samples * 32767).astype(np.int16).tobytes())
+
+@pytest.fixture
+def session(tmp_path):
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'library.db'}")
+    manager.init_db()
+    session = manager.get_session()
+    yield session
+    session.close()
+
+@pytest.fixture
+def library(tmp_path, session):
+    root = tmp_path / "music"
+    root.mkdir()
+    original = melody(1)
+    write_wav(root / "original.wav", original, 44100)
+    # Starts 1.37 s in, which is not a whole number of fingerprint hops.
+    write_wav(root / "trimmed.wav", original[int(44100 * 1.37):], 44100)
+    write_wav(root / "resampled.wav", signal.resample_poly(original, 160, 147), 48000)
+    write_wav(root / "other.wav", melody(2), 44100)
+    scan_folder(session, str(root))
+    scan_fingerprints(session, workers=1)
+    return {os.path.basename(media.file_path): media.id for media in session.query(Media)}
+
+def test_offset_and_resampled_copies_match_the_original(session, library):
+    matches = dict(find_matches(session, library["original.wav"]))
+    assert set(matches) == {library["trimmed.wav"], library["resampled.wav"]}
+    assert all(ber <= MAX_BIT_ERROR_RATE for ber in matches.values())
+
+def test_duplicates_are_grouped_without_unrelated_tracks(session, library):
+    expected = sorted(library[name] for name in ("original.wav", "trimmed.wav", "resampled.wav"))
+    assert find_duplicates(session) == [expected]
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from src.core.fir_equalizer import PartitionedConvolver
+
+@pytest.mark.parametrize("taps", [1, 300, 512, 1500])
+def test_partitioned_convolution_matches_np_convolve(taps):
+    rng = np.random.default_rng(taps)
+    impulse = rng.standard_normal(taps)
+    signal = rng.standard_normal((5000, 2))
+    convolver = PartitionedConvolver(impulse, block_size=256, channels=2)
+    latency = convolver.latency
+
+    padded = np.concatenate([signal, np.zeros((latency, 2))])
+    pieces, start = [], 0
+    for size in [100, 256, 1, 700, 33] * 100:
+        if start >= len(padded):
+            break
+        pieces.append(convolver.process(padded[start:start + size]).copy())
+        start += size
+    out = np.concatenate(pieces)
+
+    assert np.all(out[:latency] == 0.0)
+    for channel in range(2):
+        expected = np.convolve(signal[:, channel], impulse)[:len(signal)]
+        np.testing.assert_allclose(out[latency:, channel], expected, atol=1e-9)
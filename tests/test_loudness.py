@@ -0,0 +1,36 @@
+import wave
+
+import numpy as np
+import pytest
+
+from src.core.loudness import measure_loudness, playback_gain_db, REPLAY_GAIN_REFERENCE_LUFS
+
+def write_sine(path, level_dbfs, sample_rate=48000, seconds=10.0, frequency=997.0):
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    tone = 10 ** (level_dbfs / 20.0) * np.sin(2 * np.pi * frequency * t)
+    samples = np.repeat((tone * 32767).astype(np.int16)[:, None], 2, axis=1)
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(2)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+
+@pytest.mark.parametrize("sample_rate", [44100, 48000])
+def test_stereo_sine_at_minus_23_dbfs_measures_minus_23_lufs(tmp_path, sample_rate):
+    # EBU Tech 3341: a 1 kHz sine at -23 dBFS in both channels reads -23.0 LUFS.
+    path = tmp_path / "tone.wav"
+    write_sine(path, -23.0, sample_rate)
+    result = measure_loudness(str(path))
+    assert result['loudness_lufs'] == pytest.approx(-23.0, abs=0.1)
+    assert result['replay_gain_db'] == pytest.approx(REPLAY_GAIN_REFERENCE_LUFS + 23.0, abs=0.1)
+    assert result['true_peak_dbtp'] == pytest.approx(-23.0, abs=0.1)
+
+def test_silence_has_no_loudness(tmp_path):
+    path = tmp_path / "silence.wav"
+    write_sine(path, -200.0, seconds=2.0)
+    assert measure_loudness(str(path))['loudness_lufs'] is None
+
+def test_playback_gain_is_held_under_the_true_peak_ceiling():
+    assert playback_gain_db(None, -3.0) == 0.0
+    assert playback_gain_db(5.0, -10.0) == 5.0
+    assert playback_gain_db(5.0, -2.0) == pytest.approx(1.0)
@@ -0,0 +1,74 @@
+import os
+import shutil
+import wave
+
+import pytest
+
+from src.core.fingerprint import merge_media
+from src.core.library import scan_folder
+from src.core.library_watcher import sync_directories
+from src.database.db_manager import DatabaseManager
+from src.database.models import Media, MediaAlias, Playlist
+
+def write_wav(path, frames=800):
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(8000)
+        f.writeframes(b'\0\0' * frames)
+
+@pytest.fixture
+def session(tmp_path):
+    manager = DatabaseManager(f"sqlite:///{tmp_path / 'library.db'}")
+    manager.init_db()
+    session = manager.get_session()
+    yield session
+    session.close()
+
+@pytest.fixture
+def library(tmp_path):
+    root = tmp_path / "music"
+    root.mkdir()
+    write_wav(root / "song.wav")
+    shutil.copy(root / "song.wav", root / "song (copy).wav")
+    return root
+
+def merge_copy(session, root):
+    keep = session.query(Media).filter_by(file_path=str(root / "song.wav")).one()
+    duplicate = session.query(Media).filter_by(file_path=str(root / "song (copy).wav")).one()
+    playlist = Playlist(name="Mix", media_items=[duplicate])
+    session.add(playlist)
+    session.commit()
+    merge_media(session, keep, [duplicate])
+    return keep, playlist
+
+def test_merged_duplicate_stays_merged_after_rescan(session, library):
+    assert scan_folder(session, str(library)) == (2, 0)
+    keep, playlist = merge_copy(session, library)
+
+    assert scan_folder(session, str(library)) == (0, 0)
+    assert [media.file_path for media in session.query(Media)] == [keep.file_path]
+    assert playlist.media_items == [keep]
+    assert [alias.file_path for alias in keep.aliases] == [str(library / "song (copy).wav")]
+
+def test_merged_duplicate_is_not_reimported_by_watcher_sync(session, library):
+    scan_folder(session, str(library))
+    keep, _ = merge_copy(session, library)
+
+    write_wav(library / "other.wav", frames=400)
+    inserted, updated, deleted, _ = sync_directories(session, [str(library)], {str(library)})
+
+    paths = sorted(media.file_path for media in session.query(Media))
+    assert paths == [str(library / "other.wav"), keep.file_path]
+    assert len(inserted) == 1 and not updated and not deleted
+
+def test_aliases_follow_a_chain_of_merges(session, library):
+    shutil.copy(library / "song.wav", library / "song (copy 2).wav")
+    scan_folder(session, str(library))
+    media = {os.path.basename(m.file_path): m for m in session.query(Media)}
+
+    merge_media(session, media["song (copy).wav"], [media["song (copy 2).wav"]])
+    merge_media(session, media["song.wav"], [media["song (copy).wav"]])
+
+    assert scan_folder(session, str(library)) == (0, 0)
+    assert {alias.media_id for alias in session.query(MediaAlias)} == {media["song.wav"].id}
@@ -0,0 +1,75 @@
+import sqlite3
+
+from sqlalchemy import inspect, text
+
+from src.database.db_manager import DatabaseManager
+
+LEGACY_SCHEMA = """
+CREATE TABLE media (
+    id INTEGER PRIMARY KEY,
+    title VARCHAR NOT NULL,
+    file_path VARCHAR NOT NULL UNIQUE,
+    media_type VARCHAR,
+    artist VARCHAR,
+    album VARCHAR,
+    duration INTEGER,
+    custom_cover_path VARCHAR,
+    date_added DATETIME
+);
+CREATE TABLE playlists (
+    id INTEGER PRIMARY KEY,
+    name VARCHAR NOT NULL
+);
+CREATE TABLE playlist_media (
+    playlist_id INTEGER REFERENCES playlists(id),
+    media_id INTEGER REFERENCES media(id)
+);
+"""
+
+def legacy_database(tmp_path):
+    path = tmp_path / "legacy.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.executemany("INSERT INTO media (id, title, file_path, artist) VALUES (?, ?, ?, ?)", [
+        (1, "Émile", "/music/emile.mp3", "Zoë"),
+        (2, "apple", "/music/apple.mp3", None),
+    ])
+    conn.execute("INSERT INTO playlists (id, name) VALUES (1, 'Mix')")
+    conn.executemany("INSERT INTO playlist_media (playlist_id, media_id) VALUES (?, ?)", [
+        (1, 1), (1, 1), (1, 2),
+        (1, 99),       # media no longer exists
+        (7, 1),        # playlist no longer exists
+        (1, None),
+    ])
+    conn.commit()
+    conn.close()
+    return DatabaseManager(f"sqlite:///{path}")
+
+def test_legacy_playlist_rows_are_keyed_and_cleaned(tmp_path):
+    manager = legacy_database(tmp_path)
+    manager.init_db()
+
+    with manager.engine.connect() as conn:
+        rows = conn.execute(text("SELECT playlist_id, media_id FROM playlist_media ORDER BY media_id")).all()
+        key = inspect(conn).get_pk_constraint('playlist_media')['constrained_columns']
+    assert [tuple(row) for row in rows] == [(1, 1), (1, 2)]
+    assert sorted(key) == ['media_id', 'playlist_id']
+
+def test_legacy_media_gets_sort_keys_and_indexes(tmp_path):
+    manager = legacy_database(tmp_path)
+    manager.init_db()
+
+    with manager.engine.connect() as conn:
+        rows = conn.execute(text("SELECT title_sort, artist_sort FROM media ORDER BY id")).all()
+        indexed = {column for index in inspect(conn).get_indexes('media') for column in index['column_names']}
+    assert [tuple(row) for row in rows] == [("emile", "zoe"), ("apple", None)]
+    assert {'title_sort', 'artist_sort', 'date_added', 'duration'} <= indexed
+
+def test_migrations_run_once(tmp_path):
+    manager = legacy_database(tmp_path)
+    manager.init_db()
+    manager.init_db()
+
+    with manager.engine.connect() as conn:
+        versions = [version for (version,) in conn.execute(text("SELECT version FROM schema_migrations"))]
+    assert sorted(versions) == sorted(set(versions))
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from src.core.resampler import PolyphaseResampler
+
+def sine(frames, sample_rate, frequency=1000.0):
+    t = np.arange(frames) / sample_rate
+    return np.repeat((0.5 * np.sin(2 * np.pi * frequency * t))[:, None], 2, axis=1)
+
+def resample(resampler, signal, block):
+    return np.concatenate([resampler.process(signal[start:start + block]).copy()
+                           for start in range(0, len(signal), block)])
+
+@pytest.mark.parametrize("source_rate, target_rate", [(44100, 48000), (48000, 44100), (22050, 48000)])
+def test_output_length_follows_the_rate_ratio(source_rate, target_rate):
+    out = resample(PolyphaseResampler(source_rate, target_rate), sine(source_rate, source_rate), 1000)
+    assert abs(len(out) - target_rate) <= 1
+
+def test_tone_keeps_its_frequency():
+    out = resample(PolyphaseResampler(44100, 48000), sine(44100, 44100), 512)
+    spectrum = np.abs(np.fft.rfft(out[4800:, 0] * np.hanning(len(out) - 4800)))
+    peak_hz = np.argmax(spectrum) * 48000 / (len(out) - 4800)
+    assert abs(peak_hz - 1000.0) < 5.0
+
+def test_buffer_boundaries_do_not_change_the_output():
+    signal = sine(20000, 44100)
+    whole = PolyphaseResampler(44100, 48000).process(signal).copy()
+    # Uneven blocks, including ones too short to produce any output.
+    blocks = [1, 7, 333, 1024, 2, 4096]
+    resampler = PolyphaseResampler(44100, 48000)
+    pieces, start, i = [], 0, 0
+    while start < len(signal):
+        size = blocks[i % len(blocks)]
+        pieces.append(resampler.process(signal[start:start + size]).copy())
+        start += size
+        i += 1
+    np.testing.assert_allclose(np.concatenate(pieces), whole, atol=1e-12)